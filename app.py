@@ -1,5 +1,5 @@
 from app import create_app, db
-from app.models import Client, Quote, QuoteItem, Invoice, InvoiceItem, Payment, EmailLog, Service, User
+from app.models import Client, Quote, QuoteItem, Invoice, InvoiceItem, Payment, EmailLog, Service, User, DocumentSequence
 
 app = create_app()
 
@@ -15,7 +15,8 @@ def make_shell_context():
         'Payment': Payment,
         'EmailLog': EmailLog,
         'Service': Service,
-        'User': User
+        'User': User,
+        'DocumentSequence': DocumentSequence
     }
 
 if __name__ == '__main__':
@@ -20,6 +20,12 @@ def create_app(config_class=Config):
     mail.init_app(app)
     login.init_app(app)
 
+    from app import assets, email_templates, log, query_stats
+    log.init_app(app)
+    query_stats.init_app(app)
+    assets.init_app(app)
+    email_templates.init_app(app)
+
     # Register blueprints here
     from app.routes.clients import bp as clients_bp, api_bp as clients_api_bp
     from app.routes.services import bp as services_bp
@@ -28,6 +34,7 @@ def create_app(config_class=Config):
     from app.routes.payments import bp as payments_bp, api_bp as payments_api_bp
     from app.routes.emails import bp as emails_bp
     from app.routes.auth import bp as auth_bp
+    from app.routes.search import bp as search_bp, api_bp as search_api_bp
     
     app.register_blueprint(clients_bp)
     app.register_blueprint(clients_api_bp)
@@ -40,28 +47,33 @@ def create_app(config_class=Config):
     app.register_blueprint(payments_api_bp)
     app.register_blueprint(emails_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(search_api_bp)
+
+    from app.outbox import outbox_cli
+    app.cli.add_command(outbox_cli)
+    from app.invoice_emails import invoices_cli
+    app.cli.add_command(invoices_cli)
+    from app.perf import perf_cli
+    app.cli.add_command(perf_cli)
+    from app.seed import seed_command
+    app.cli.add_command(seed_command)
 
     @app.route('/')
     @login_required
     def index():
-        from app.models import Client, Quote, Invoice, Payment
-        from datetime import datetime, timedelta
-        
+        from sqlalchemy.orm import joinedload
+        from app.models import Quote, Invoice, Payment
+        from app.stats import dashboard_stats
+
         # Get statistics for dashboard
-        stats = {
-            'total_clients': Client.query.count(),
-            'active_quotes': Quote.query.filter(Quote.status.in_(['draft', 'sent'])).count(),
-            'outstanding_amount': sum(inv.calculate_balance() for inv in Invoice.query.all() if inv.calculate_balance() > 0),
-            'monthly_revenue': sum(p.amount for p in Payment.query.filter(
-                Payment.date >= datetime.now().replace(day=1)
-            ))
-        }
+        stats = dashboard_stats()
         
         # Get recent activity
         recent_activity = []
         
         # Recent quotes
-        recent_quotes = Quote.query.order_by(Quote.date_created.desc()).limit(5).all()
+        recent_quotes = Quote.query.options(joinedload(Quote.client)).order_by(Quote.date_created.desc()).limit(5).all()
         for quote in recent_quotes:
             recent_activity.append({
                 'type': 'quote',
@@ -71,7 +83,7 @@ def create_app(config_class=Config):
             })
         
         # Recent invoices
-        recent_invoices = Invoice.query.order_by(Invoice.date_issued.desc()).limit(5).all()
+        recent_invoices = Invoice.query.options(joinedload(Invoice.client)).order_by(Invoice.date_issued.desc()).limit(5).all()
         for invoice in recent_invoices:
             recent_activity.append({
                 'type': 'invoice',
@@ -81,7 +93,7 @@ def create_app(config_class=Config):
             })
         
         # Recent payments
-        recent_payments = Payment.query.order_by(Payment.date.desc()).limit(5).all()
+        recent_payments = Payment.query.options(joinedload(Payment.invoice)).order_by(Payment.date.desc()).limit(5).all()
         for payment in recent_payments:
             # Only add payments that have valid invoices (avoid orphaned payments)
             if payment.invoice:
@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from app import db
+from app.pagination import decode_cursor, encode_cursor
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Rows fetched from the cursor at a time when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Largest page a client may ask for with ?limit=
+MAX_LIMIT = 1000
+
+# Query parameters every list endpoint understands; filters are per endpoint
+LIST_PARAMS = {'limit', 'after', 'fields', 'stream'}
+
+
+def wants_ndjson():
+    """True when the client asked for newline-delimited JSON.
+
+    Either `?stream=1` or an Accept header that prefers application/x-ndjson.
+    """
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(rows, serialize, batch_size=STREAM_BATCH_SIZE):
+    """Stream rows as one JSON document per line.
+
+    A query is read in batches with yield_per and each row is written as
+    it is serialized, so memory stays flat however large the table is and
+    the first line goes out as soon as the first batch arrives.
+    """
+    dumps = current_app.json.dumps
+    if hasattr(rows, 'yield_per'):
+        rows = rows.yield_per(batch_size)
+
+    def generate():
+        for row in rows:
+            yield dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def list_response(rows, serialize):
+    """Return a list endpoint as a JSON array, or as NDJSON when asked for"""
+    if wants_ndjson():
+        return ndjson_response(rows, serialize)
+    return jsonify([serialize(row) for row in rows])
+
+
+def iso_or_none(value):
+    """Format a date or datetime as ISO 8601, keeping None"""
+    return value.isoformat() if value else None
+
+
+def float_or_zero(value):
+    """Format a Money amount as a float, with None as 0.0"""
+    return float(value) if value else 0.0
+
+
+def parse_since(value):
+    """Parse an ISO 8601 date or datetime into a naive UTC datetime"""
+    since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def in_filter(column, cast=str):
+    """Filter for a comma-separated list of values, e.g. ?status=sent,paid"""
+    return lambda value: column.in_([cast(item) for item in value.split(',') if item])
+
+
+def since_filter(column):
+    """Filter for rows changed at or after an ISO 8601 timestamp"""
+    return lambda value: column >= parse_since(value)
+
+
+def until_filter(column):
+    """Filter for rows at or before an ISO 8601 timestamp"""
+    return lambda value: column <= parse_since(value)
+
+
+def api_list(fields, id_column, filters=None, default_limit=None):
+    """Answer a GET list endpoint from the shared query parameters.
+
+    `fields` maps each output name to (column expression, converter or
+    None); only the columns of the fields named in `?fields=` are
+    selected, and `id` is always included. `filters` maps extra query
+    parameters to functions building a SQL criterion from the raw value.
+    Rows come back in id order. With `?limit=` the response carries the
+    cursor for `?after=` in X-Next-Cursor and a Link rel="next" header;
+    without it every row is returned, as before, unless the endpoint sets
+    `default_limit`. NDJSON streams are never limited by default.
+    """
+    filters = filters or {}
+    args = request.args
+
+    unsupported = sorted(set(args) - LIST_PARAMS - set(filters))
+    if unsupported:
+        return jsonify({'error': f'Unsupported query parameter: {", ".join(unsupported)}'}), 400
+
+    names = list(fields)
+    if args.get('fields'):
+        names = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in fields]
+        if unknown:
+            return jsonify({'error': f'Unknown field: {", ".join(unknown)}'}), 400
+        if 'id' not in names:
+            names.insert(0, 'id')
+
+    query = db.session.query(*[fields[name][0].label(name) for name in names])
+
+    for param, build in filters.items():
+        value = args.get(param)
+        if not value:
+            continue
+        try:
+            query = query.filter(build(value))
+        except ValueError:
+            return jsonify({'error': f'Invalid value for {param}'}), 400
+
+    if args.get('after'):
+        after = decode_cursor(args['after'], [id_column])
+        if after is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(id_column > after[0])
+    query = query.order_by(id_column)
+
+    converters = [(name, fields[name][1]) for name in names]
+
+    def serialize(row):
+        return {name: convert(value) if convert else value
+                for (name, convert), value in zip(converters, row)}
+
+    limit = args.get('limit')
+    if not limit and default_limit and not wants_ndjson():
+        limit = default_limit
+    if not limit:
+        return list_response(query, serialize)
+
+    try:
+        limit = min(max(int(limit), 1), MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'Invalid value for limit'}), 400
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+    response = list_response(rows[:limit], serialize)
+    if next_cursor:
+        next_args = dict(args.items(), after=next_cursor)
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, _external=True, **next_args)}>; rel="next"'
+    return response
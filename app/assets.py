@@ -0,0 +1,87 @@
+import mimetypes
+import os
+import struct
+import zlib
+from collections import namedtuple
+from io import BytesIO
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it images are only recompressed
+    Image = None
+
+InlineAsset = namedtuple('InlineAsset', ['cid', 'filename', 'content_type', 'data'])
+
+# Content-ID -> (path under static/, widest it is displayed in an email, in CSS pixels)
+INLINE_ASSETS = {
+    'company_logo': ('img/AFLOGO.png', 350),
+}
+# Images are resized to this multiple of their display width so they stay sharp on high-DPI screens
+EMAIL_IMAGE_SCALE = 2
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Chunks that affect how a PNG looks; metadata such as eXIf and iTXt is dropped
+PNG_KEPT_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'IDAT', b'IEND'}
+
+
+def _png_chunk(kind, payload):
+    return struct.pack('>I', len(payload)) + kind + payload + struct.pack('>I', zlib.crc32(kind + payload))
+
+
+def optimize_png(data):
+    """Strip metadata chunks from a PNG and recompress its image data"""
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+    chunks, image_data = [], b''
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        payload = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b'IDAT':
+            image_data += payload
+        elif kind == b'IEND':
+            chunks.append(_png_chunk(b'IDAT', zlib.compress(zlib.decompress(image_data))))
+            chunks.append(_png_chunk(kind, payload))
+        elif kind in PNG_KEPT_CHUNKS:
+            chunks.append(_png_chunk(kind, payload))
+    optimized = PNG_SIGNATURE + b''.join(chunks)
+    return optimized if len(optimized) < len(data) else data
+
+
+def resize_image(data, max_width):
+    """Scale an image down to `max_width` pixels wide, if Pillow is installed"""
+    if Image is None:
+        return data
+    image = Image.open(BytesIO(data))
+    if image.width <= max_width:
+        return data
+    image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+    output = BytesIO()
+    image.save(output, format=image.format or 'PNG')
+    return output.getvalue()
+
+
+def load_inline_asset(static_folder, cid, path, display_width):
+    """Read an image and prepare its email-sized variant"""
+    with open(os.path.join(static_folder, path), 'rb') as fp:
+        data = fp.read()
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    resized = resize_image(data, display_width * EMAIL_IMAGE_SCALE)
+    if resized is not data:
+        data = resized
+    elif content_type == 'image/png':
+        data = optimize_png(data)
+    return InlineAsset(cid, os.path.basename(path), content_type, data)
+
+
+def init_app(app):
+    """Load every inline email image once and keep it on the app.
+
+    Messages attach the same bytes object, so sending never touches the
+    disk or copies the image.
+    """
+    app.extensions['inline_assets'] = {
+        cid: load_inline_asset(app.static_folder, cid, path, display_width)
+        for cid, (path, display_width) in INLINE_ASSETS.items()
+    }
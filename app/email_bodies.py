@@ -0,0 +1,95 @@
+import hashlib
+import zlib
+
+from flask import current_app
+from app import db
+from app.models import EmailBodyShell
+
+# Bodies shorter than this are compressed on their own, without a shell
+MIN_SHELL_BODY = 1024
+# A body that compresses worse than this against its type's current shell becomes a new shell
+NEW_SHELL_RATIO = 0.2
+
+
+def shell_id(html):
+    """Content address of a shell: the SHA-256 of its HTML"""
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def compress_body(html, shell=None):
+    """zlib-compress a body, using a shell's HTML as the preset dictionary.
+
+    Emails rendered from the same template share nearly all their markup
+    with the shell, so only the data fields cost more than a few bytes.
+    """
+    if shell:
+        compressor = zlib.compressobj(9, zdict=shell.encode('utf-8'))
+    else:
+        compressor = zlib.compressobj(9)
+    return compressor.compress(html.encode('utf-8')) + compressor.flush()
+
+
+def decompress_body(data, shell=None):
+    """Rebuild the HTML compress_body was given"""
+    if shell:
+        decompressor = zlib.decompressobj(zdict=shell.encode('utf-8'))
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+
+def _state():
+    """Per-app caches: shell HTML by id, and the current shell id per email type"""
+    return current_app.extensions.setdefault('email_bodies', {'shells': {}, 'current': {}})
+
+
+def load_shell(body_shell_id):
+    """The HTML of a shell. Shells never change, so they are cached for the life of the app."""
+    shells = _state()['shells']
+    if body_shell_id not in shells:
+        shells[body_shell_id] = zlib.decompress(db.session.get(EmailBodyShell, body_shell_id).data).decode('utf-8')
+    return shells[body_shell_id]
+
+
+def _current_shell_id(email_type):
+    current = _state()['current']
+    if email_type not in current:
+        shell = (db.session.query(EmailBodyShell.id).filter_by(email_type=email_type)
+                 .order_by(EmailBodyShell.created_at.desc()).first())
+        current[email_type] = shell.id if shell else None
+    return current[email_type]
+
+
+def store_body(html, email_type=None):
+    """Return the (body_shell_id, body_data) to store for an email body.
+
+    The body is compressed against the newest shell of its type. When that
+    saves too little, for example after the template changed, the body
+    itself becomes the new shell. The shell row is added to the session,
+    so it is committed along with the email.
+    """
+    if html is None:
+        return None, None
+    if len(html) < MIN_SHELL_BODY:
+        return None, compress_body(html)
+
+    body_shell_id = _current_shell_id(email_type)
+    # Check the row is still there: a rolled-back transaction takes a new shell with it
+    if body_shell_id and db.session.get(EmailBodyShell, body_shell_id) is not None:
+        data = compress_body(html, load_shell(body_shell_id))
+        if len(data) <= len(html) * NEW_SHELL_RATIO:
+            return body_shell_id, data
+
+    body_shell_id = shell_id(html)
+    if db.session.get(EmailBodyShell, body_shell_id) is None:
+        db.session.add(EmailBodyShell(id=body_shell_id, email_type=email_type, data=zlib.compress(html.encode('utf-8'), 9)))
+    _state()['shells'][body_shell_id] = html
+    _state()['current'][email_type] = body_shell_id
+    return body_shell_id, compress_body(html, html)
+
+
+def load_body(body_shell_id, body_data):
+    """Rebuild an email body from what store_body returned"""
+    if body_data is None:
+        return None
+    return decompress_body(body_data, load_shell(body_shell_id) if body_shell_id else None)
@@ -0,0 +1,181 @@
+import re
+
+from cssmin import cssmin
+
+# Template structure: {% extends %} and non-nested {% block %} pairs
+EXTENDS_RE = re.compile(r'{%-?\s*extends\s+["\']([^"\']+)["\']\s*-?%}')
+BLOCK_RE = re.compile(r'{%-?\s*block\s+(\w+)(?:\s+scoped)?\s*-?%}(.*?){%-?\s*endblock(?:\s+\w+)?\s*-?%}', re.S)
+
+STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*?)(/?)>')
+CLASS_RE = re.compile(r'\bclass="([^"]*)"')
+STYLE_ATTR_RE = re.compile(r'\sstyle="([^"]*)"')
+VOID_TAGS = {'area', 'base', 'br', 'col', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'}
+
+# A compound selector we know how to inline: an optional tag plus classes
+COMPOUND_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[\w-]+)*)$')
+
+
+def flatten_template(source, get_source):
+    """Resolve {% extends %} by pasting the child's blocks into its parent.
+
+    Only handles what the email templates use: one level of non-nested
+    blocks plus top-level {% set %} statements, which are moved to the top.
+    """
+    match = EXTENDS_RE.search(source)
+    if not match:
+        return source
+    blocks = {name: body for name, body in BLOCK_RE.findall(source)}
+    preamble = BLOCK_RE.sub('', EXTENDS_RE.sub('', source)).strip()
+    parent = flatten_template(get_source(match.group(1)), get_source)
+    return preamble + '\n' + BLOCK_RE.sub(lambda block: blocks.get(block.group(1), block.group(2)), parent)
+
+
+def parse_rules(css):
+    """Split a stylesheet into (media, selector, declarations) triples.
+
+    `media` is the @media prelude or None. @import rules are dropped.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'@import\s+(?:url\([^)]*\)|"[^"]*"|\'[^\']*\')[^;]*;', '', css)
+    rules = []
+    position = 0
+    while True:
+        start = css.find('{', position)
+        if start == -1:
+            return rules
+        prelude = css[position:start].strip()
+        if prelude.startswith('@media'):
+            depth, end = 1, start + 1
+            while depth:
+                depth += {'{': 1, '}': -1}.get(css[end], 0)
+                end += 1
+            rules += [(prelude, selector, body) for _, selector, body in parse_rules(css[start + 1:end - 1])]
+            position = end
+        else:
+            end = css.index('}', start)
+            declarations = [d.strip() for d in css[start + 1:end].split(';') if d.strip()]
+            for selector in prelude.split(','):
+                rules.append((None, ' '.join(selector.split()), declarations))
+            position = end + 1
+
+
+def _compile_selector(selector):
+    """(tag, classes) per compound of a descendant selector, or None if it can't be inlined"""
+    compounds = []
+    for part in selector.split(' '):
+        match = COMPOUND_RE.match(part)
+        if not match or not part:
+            return None
+        compounds.append((match.group(1), set(match.group(2).split('.')[1:])))
+    return compounds
+
+
+def _matches(compounds, element, ancestors):
+    """Does a descendant selector match an element with the given ancestors?"""
+    def fits(compound, node):
+        tag, classes = compound
+        return (tag is None or tag == node[0]) and classes <= node[1]
+
+    if not fits(compounds[-1], element):
+        return False
+    remaining = compounds[:-1]
+    for node in reversed(ancestors):
+        if remaining and fits(remaining[-1], node):
+            remaining = remaining[:-1]
+    return not remaining
+
+
+def _specificity(compounds):
+    return (sum(len(classes) for _, classes in compounds), sum(1 for tag, _ in compounds if tag))
+
+
+def inline_css(source):
+    """Move the <style> rules of an email onto the elements they style.
+
+    Rules that match nothing are dropped. Pseudo-element rules and @media
+    rules can't be inlined; the ones that apply to an element are kept in
+    a minified <style> block, with the media overrides marked !important
+    so they still beat the inline styles. So are rules whose selector is
+    more than tags, classes and descendants.
+    """
+    style = STYLE_RE.search(source)
+    if not style:
+        return source
+    rules = []
+    for order, (media, selector, declarations) in enumerate(parse_rules(style.group(1))):
+        base_selector = selector.split('::')[0].split(':')[0]
+        compounds = _compile_selector(base_selector)
+        rules.append({
+            'media': media,
+            'selector': selector,
+            'declarations': declarations,
+            'inline': media is None and base_selector == selector and compounds is not None,
+            'compounds': compounds,
+            'order': order,
+            # A selector we can't match (an id, a child combinator) is kept as written
+            'used': compounds is None,
+        })
+    source = source[:style.start()] + source[style.end():]
+
+    stack = []
+
+    def rewrite(tag_match):
+        closing, tag, attributes, self_closing = tag_match.groups()
+        tag = tag.lower()
+        if closing:
+            while stack and stack.pop()[0] != tag:
+                pass
+            return tag_match.group(0)
+        class_match = CLASS_RE.search(attributes)
+        element = (tag, set(class_match.group(1).split()) if class_match else set())
+        applied = []
+        for rule in rules:
+            if rule['compounds'] and _matches(rule['compounds'], element, stack):
+                rule['used'] = True
+                if rule['inline']:
+                    applied.append(rule)
+        if tag not in VOID_TAGS and not self_closing:
+            stack.append(element)
+        if not applied:
+            return tag_match.group(0)
+
+        applied.sort(key=lambda rule: (_specificity(rule['compounds']), rule['order']))
+        declarations = [d for rule in applied for d in rule['declarations']]
+        existing = STYLE_ATTR_RE.search(attributes)
+        if existing:
+            declarations += existing.group(1).split(';')
+            attributes = attributes[:existing.start()] + attributes[existing.end():]
+        # Later declarations win, so keep only the last value of each property
+        properties = {}
+        for declaration in declarations:
+            name, _, value = declaration.partition(':')
+            if value.strip():
+                properties.pop(name.strip().lower(), None)
+                properties[name.strip().lower()] = value.strip()
+        inline_style = ';'.join(f'{name}:{value}' for name, value in properties.items())
+        return f'<{tag}{attributes} style="{inline_style}"{self_closing}>'
+
+    source = TAG_RE.sub(rewrite, source)
+
+    # Rules that still need a stylesheet, grouped by @media prelude (None for none)
+    leftover = {}
+    for rule in rules:
+        if rule['inline'] or not rule['used']:
+            continue
+        declarations = rule['declarations']
+        if rule['media']:
+            declarations = [d if d.endswith('!important') else f'{d} !important' for d in declarations]
+        leftover.setdefault(rule['media'], []).append(f"{rule['selector']}{{{';'.join(declarations)}}}")
+    if leftover:
+        css = ''.join(leftover.pop(None, []))
+        css += ''.join(f"{media}{{{''.join(media_rules)}}}" for media, media_rules in leftover.items())
+        head_end = source.find('</head>')
+        source = source[:head_end] + f'<style>{cssmin(css)}</style>' + source[head_end:]
+    return source
+
+
+def minify_html(source):
+    """Drop the indentation and line breaks between tags and template statements"""
+    source = re.sub(r'(>|%})\s+(?=<|{%)', r'\1', source)
+    return re.sub(r'\s*\n\s*', '\n', source).strip()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+from flask import current_app
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from app.email_css import flatten_template, inline_css, minify_html
+
+# Document type -> template under app/templates/email/
+EMAIL_TEMPLATES = {
+    'quote': 'quote.html',
+    'invoice': 'invoice.html',
+}
+
+# The inliner's own source; editing it invalidates the cached inlined templates
+INLINER_PATH = os.path.join(os.path.dirname(__file__), 'email_css.py')
+
+
+def money(value):
+    """Format an amount the way the emails always have: $1234.50"""
+    return f'${float(value or 0):.2f}'
+
+
+def long_date(value):
+    """Format a date as 'January 05, 2026', passing anything else through"""
+    return value.strftime('%B %d, %Y') if hasattr(value, 'strftime') else value
+
+
+class InlinedEmailLoader(FileSystemLoader):
+    """Serve each email template flattened, with its CSS inlined and minified.
+
+    The processing happens once, when Jinja first loads the template, so a
+    send only substitutes data into the finished markup. The result is kept
+    in `cache_dir` keyed on the templates' and the inliner's mtimes, so
+    later processes read it back instead of inlining again.
+    """
+
+    def __init__(self, searchpath, cache_dir):
+        super().__init__(searchpath)
+        self.cache_dir = cache_dir
+
+    def source_key(self, template):
+        """Changes whenever any email template (a parent included) or app/email_css.py is edited"""
+        paths = [os.path.join(self.searchpath[0], name) for name in self.list_templates()] + [INLINER_PATH]
+        stamps = ';'.join(f'{path}:{os.stat(path).st_mtime_ns}' for path in paths)
+        return hashlib.sha1(f'{template};{stamps}'.encode('utf-8')).hexdigest()
+
+    def get_source(self, environment, template):
+        filename = os.path.join(self.searchpath[0], template)
+        key = self.source_key(template)
+        cached = os.path.join(self.cache_dir, f'__inlined_{key}.html')
+        try:
+            with open(cached, encoding='utf-8') as f:
+                source = f.read()
+        except OSError:
+            def load(name):
+                return super(InlinedEmailLoader, self).get_source(environment, name)[0]
+
+            source = minify_html(inline_css(flatten_template(load(template), load)))
+            # Written under a temporary name first, so another process never reads half a file
+            partial = f'{cached}.{os.getpid()}'
+            with open(partial, 'w', encoding='utf-8') as f:
+                f.write(source)
+            os.replace(partial, cached)
+        return source, filename, lambda: self.source_key(template) == key
+
+
+def init_app(app):
+    """Compile the email templates once and keep them on the app.
+
+    The templates get their own Jinja environment so they can be rendered
+    outside a request, as `flask invoices send-bulk` does. Compiled
+    bytecode and the inlined sources are cached on disk in
+    EMAIL_TEMPLATE_CACHE_DIR, or the system temp directory, so later
+    processes skip inlining and parsing too.
+    """
+    cache_dir = app.config.get('EMAIL_TEMPLATE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    env = Environment(
+        loader=InlinedEmailLoader(os.path.join(app.root_path, 'templates', 'email'), bytecode_cache.directory),
+        autoescape=True,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=app.debug,
+        bytecode_cache=bytecode_cache
+    )
+    env.filters['money'] = money
+    env.filters['long_date'] = long_date
+    app.extensions['email_templates'] = {kind: env.get_template(name) for kind, name in EMAIL_TEMPLATES.items()}
+
+
+def render_email(kind, document, client, items, custom_message=''):
+    """Render the HTML body of a quote or invoice email"""
+    template = current_app.extensions['email_templates'][kind]
+    return template.render(document=document, client=client, items=items, custom_message=custom_message)
+
+
+def render_quote_email(quote, client, items, custom_message=''):
+    """Return the (subject, HTML body) of the email for a quote"""
+    subject = f'Your Quote #{quote.quote_number} from Aquaforce Pressure Washing'
+    return subject, render_email('quote', quote, client, items, custom_message)
+
+
+def render_invoice_email(invoice, client, items, custom_message=''):
+    """Return the (subject, HTML body) of the email for an invoice.
+
+    `items` is passed in rather than read from invoice.items so bulk sends
+    can hand over line items they loaded up front.
+    """
+    subject = f'Invoice #{invoice.invoice_number} from Aquaforce Pressure Washing'
+    return subject, render_email('invoice', invoice, client, items, custom_message)
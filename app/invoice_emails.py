@@ -0,0 +1,155 @@
+import time
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.orm import contains_eager
+from app import db
+from app.email_bodies import store_body
+from app.email_templates import render_invoice_email
+from app.log import log_event
+from app.models import Client, EmailLog, Invoice, InvoiceItem
+from app.outbox import process_outbox
+from app.smtp_pool import get_pool
+
+invoices_cli = AppGroup('invoices', help='Bulk invoice operations.')
+
+# Items are loaded with one IN query per this many invoices
+ITEM_LOAD_CHUNK = 500
+
+
+def select_invoices(statuses=None, due_from=None, due_to=None, client_ids=None):
+    """Return the invoices a bulk send applies to, with their clients loaded.
+
+    Without `statuses` this is every unsent (draft) invoice plus every
+    invoice with a balance past its due date. Invoices whose client has no
+    email address are left out.
+    """
+    query = (Invoice.query.join(Invoice.client).options(contains_eager(Invoice.client))
+             .filter(Client.email.isnot(None), Client.email != ''))
+    if statuses:
+        query = query.filter(Invoice.status.in_(statuses))
+    else:
+        query = query.filter(db.or_(
+            Invoice.status == 'draft',
+            db.and_(Invoice.balance > 0, Invoice.due_date < date.today(), Invoice.status != 'paid')
+        ))
+    if due_from:
+        query = query.filter(Invoice.due_date >= due_from)
+    if due_to:
+        query = query.filter(Invoice.due_date <= due_to)
+    if client_ids:
+        query = query.filter(Invoice.client_id.in_(client_ids))
+    # Sorted here rather than in SQL: ORDER BY id makes SQLite walk the whole
+    # table in rowid order instead of using the status and balance indexes
+    return sorted(query.all(), key=lambda invoice: invoice.id)
+
+
+def load_items(invoice_ids):
+    """Map invoice id -> its line items, in a handful of IN queries"""
+    items = {invoice_id: [] for invoice_id in invoice_ids}
+    for start in range(0, len(invoice_ids), ITEM_LOAD_CHUNK):
+        chunk = invoice_ids[start:start + ITEM_LOAD_CHUNK]
+        for item in InvoiceItem.query.filter(InvoiceItem.invoice_id.in_(chunk)).order_by(InvoiceItem.id):
+            items[item.invoice_id].append(item)
+    return items
+
+
+def queue_invoice_emails(invoices, custom_message='', progress=None):
+    """Render and queue the email for every invoice in one transaction.
+
+    Clients and items are loaded up front, so rendering runs no queries; the
+    EmailLog rows go in with a single executemany INSERT and draft invoices
+    are marked sent with a single UPDATE. `progress` is called with the number
+    of emails rendered so far. Returns the number of emails queued.
+    """
+    if not invoices:
+        return 0
+    items = load_items([invoice.id for invoice in invoices])
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    rows = []
+    for invoice in invoices:
+        subject, body = render_invoice_email(invoice, invoice.client, items[invoice.id], custom_message)
+        body_shell_id, body_data = store_body(body, 'invoice')
+        rows.append({
+            'client_id': invoice.client_id,
+            'invoice_id': invoice.id,
+            'email_type': 'invoice',
+            'subject': subject,
+            'body_shell_id': body_shell_id,
+            'body_data': body_data,
+            'recipient': invoice.client.email,
+            'status': 'queued',
+            'attempts': 0,
+            'created_at': now,
+            'next_attempt_at': now,
+        })
+        if progress:
+            progress(len(rows))
+
+    # Any new body shell has to exist before the rows that point at it
+    db.session.flush()
+    db.session.execute(db.insert(EmailLog), rows)
+    # Overdue invoices keep their status; only drafts become 'sent'
+    db.session.execute(
+        db.update(Invoice).where(Invoice.id.in_([invoice.id for invoice in invoices]), Invoice.status == 'draft')
+        .values(status='sent').execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    log_event('invoice_emails.queued', count=len(rows), custom_message=bool(custom_message),
+              duration_ms=round((time.perf_counter() - started) * 1000, 1))
+    return len(rows)
+
+
+def _split_ids(value):
+    return [int(item) for item in value.split(',') if item] if value else None
+
+
+@invoices_cli.command('send-bulk')
+@click.option('--status', help='Comma-separated statuses (default: drafts and overdue invoices).')
+@click.option('--due-from', type=click.DateTime(['%Y-%m-%d']), help='Earliest due date.')
+@click.option('--due-to', type=click.DateTime(['%Y-%m-%d']), help='Latest due date.')
+@click.option('--client', 'client_ids', help='Comma-separated client ids.')
+@click.option('--message', default='', help='Custom message shown under the greeting.')
+@click.option('--dry-run', is_flag=True, help='List the invoices without queuing anything.')
+@click.option('--deliver', is_flag=True, help='Deliver the queued emails now over one pooled connection.')
+def send_bulk_command(status, due_from, due_to, client_ids, message, dry_run, deliver):
+    """Email every invoice matching the filters."""
+    invoices = select_invoices(
+        statuses=status.split(',') if status else None,
+        due_from=due_from.date() if due_from else None,
+        due_to=due_to.date() if due_to else None,
+        client_ids=_split_ids(client_ids)
+    )
+    if dry_run:
+        for invoice in invoices:
+            click.echo(f'{invoice.invoice_number:<12} {invoice.status:<8} {invoice.client.email}')
+        click.echo(f'{len(invoices)} invoice(s) match')
+        return
+
+    with click.progressbar(length=len(invoices), label='Rendering') as bar:
+        rendered = [0]
+
+        def advance(done):
+            bar.update(done - rendered[0])
+            rendered[0] = done
+
+        queued = queue_invoice_emails(invoices, message, progress=advance)
+    click.echo(f'Queued {queued} email(s)')
+
+    if deliver and queued:
+        total_sent = total_failed = 0
+        try:
+            with click.progressbar(length=queued, label='Sending') as bar:
+                while True:
+                    sent, failed = process_outbox()
+                    if not sent and not failed:
+                        break
+                    total_sent += sent
+                    total_failed += failed
+                    bar.update(sent + failed)
+        finally:
+            get_pool().close()
+        click.echo(f'Sent {total_sent}, failed {total_failed} attempt(s)')
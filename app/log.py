@@ -0,0 +1,78 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import current_app
+from flask.logging import default_handler
+
+# The thread writing queued records to the log file
+_listener = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event and the event's fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None) or record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def init_app(app):
+    """Send the app's log records to a rotating file through a background thread.
+
+    Request threads only format the record and put it on an in-memory
+    queue; a QueueListener thread does the file writes. Flask's stderr
+    handler is taken off app.logger too, since it writes in the request
+    thread. An empty LOG_FILE turns the file sink off and keeps Flask's
+    stderr handler.
+    """
+    global _listener
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    # app.logger is shared by every app in the process, so replace what an earlier create_app set up
+    for handler in [h for h in app.logger.handlers if isinstance(h, QueueHandler)]:
+        app.logger.removeHandler(handler)
+    if _listener:
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+        _listener = None
+
+    log_file = app.config['LOG_FILE']
+    if not log_file:
+        if default_handler not in app.logger.handlers:
+            app.logger.addHandler(default_handler)
+        return
+    # A bare file name goes in the working directory, which exists
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=app.config['LOG_MAX_BYTES'], backupCount=app.config['LOG_BACKUP_COUNT'], encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.setFormatter(JSONFormatter())
+    _listener = QueueListener(records, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queue_handler)
+
+
+def log_event(event, level=logging.INFO, exc_info=None, **fields):
+    """Log a structured event, e.g. log_event('email.sent', email_log_id=3, duration_ms=41.2)"""
+    current_app.logger.log(level, event, exc_info=exc_info, extra={'event': event, 'fields': fields}, stacklevel=2)
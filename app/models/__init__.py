@@ -2,6 +2,16 @@ from app.models.client import Client
 from app.models.quote import Quote, QuoteItem
 from app.models.invoice import Invoice, InvoiceItem
 from app.models.payment import Payment
-from app.models.email_log import EmailLog
+from app.models.email_log import EmailLog, EmailBodyShell
 from app.models.service import Service
-from app.models.user import User 
\ No newline at end of file
+from app.models.user import User
+from app.models.sequence import DocumentSequence
+
+from app import db
+from app.search import SQLITE_GLOBAL_SEARCH_DDL, POSTGRES_GLOBAL_SEARCH_DDL
+
+# The global search index spans several tables, so create it once they all exist
+for statement in SQLITE_GLOBAL_SEARCH_DDL:
+    db.event.listen(db.metadata, 'after_create', db.DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_GLOBAL_SEARCH_DDL:
+    db.event.listen(db.metadata, 'after_create', db.DDL(statement).execute_if(dialect='postgresql'))
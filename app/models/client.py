@@ -1,8 +1,12 @@
 from datetime import datetime
 from app import db
+from app.search import SQLITE_CLIENT_SEARCH_DDL, POSTGRES_CLIENT_SEARCH_DDL
 
 class Client(db.Model):
     __tablename__ = 'clients'
+    __table_args__ = (
+        db.Index('ix_clients_name_id', 'name', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -14,12 +18,18 @@ class Client(db.Model):
     state = db.Column(db.String(50))
     zip_code = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
-    quotes = db.relationship('Quote', backref='client', lazy='dynamic')
-    invoices = db.relationship('Invoice', backref='client', lazy='dynamic')
-    email_logs = db.relationship('EmailLog', backref='client', lazy='dynamic')
+    quotes = db.relationship('Quote', backref='client')
+    invoices = db.relationship('Invoice', backref='client')
+    email_logs = db.relationship('EmailLog', backref='client')
     
     def __repr__(self):
-        return f'<Client {self.name}>' 
\ No newline at end of file
+        return f'<Client {self.name}>'
+
+# Full-text search index, created alongside the table (see app/search.py)
+for statement in SQLITE_CLIENT_SEARCH_DDL:
+    db.event.listen(Client.__table__, 'after_create', db.DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_CLIENT_SEARCH_DDL:
+    db.event.listen(Client.__table__, 'after_create', db.DDL(statement).execute_if(dialect='postgresql'))
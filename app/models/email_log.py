@@ -2,7 +2,20 @@ from datetime import datetime
 from app import db
 
 class EmailLog(db.Model):
+    """An outgoing email and its delivery state.
+
+    Send routes insert rows as 'queued'; the outbox worker (app/outbox.py)
+    delivers them and moves them to 'sent', or back to 'queued' with a
+    later next_attempt_at after a failure, until they run out of attempts
+    and become 'failed'.
+    """
     __tablename__ = 'email_logs'
+    __table_args__ = (
+        db.Index('ix_email_logs_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_email_logs_client_id_sent_at', 'client_id', 'sent_at'),
+        db.Index('ix_email_logs_invoice_id_sent_at', 'invoice_id', 'sent_at'),
+        db.Index('ix_email_logs_quote_id_sent_at', 'quote_id', 'sent_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'))
@@ -10,9 +23,47 @@ class EmailLog(db.Model):
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'))
     email_type = db.Column(db.String(20))  # quote, invoice
     subject = db.Column(db.String(200))
-    body = db.Column(db.Text)
+    body_shell_id = db.Column(db.String(64), db.ForeignKey('email_body_shells.id'))
+    # Deferred: lists of logs never need the body, so it loads on first access
+    body_data = db.deferred(db.Column(db.LargeBinary))
     recipient = db.Column(db.String(100))
-    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    
+    @property
+    def body(self):
+        """The HTML body, rebuilt from its shell and compressed data (see app/email_bodies.py)"""
+        from app.email_bodies import load_body
+        return load_body(self.body_shell_id, self.body_data)
+
+    def set_body(self, html, email_type):
+        """Store the HTML body compressed against the current shell of `email_type` (quote, invoice)"""
+        from app.email_bodies import store_body
+        self.body_shell_id, self.body_data = store_body(html, email_type)
+    
+    def __repr__(self):
+        return f'<EmailLog {self.email_type} to {self.recipient}>'
+
+
+class EmailBodyShell(db.Model):
+    """A representative email body that others of its type are compressed against.
+
+    Rows are content-addressed by the SHA-256 of the HTML and never change,
+    so any number of email_logs rows can share one.
+    """
+    __tablename__ = 'email_body_shells'
+    __table_args__ = (
+        db.Index('ix_email_body_shells_email_type_created_at', 'email_type', 'created_at'),
+    )
+    
+    id = db.Column(db.String(64), primary_key=True)
+    email_type = db.Column(db.String(20))
+    data = db.Column(db.LargeBinary, nullable=False)  # zlib-compressed HTML
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<EmailLog {self.email_type} to {self.recipient}>' 
\ No newline at end of file
+        return f'<EmailBodyShell {self.email_type} {self.id[:12]}>'
@@ -1,61 +1,90 @@
 from datetime import datetime
-from decimal import Decimal
 from app import db
+from app.money import Money, MoneyType
 
 class Invoice(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('ix_invoices_date_issued_id', 'date_issued', 'id'),
+        db.Index('ix_invoices_status_date_issued_id', 'status', 'date_issued', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
-    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'))
+    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False, index=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'), index=True)
     invoice_number = db.Column(db.String(20), unique=True, nullable=False)
     date_issued = db.Column(db.Date, default=datetime.utcnow().date)
     due_date = db.Column(db.Date)
     status = db.Column(db.String(20), default='draft')  # draft, sent, paid, overdue
     notes = db.Column(db.Text)
-    total = db.Column(db.Numeric(10, 2), default=0.0)
+    total = db.Column(MoneyType, default=Money(0))
+    amount_paid = db.Column(MoneyType, nullable=False, default=Money(0))
+    balance = db.Column(MoneyType, nullable=False, default=Money(0), index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
-    items = db.relationship('InvoiceItem', backref='invoice', lazy='dynamic', cascade='all, delete-orphan')
-    payments = db.relationship('Payment', backref='invoice', lazy='dynamic')
-    email_logs = db.relationship('EmailLog', backref='invoice', lazy='dynamic')
+    items = db.relationship('InvoiceItem', backref='invoice', cascade='all, delete-orphan', order_by='InvoiceItem.id')
+    payments = db.relationship('Payment', backref='invoice', order_by='Payment.date')
+    email_logs = db.relationship('EmailLog', backref='invoice', order_by='EmailLog.id')
     
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
     
     def calculate_total(self):
-        """Calculate the total from all line items"""
-        from decimal import Decimal
-        self.total = sum(item.line_total or Decimal('0') for item in self.items) or Decimal('0')
+        """Set the total to the sum of the line items, added up by the database.
+
+        Flush new and changed items first; self.items may be loaded already
+        and not reflect them.
+        """
+        self.total = db.session.query(db.func.coalesce(db.func.sum(InvoiceItem.line_total), 0)).filter(
+            InvoiceItem.invoice_id == self.id
+        ).scalar()
         return self.total
     
-    def calculate_balance(self):
-        """Calculate remaining balance after payments"""
-        if self.total is None:
-            return Decimal('0.0')
-        # Convert to Decimal to ensure consistency
-        total = Decimal(str(self.total)) if not isinstance(self.total, Decimal) else self.total
-        total_paid = sum((Decimal(str(payment.amount)) if not isinstance(payment.amount, Decimal) else payment.amount) for payment in self.payments)
-        return total - total_paid
+    @db.validates('total')
+    def validate_total(self, key, total):
+        """Keep the stored balance in step whenever the total changes"""
+        total = Money.of(total)
+        self.balance = (total or Money(0)) - (self.amount_paid or Money(0))
+        return total
+    
+    @db.validates('amount_paid', 'balance')
+    def validate_money(self, key, value):
+        return Money.of(value)
+    
+    def update_balance(self):
+        """Recalculate amount_paid and balance from the payments table.
+        
+        Call this after every payment write, inside the same transaction,
+        so the stored columns never drift from the payments rows.
+        """
+        from app.models.payment import Payment
+        paid = db.session.query(db.func.coalesce(db.func.sum(Payment.amount), 0)).filter(
+            Payment.invoice_id == self.id
+        ).scalar()
+        self.amount_paid = paid
+        self.balance = (self.total or Money(0)) - paid
+        return self.balance
 
 
 class InvoiceItem(db.Model):
     __tablename__ = 'invoice_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False, index=True)
     description = db.Column(db.String(200), nullable=False)
     quantity = db.Column(db.Numeric(10, 2), default=1)
-    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
-    line_total = db.Column(db.Numeric(10, 2))
+    unit_price = db.Column(MoneyType, nullable=False)
+    line_total = db.Column(MoneyType)
     
     def __repr__(self):
         return f'<InvoiceItem {self.description}>'
     
+    @db.validates('unit_price', 'line_total')
+    def validate_money(self, key, value):
+        return Money.of(value)
+    
     def calculate_line_total(self):
-        """Calculate line total from quantity and unit price"""
-        from decimal import Decimal
-        quantity = self.quantity or Decimal('0')
-        unit_price = self.unit_price or Decimal('0')
-        self.line_total = quantity * unit_price
+        """Calculate line total from quantity and unit price, rounded to the cent"""
+        self.line_total = (self.unit_price or Money(0)) * (self.quantity or 0)
         return self.line_total 
\ No newline at end of file
@@ -1,17 +1,26 @@
 from datetime import datetime
-from decimal import Decimal
 from app import db
+from app.money import Money, MoneyType
 
 class Payment(db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_date_id', 'date', 'id'),
+        db.Index('ix_payments_invoice_id_date', 'invoice_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=False)
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
     date = db.Column(db.Date, default=datetime.utcnow().date)
     method = db.Column(db.String(50))  # Credit Card, Check, etc.
     reference = db.Column(db.String(100))  # Reference number for payment
     notes = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    @db.validates('amount')
+    def validate_money(self, key, value):
+        return Money.of(value)
     
     def __repr__(self):
         return f'<Payment ${self.amount} for Invoice {self.invoice_id}>' 
\ No newline at end of file
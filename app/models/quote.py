@@ -1,51 +1,66 @@
 from datetime import datetime
-from decimal import Decimal
 from app import db
+from app.money import Money, MoneyType
 
 class Quote(db.Model):
     __tablename__ = 'quotes'
+    __table_args__ = (
+        db.Index('ix_quotes_status_date_created', 'status', 'date_created'),
+        db.Index('ix_quotes_date_created_id', 'date_created', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False, index=True)
     quote_number = db.Column(db.String(20), unique=True, nullable=False)
     date_created = db.Column(db.Date, default=datetime.utcnow().date)
     valid_until = db.Column(db.Date)
     status = db.Column(db.String(20), default='draft')  # draft, sent, accepted, rejected, expired
     notes = db.Column(db.Text)
-    total = db.Column(db.Numeric(10, 2), default=0.0)
+    total = db.Column(MoneyType, default=Money(0))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
-    items = db.relationship('QuoteItem', backref='quote', lazy='dynamic', cascade='all, delete-orphan')
+    items = db.relationship('QuoteItem', backref='quote', cascade='all, delete-orphan', order_by='QuoteItem.id')
     invoice = db.relationship('Invoice', backref='quote', uselist=False)
-    email_logs = db.relationship('EmailLog', backref='quote', lazy='dynamic')
+    email_logs = db.relationship('EmailLog', backref='quote', order_by='EmailLog.id')
     
     def __repr__(self):
         return f'<Quote {self.quote_number}>'
     
     def calculate_total(self):
-        """Calculate the total from all line items"""
-        from decimal import Decimal
-        self.total = sum(item.line_total or Decimal('0') for item in self.items) or Decimal('0')
+        """Set the total to the sum of the line items, added up by the database.
+
+        Flush new and changed items first; self.items may be loaded already
+        and not reflect them.
+        """
+        self.total = db.session.query(db.func.coalesce(db.func.sum(QuoteItem.line_total), 0)).filter(
+            QuoteItem.quote_id == self.id
+        ).scalar()
         return self.total
+    
+    @db.validates('total')
+    def validate_money(self, key, value):
+        return Money.of(value)
 
 
 class QuoteItem(db.Model):
     __tablename__ = 'quote_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'), nullable=False)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quotes.id'), nullable=False, index=True)
     description = db.Column(db.String(200), nullable=False)
     quantity = db.Column(db.Numeric(10, 2), default=1)
-    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
-    line_total = db.Column(db.Numeric(10, 2))
+    unit_price = db.Column(MoneyType, nullable=False)
+    line_total = db.Column(MoneyType)
     
     def __repr__(self):
         return f'<QuoteItem {self.description}>'
     
+    @db.validates('unit_price', 'line_total')
+    def validate_money(self, key, value):
+        return Money.of(value)
+    
     def calculate_line_total(self):
-        """Calculate line total from quantity and unit price"""
-        from decimal import Decimal
-        quantity = self.quantity or Decimal('0')
-        unit_price = self.unit_price or Decimal('0')
-        self.line_total = quantity * unit_price
+        """Calculate line total from quantity and unit price, rounded to the cent"""
+        self.line_total = (self.unit_price or Money(0)) * (self.quantity or 0)
         return self.line_total 
\ No newline at end of file
@@ -0,0 +1,58 @@
+from datetime import datetime
+from app import db
+
+class DocumentSequence(db.Model):
+    __tablename__ = 'document_sequences'
+
+    prefix = db.Column(db.String(10), primary_key=True)  # Q, INV
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DocumentSequence {self.prefix}-{self.year} at {self.last_value}>'
+
+    @classmethod
+    def allocate(cls, prefix, count=1, year=None):
+        """Reserve the next `count` values for a prefix and return the last one.
+
+        The counter row is created or bumped by a single upsert, so the
+        allocation is one round trip and two workers can never receive the
+        same value. It runs in the caller's transaction: a rollback hands the
+        values back, and the row stays locked until the caller commits.
+        """
+        year = year or datetime.now().year
+        return db.session.execute(
+            db.text(
+                'INSERT INTO document_sequences (prefix, year, last_value) '
+                'VALUES (:prefix, :year, :count) '
+                'ON CONFLICT (prefix, year) DO UPDATE '
+                'SET last_value = document_sequences.last_value + :count '
+                'RETURNING last_value'
+            ),
+            {'prefix': prefix, 'year': year, 'count': count}
+        ).scalar()
+
+    @staticmethod
+    def format_number(prefix, year, value):
+        """Format a sequence value as a document number (e.g. INV-2025-001)"""
+        return f'{prefix}-{year}-{value:03d}'
+
+    @classmethod
+    def next_number(cls, prefix):
+        """Allocate the next document number for the current year"""
+        year = datetime.now().year
+        return cls.format_number(prefix, year, cls.allocate(prefix, year=year))
+
+    @classmethod
+    def reserve_numbers(cls, prefix, count):
+        """Allocate a contiguous block of document numbers, e.g. for bulk imports"""
+        year = datetime.now().year
+        last = cls.allocate(prefix, count=count, year=year)
+        return [cls.format_number(prefix, year, value) for value in range(last - count + 1, last + 1)]
+
+    @classmethod
+    def preview_number(cls, prefix):
+        """Return the number the next allocation will most likely get, without reserving it"""
+        year = datetime.now().year
+        sequence = cls.query.get((prefix, year))
+        return cls.format_number(prefix, year, (sequence.last_value if sequence else 0) + 1)
@@ -1,4 +1,5 @@
 from app import db
+from app.money import Money, MoneyType
 
 class Service(db.Model):
     __tablename__ = 'services'
@@ -6,7 +7,11 @@ class Service(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    default_rate = db.Column(db.Numeric(10, 2), nullable=False)
+    default_rate = db.Column(MoneyType, nullable=False)
+    
+    @db.validates('default_rate')
+    def validate_money(self, key, value):
+        return Money.of(value)
     
     def __repr__(self):
         return f'<Service {self.name}>' 
\ No newline at end of file
@@ -0,0 +1,173 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from app import db
+
+
+class Money:
+    """An exact amount of money, held as a whole number of cents.
+
+    Immutable and hashable. Money adds to and subtracts from Money (and 0,
+    so sum() works), multiplies by a quantity rounding half up to the cent,
+    and compares with Money or plain numbers. str(), float() and format()
+    give the amount in dollars, so templates can keep using '%.2f'|format.
+    """
+    __slots__ = ('cents',)
+
+    def __init__(self, cents=0):
+        if not isinstance(cents, int) or isinstance(cents, bool):
+            raise TypeError(f'Money takes a whole number of cents, not {cents!r}')
+        object.__setattr__(self, 'cents', cents)
+
+    @classmethod
+    def of(cls, value):
+        """Money for an amount in dollars: Money, int, float, Decimal or a numeric string.
+
+        None stays None; anything else that isn't a finite amount raises ValueError.
+        """
+        if value is None or isinstance(value, Money):
+            return value
+        if isinstance(value, int) and not isinstance(value, bool):
+            return cls(value * 100)
+        try:
+            amount = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f'Not an amount of money: {value!r}') from None
+        if not amount.is_finite():
+            raise ValueError(f'Not an amount of money: {value!r}')
+        return cls(int(amount.scaleb(2).quantize(Decimal(1), ROUND_HALF_UP)))
+
+    @property
+    def amount(self):
+        """The amount in dollars as a Decimal with two places"""
+        return Decimal(self.cents).scaleb(-2)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Money is immutable')
+
+    def __reduce__(self):
+        return Money, (self.cents,)
+
+    def _cents_of(self, other):
+        """Cents of a Money or plain number to compare with, or None for anything else"""
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            return Money.of(other).cents
+        return None
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        if other == 0 and isinstance(other, int):
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        if other == 0 and isinstance(other, int):
+            return self
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if other == 0 and isinstance(other, int):
+            return -self
+        return NotImplemented
+
+    def __mul__(self, quantity):
+        if isinstance(quantity, int) and not isinstance(quantity, bool):
+            return Money(self.cents * quantity)
+        if isinstance(quantity, (float, Decimal)):
+            cents = Decimal(self.cents) * (quantity if isinstance(quantity, Decimal) else Decimal(str(quantity)))
+            return Money(int(cents.quantize(Decimal(1), ROUND_HALF_UP)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __eq__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else self.cents == cents
+
+    def __lt__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else self.cents < cents
+
+    def __le__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else self.cents <= cents
+
+    def __gt__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else self.cents > cents
+
+    def __ge__(self, other):
+        cents = self._cents_of(other)
+        return NotImplemented if cents is None else self.cents >= cents
+
+    def __hash__(self):
+        # Equal to the hash of the same amount as an int or Decimal, since they compare equal
+        return hash(self.amount)
+
+    def __str__(self):
+        sign = '-' if self.cents < 0 else ''
+        dollars, cents = divmod(abs(self.cents), 100)
+        return f'{sign}{dollars}.{cents:02d}'
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        return format(self.amount, spec) if spec else str(self)
+
+
+class MoneyType(db.TypeDecorator):
+    """A column of Money, stored as an integer number of cents.
+
+    Values bound to it, including in comparisons like `Invoice.balance > 0`,
+    are amounts in dollars and go through Money.of. SUM() and COALESCE()
+    over it come back as Money too, added up exactly by the database.
+    """
+    impl = db.BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else Money.of(value).cents
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else _from_cents(value)
+
+    def result_processor(self, dialect, coltype):
+        # Called for every row read, so skip TypeDecorator's wrapper around
+        # process_result_value and Money.__init__'s checks
+        def process(value):
+            return None if value is None else _from_cents(value)
+        return process
+
+
+def _from_cents(cents):
+    """Money for a value read from the database: an int, or a Decimal from SUM() on PostgreSQL"""
+    money = _new_money(Money)
+    _set_cents(money, 'cents', cents if cents.__class__ is int else int(cents))
+    return money
+
+
+_new_money = object.__new__
+_set_cents = object.__setattr__
+
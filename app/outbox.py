@@ -0,0 +1,187 @@
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_mail import Message
+from app import db
+from app.log import log_event
+from app.models import EmailLog
+from app.smtp_pool import get_pool
+
+outbox_cli = AppGroup('outbox', help='Deliver and inspect queued emails.')
+
+
+def enqueue_email(recipient, subject, body, email_type, client_id=None, quote_id=None, invoice_id=None):
+    """Queue an email for the outbox worker and return its EmailLog.
+
+    The row is only added to the session; it is delivered once the
+    caller's transaction commits, so nothing is sent for a rolled-back
+    request.
+    """
+    email_log = EmailLog(
+        client_id=client_id,
+        quote_id=quote_id,
+        invoice_id=invoice_id,
+        email_type=email_type,
+        subject=subject,
+        recipient=recipient,
+        status='queued',
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    email_log.set_body(body, email_type)
+    db.session.add(email_log)
+    return email_log
+
+
+def build_message(email_log):
+    """Build the Flask-Mail message for a queued email"""
+    msg = Message(email_log.subject, recipients=[email_log.recipient])
+    msg.html = email_log.body
+    # Attach the preloaded images the body references by Content-ID
+    for asset in current_app.extensions['inline_assets'].values():
+        if f'cid:{asset.cid}' in (email_log.body or ''):
+            msg.attach(asset.filename, asset.content_type, asset.data, 'inline',
+                       headers=[('Content-ID', f'<{asset.cid}>')])
+    return msg
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: exponential with jitter"""
+    base = current_app.config['OUTBOX_RETRY_BACKOFF']
+    delay = min(base * 2 ** max(attempts - 1, 0), current_app.config['OUTBOX_MAX_BACKOFF'])
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_due(limit):
+    """Claim up to `limit` due emails and return them.
+
+    Claiming moves a row to 'sending', counts the attempt and pushes
+    next_attempt_at out by OUTBOX_LEASE_SECONDS. Each row is claimed with
+    a guarded UPDATE, so several workers can poll the same table, and a
+    worker that dies mid-send only delays its emails until the lease runs
+    out.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=current_app.config['OUTBOX_LEASE_SECONDS'])
+    due = (EmailLog.status.in_(('queued', 'sending')), EmailLog.next_attempt_at <= now)
+
+    candidates = [row.id for row in db.session.query(EmailLog.id).filter(*due)
+                  .order_by(EmailLog.next_attempt_at, EmailLog.id).limit(limit)]
+    claimed = []
+    for email_id in candidates:
+        result = db.session.execute(
+            db.update(EmailLog).where(EmailLog.id == email_id, *due)
+            .values(status='sending', attempts=EmailLog.attempts + 1, next_attempt_at=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append(email_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return (EmailLog.query.options(db.undefer(EmailLog.body_data))
+            .filter(EmailLog.id.in_(claimed)).order_by(EmailLog.id).all())
+
+
+def deliver(email_log):
+    """Send one claimed email over a pooled connection and record the outcome.
+
+    Returns True if it was sent.
+    """
+    fields = {
+        'email_log_id': email_log.id,
+        'email_type': email_log.email_type,
+        'invoice_id': email_log.invoice_id,
+        'quote_id': email_log.quote_id,
+        'recipient': email_log.recipient,
+        'attempt': email_log.attempts,
+    }
+    started = time.perf_counter()
+    try:
+        get_pool().send(build_message(email_log))
+    except Exception as e:
+        smtp_ms = round((time.perf_counter() - started) * 1000, 1)
+        email_log.last_error = f'{type(e).__name__}: {e}'
+        if email_log.attempts >= current_app.config['OUTBOX_MAX_ATTEMPTS']:
+            email_log.status = 'failed'
+            email_log.next_attempt_at = None
+        else:
+            email_log.status = 'queued'
+            email_log.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(email_log.attempts))
+        db.session.commit()
+        log_event('email.failed', logging.WARNING, smtp_ms=smtp_ms, error=email_log.last_error,
+                  status=email_log.status, **fields)
+        return False
+    smtp_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    email_log.status = 'sent'
+    email_log.sent_at = datetime.utcnow()
+    email_log.next_attempt_at = None
+    email_log.last_error = None
+    db.session.commit()
+    log_event('email.sent', smtp_ms=smtp_ms, **fields)
+    return True
+
+
+def process_outbox(batch_size=None):
+    """Deliver one batch of due emails. Returns (sent, failed) counts."""
+    batch = claim_due(batch_size or current_app.config['OUTBOX_BATCH_SIZE'])
+    sent = sum(1 for email_log in batch if deliver(email_log))
+    return sent, len(batch) - sent
+
+
+@outbox_cli.command('work')
+@click.option('--once', is_flag=True, help='Deliver everything that is due, then exit.')
+@click.option('--batch-size', type=int, default=None, help='Emails claimed per poll.')
+@click.option('--poll-interval', type=float, default=None, help='Seconds to sleep when nothing is due.')
+def work_command(once, batch_size, poll_interval):
+    """Deliver queued emails until interrupted."""
+    poll_interval = poll_interval if poll_interval is not None else current_app.config['OUTBOX_POLL_INTERVAL']
+    total_sent = total_failed = 0
+    try:
+        while True:
+            sent, failed = process_outbox(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                click.echo(f'Sent {sent}, failed {failed}')
+            elif once:
+                break
+            else:
+                db.session.remove()
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        get_pool().close()
+    click.echo(f'Done: {total_sent} sent, {total_failed} failed attempts')
+
+
+@outbox_cli.command('status')
+def status_command():
+    """Show how many emails are in each state."""
+    counts = db.session.query(EmailLog.status, db.func.count(EmailLog.id)).group_by(EmailLog.status).all()
+    for status, count in sorted(counts):
+        click.echo(f'{status:<8} {count}')
+
+
+@outbox_cli.command('retry')
+@click.argument('email_ids', nargs=-1, type=int)
+def retry_command(email_ids):
+    """Queue failed emails again (all of them, or just EMAIL_IDS)."""
+    query = EmailLog.query.filter(EmailLog.status == 'failed')
+    if email_ids:
+        query = query.filter(EmailLog.id.in_(email_ids))
+    count = query.update({
+        EmailLog.status: 'queued',
+        EmailLog.attempts: 0,
+        EmailLog.next_attempt_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Queued {count} email(s) again')
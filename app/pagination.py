@@ -0,0 +1,136 @@
+import base64
+import json
+import time
+from datetime import date, datetime
+from flask import current_app
+from app import db
+
+# (endpoint, filters) -> (expires_at, total); shared by all requests in this process
+_count_cache = {}
+_COUNT_CACHE_MAX_ENTRIES = 256
+
+
+def encode_cursor(values):
+    """Encode a tuple of sort-key values as an opaque URL-safe token"""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Decode a cursor token back into values typed like the sort columns.
+
+    Returns None for anything malformed so a bad link falls back to the first page.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        return None
+
+    values = []
+    for column, value in zip(columns, payload):
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            if python_type is datetime and value is not None:
+                value = datetime.fromisoformat(value)
+            elif python_type is date and value is not None:
+                value = date.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+        values.append(value)
+    return values
+
+
+class KeysetPagination:
+    """One page of a keyset (seek) paginated query.
+
+    Mirrors the parts of Flask-SQLAlchemy's Pagination the templates use,
+    but navigates with cursors instead of page numbers.
+    """
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def cached_count(query, cache_key):
+    """Count the rows of a query at most once per PAGINATION_COUNT_TTL seconds.
+
+    Returns None when the TTL is 0, which turns totals off entirely.
+    """
+    ttl = current_app.config.get('PAGINATION_COUNT_TTL', 0)
+    if not ttl:
+        return None
+
+    now = time.monotonic()
+    cached = _count_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    if len(_count_cache) >= _COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.clear()
+    total = query.order_by(None).count()
+    _count_cache[cache_key] = (now + ttl, total)
+    return total
+
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=10, descending=False, count_key=None):
+    """Paginate a query by seeking past the sort key of the previous page.
+
+    `columns` is the full sort key and must end with a unique column
+    (normally the primary key) so every row has a distinct position. Pass
+    `after` to move forward from a cursor, `before` to move back. When
+    `count_key` is given, an approximate total is attached from the count
+    cache.
+    """
+    after_values = decode_cursor(after, columns) if after else None
+    before_values = decode_cursor(before, columns) if before else None
+    key = db.tuple_(*columns)
+
+    # Walking backwards means seeking the other way, then flipping the page
+    backwards = before_values is not None and after_values is None
+    reverse = descending != backwards
+    total = cached_count(query, count_key) if count_key is not None else None
+
+    if after_values is not None:
+        query = query.filter(key < db.tuple_(*after_values) if descending else key > db.tuple_(*after_values))
+    elif before_values is not None:
+        query = query.filter(key > db.tuple_(*before_values) if descending else key < db.tuple_(*before_values))
+
+    query = query.order_by(None).order_by(*[column.desc() if reverse else column.asc() for column in columns])
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if backwards:
+        items.reverse()
+
+    def cursor_for(item):
+        return encode_cursor([getattr(item, column.key) for column in columns])
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after_values is not None
+
+    return KeysetPagination(
+        items,
+        per_page,
+        next_cursor=cursor_for(items[-1]) if items and has_next else None,
+        prev_cursor=cursor_for(items[0]) if items and has_prev else None,
+        total=total
+    )
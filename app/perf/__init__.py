@@ -0,0 +1,8 @@
+from flask.cli import AppGroup
+
+perf_cli = AppGroup('perf', help='Performance checks run against a seeded in-memory database.')
+
+# Each module registers its commands on perf_cli: budgets (flask perf queries),
+# plans (flask perf plans) and bench (flask perf bench)
+from app.perf.seeded import CHECK_CLIENTS, CHECK_USER, CheckConfig, check_ids, fill_ids, seeded_app
+from app.perf import budgets, plans, bench
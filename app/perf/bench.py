@@ -0,0 +1,369 @@
+import json
+import math
+import platform
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import click
+from werkzeug.serving import make_server
+from app import db, email_templates
+from app.email_templates import EMAIL_TEMPLATES, render_invoice_email
+from app.models import Client, Invoice
+from app.outbox import enqueue_email, process_outbox
+from app.pagination import encode_cursor
+from app.perf import perf_cli
+from app.perf.budgets import QUOTE_FORM
+from app.perf.seeded import CHECK_CLIENTS, CHECK_USER, check_ids, fill_ids, seeded_app
+from app.perf.smtp import smtp_stand_in
+from app.smtp_pool import get_pool
+
+# Benchmarks: scripted scenarios timed end to end, through the test client or a real WSGI server
+
+# One request of a benchmark scenario
+BenchRequest = namedtuple('BenchRequest', ['method', 'path', 'json', 'data'], defaults=(None, None))
+
+# Page size of the API list pulls
+BENCH_API_LIMIT = 100
+BENCH_API_LISTS = ['/api/clients/', '/api/quotes/', '/api/invoices/', '/api/payments/', '/api/emails/']
+# Global search terms: common line item words, short prefixes, a document number and a client name
+BENCH_SEARCH_TERMS = ['driveway', 'wash', 'roof', 'dr', 'INV', 'anderson']
+
+
+def bench_ids():
+    """check_ids plus the open invoices and the cursor of every invoice list page"""
+    ids = check_ids()
+    ids['open_invoices'] = [row.id for row in db.session.query(Invoice.id).filter(Invoice.balance > 0)]
+    # The invoice list's sort key, as invoices.index pages through it
+    rows = db.session.query(Invoice.date_issued, Invoice.id).order_by(Invoice.date_issued.desc(), Invoice.id.desc())
+    ids['invoice_pages'] = [None] + [encode_cursor(row) for row in rows.all()[9::10]]
+    return ids
+
+
+def _dashboard(ids, i):
+    return BenchRequest('GET', '/')
+
+
+def _invoice_paging(ids, i):
+    cursor = ids['invoice_pages'][i % len(ids['invoice_pages'])]
+    return BenchRequest('GET', f'/invoices/?after={cursor}' if cursor else '/invoices/')
+
+
+def _quote_create(ids, i):
+    return BenchRequest('POST', '/quotes/new', data=fill_ids(QUOTE_FORM, ids))
+
+
+def _payment_record(ids, i):
+    invoice_id = ids['open_invoices'][i % len(ids['open_invoices'])]
+    return BenchRequest('POST', '/payments/create', data={
+        'invoice_id': invoice_id, 'amount': '1.00', 'date': date.today().isoformat(), 'method': 'Check',
+    })
+
+
+def _api_lists(ids, i):
+    # Each list in turn, one page further along every round
+    path = BENCH_API_LISTS[i % len(BENCH_API_LISTS)]
+    page = i // len(BENCH_API_LISTS)
+    after = f'&after={encode_cursor([page * BENCH_API_LIMIT])}' if page else ''
+    return BenchRequest('GET', f'{path}?limit={BENCH_API_LIMIT}{after}')
+
+
+def _search(ids, i):
+    return BenchRequest('GET', f'/search/?q={BENCH_SEARCH_TERMS[i % len(BENCH_SEARCH_TERMS)]}')
+
+
+# name -> function(ids, i) giving the scenario's i-th request
+BENCH_SCENARIOS = {
+    'dashboard': _dashboard,
+    'invoice_paging': _invoice_paging,
+    'quote_create': _quote_create,
+    'payment_record': _payment_record,
+    'api_lists': _api_lists,
+    'search': _search,
+}
+
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def _query_count(headers):
+    """The statement count query_stats puts in the Server-Timing header"""
+    match = re.search(r'desc="(\d+) queries"', ', '.join(headers.get_all('Server-Timing') or []))
+    return int(match.group(1)) if match else None
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+@contextmanager
+def _wsgi_client(app):
+    """Serve `app` on a local port from a background thread; yields send(BenchRequest) -> (status, headers)"""
+    server = make_server('127.0.0.1', 0, app, threaded=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(), _NoRedirect())
+
+    def send(bench_request):
+        body, headers = None, {}
+        if bench_request.json is not None:
+            body, headers = json.dumps(bench_request.json).encode(), {'Content-Type': 'application/json'}
+        elif bench_request.data is not None:
+            body = urllib.parse.urlencode(bench_request.data).encode()
+        req = urllib.request.Request(base + bench_request.path, data=body, headers=headers,
+                                     method=bench_request.method)
+        try:
+            with opener.open(req) as response:
+                response.read()
+                return response.status, response.headers
+        except urllib.error.HTTPError as error:
+            # Redirects and error statuses land here too
+            error.read()
+            return error.code, error.headers
+
+    try:
+        yield send
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+@contextmanager
+def _test_client(app):
+    client = app.test_client()
+
+    def send(bench_request):
+        response = client.open(bench_request.path, method=bench_request.method, json=bench_request.json,
+                               data=bench_request.data)
+        return response.status_code, response.headers
+
+    yield send
+
+
+def run_benchmark(scenarios, requests=50, warmup=5, clients=CHECK_CLIENTS, server=False):
+    """Time `requests` requests of each named scenario against a freshly seeded app.
+
+    With `server`, requests go over HTTP to a werkzeug server in this
+    process instead of through the test client. Returns
+    {scenario: summary} with latency percentiles in ms, requests per
+    second and SQL statements per request.
+    """
+    app, ids = seeded_app(clients, ids=bench_ids)
+    results = {}
+    with (_wsgi_client if server else _test_client)(app) as send:
+        send(BenchRequest('POST', '/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]}))
+        for name in scenarios:
+            make_request = BENCH_SCENARIOS[name]
+            for i in range(warmup):
+                send(make_request(ids, i))
+            latencies, queries, errors = [], [], 0
+            started = time.perf_counter()
+            for i in range(warmup, warmup + requests):
+                bench_request = make_request(ids, i)
+                request_started = time.perf_counter()
+                status, headers = send(bench_request)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+                queries.append(_query_count(headers) or 0)
+                errors += status >= 400
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            results[name] = {
+                'requests': requests,
+                'errors': errors,
+                'p50_ms': round(_percentile(latencies, 50), 2),
+                'p95_ms': round(_percentile(latencies, 95), 2),
+                'p99_ms': round(_percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / requests, 2),
+                'max_ms': round(latencies[-1], 2),
+                'throughput_rps': round(requests / elapsed, 1),
+                'queries_mean': round(sum(queries) / requests, 1),
+                'queries_max': max(queries),
+            }
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@perf_cli.command('bench')
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(BENCH_SCENARIOS)),
+              help='Only run these scenarios (default: all, in order).')
+@click.option('--requests', default=50, show_default=True, help='Timed requests per scenario.')
+@click.option('--warmup', default=5, show_default=True, help='Untimed requests per scenario first.')
+@click.option('--clients', default=CHECK_CLIENTS, show_default=True, help='Clients to seed; see flask seed.')
+@click.option('--server', is_flag=True, help='Go over HTTP to a local WSGI server instead of the test client.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results to this JSON file.')
+@click.option('--compare', type=click.File(), help='An earlier --output file to show the change against.')
+def bench_command(scenarios, requests, warmup, clients, server, output, compare):
+    """Time scripted scenarios end to end: latency percentiles, throughput and SQL statements."""
+    if requests < 1:
+        raise click.BadParameter('must be at least 1', param_hint='--requests')
+    scenarios = scenarios or list(BENCH_SCENARIOS)
+    results = run_benchmark(scenarios, requests=requests, warmup=warmup, clients=clients, server=server)
+    baseline = json.load(compare)['scenarios'] if compare else {}
+
+    click.echo(f"{'scenario':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>8}{'queries':>9}{'errors':>8}")
+    for name, summary in results.items():
+        line = (f"{name:<16}{summary['p50_ms']:>7.1f}ms{summary['p95_ms']:>7.1f}ms{summary['p99_ms']:>7.1f}ms"
+                f"{summary['throughput_rps']:>8.1f}{summary['queries_mean']:>9.1f}{summary['errors']:>8}")
+        if name in baseline and baseline[name]['p95_ms']:
+            change = (summary['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100
+            line += f"  p95 {change:+.0f}%, queries {baseline[name]['queries_mean']:.1f} -> {summary['queries_mean']:.1f}"
+        click.echo(line)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'commit': _git_commit(),
+                'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+                'python': platform.python_version(),
+                'mode': 'server' if server else 'test_client',
+                'clients': clients,
+                'warmup': warmup,
+                'scenarios': results,
+            }, f, indent=2)
+        click.echo(f'Wrote {output}')
+
+
+# Mail delivery: the outbox worker draining a queue into a local SMTP stand-in
+
+def run_mail_benchmark(emails=200, connect_delay=0.02, pool_sizes=(2, 0)):
+    """Queue `emails` emails and time process_outbox delivering them, once per MAIL_POOL_SIZE in `pool_sizes`.
+
+    The SMTP stand-in waits `connect_delay` seconds before greeting each
+    connection. Pool size 0 keeps no idle connections, so every message
+    opens its own. Returns {pool size: summary} with emails per second and
+    connections opened.
+    """
+    results = {}
+    with smtp_stand_in(connect_delay) as server:
+        for size in pool_sizes:
+            app, _ = seeded_app(10, ids=lambda: None, config=server.config(MAIL_POOL_SIZE=size))
+            try:
+                with app.app_context():
+                    client = Client.query.filter(Client.email.isnot(None)).first()
+                    for i in range(emails):
+                        enqueue_email(client.email, f'Bench {i}', f'<p>Message {i}</p>', 'test', client_id=client.id)
+                    db.session.commit()
+
+                    connections = server.connections
+                    sent = failed = 0
+                    started = time.perf_counter()
+                    while True:
+                        batch_sent, batch_failed = process_outbox()
+                        if not batch_sent and not batch_failed:
+                            break
+                        sent += batch_sent
+                        failed += batch_failed
+                    elapsed = time.perf_counter() - started
+                    get_pool().close()
+            finally:
+                with app.app_context():
+                    db.session.remove()
+                    db.drop_all()
+            results[size] = {
+                'emails': sent,
+                'failed': failed,
+                'seconds': round(elapsed, 3),
+                'emails_per_s': round(sent / elapsed, 1),
+                'connections': server.connections - connections,
+            }
+    return results
+
+
+@perf_cli.command('mail')
+@click.option('--emails', default=200, show_default=True, help='Emails queued per run.')
+@click.option('--connect-delay', default=0.02, show_default=True,
+              help='Seconds the SMTP stand-in takes to greet each connection.')
+@click.option('--pool-size', 'pool_sizes', multiple=True, type=int,
+              help='MAIL_POOL_SIZE of each run (default: 2, then 0 for a connection per message).')
+def mail_command(emails, connect_delay, pool_sizes):
+    """Time the outbox worker delivering queued email to a local SMTP stand-in."""
+    results = run_mail_benchmark(emails, connect_delay, pool_sizes or (2, 0))
+    click.echo(f"{'pool size':<11}{'emails':>8}{'failed':>8}{'seconds':>9}{'emails/s':>10}{'connections':>13}")
+    for size, summary in results.items():
+        click.echo(f"{size:<11}{summary['emails']:>8}{summary['failed']:>8}{summary['seconds']:>9.2f}"
+                   f"{summary['emails_per_s']:>10.1f}{summary['connections']:>13}")
+    pooled = [summary['emails_per_s'] for size, summary in results.items() if size > 0]
+    if 0 in results and pooled and results[0]['emails_per_s']:
+        click.echo(f"Pooled delivery ran at {max(pooled) / results[0]['emails_per_s']:.1f}x the rate of "
+                   f"a connection per message")
+
+
+# Email templates: rendering from the compiled template, and compiling it at startup
+
+def run_template_benchmark(renders=500, startups=5):
+    """Time rendering the invoice email and compiling the email templates.
+
+    Returns a summary with the mean render time from the compiled template,
+    the time if every send loaded and compiled the template instead, and
+    email_templates.init_app with cold and warm template caches (bytecode
+    and inlined source).
+    """
+    app, ids = seeded_app(20)
+    try:
+        with app.app_context():
+            invoice = db.session.get(Invoice, ids['invoice'])
+            client = db.session.get(Client, invoice.client_id)
+            items = list(invoice.items)
+
+            started = time.perf_counter()
+            for _ in range(renders):
+                render_invoice_email(invoice, client, items)
+            cached_us = (time.perf_counter() - started) * 1e6 / renders
+
+            env = app.extensions['email_templates']['invoice'].environment
+            compiles = max(renders // 20, 1)
+            started = time.perf_counter()
+            for _ in range(compiles):
+                env.from_string(env.loader.get_source(env, EMAIL_TEMPLATES['invoice'])[0]).render(
+                    document=invoice, client=client, items=items, custom_message='')
+            compiling_us = (time.perf_counter() - started) * 1e6 / compiles
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def init_ms():
+        started = time.perf_counter()
+        email_templates.init_app(app)
+        return (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app.config['EMAIL_TEMPLATE_CACHE_DIR'] = cache_dir
+        cold_ms = init_ms()
+        warm_ms = min(init_ms() for _ in range(startups))
+    return {
+        'render_us': round(cached_us, 1),
+        'compile_and_render_us': round(compiling_us, 1),
+        'startup_cold_ms': round(cold_ms, 2),
+        'startup_warm_ms': round(warm_ms, 2),
+    }
+
+
+@perf_cli.command('templates')
+@click.option('--renders', default=500, show_default=True, help='Invoice emails rendered.')
+def templates_command(renders):
+    """Time email rendering from the compiled templates and compiling them at startup."""
+    summary = run_template_benchmark(renders)
+    click.echo(f"render from compiled template   {summary['render_us']:>9.1f} us")
+    click.echo(f"compile and render per send     {summary['compile_and_render_us']:>9.1f} us")
+    click.echo(f"startup, cold template cache    {summary['startup_cold_ms']:>9.2f} ms")
+    click.echo(f"startup, warm template cache    {summary['startup_warm_ms']:>9.2f} ms")
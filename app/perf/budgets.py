@@ -0,0 +1,188 @@
+import textwrap
+import time
+from collections import Counter, namedtuple
+from datetime import date
+
+import click
+from app import db
+from app.perf import perf_cli
+from app.perf.seeded import CHECK_USER, fill_ids, seeded_app
+from app.query_stats import collect_queries
+
+# One request made by the check, with the most statements and milliseconds it may take.
+# `path`, `json` and `data` may name seeded rows, e.g. '/invoices/{open_invoice}'; see check_ids.
+# `scans` names the tables the route reads in full on purpose, e.g. an unpaged list.
+RouteCheck = namedtuple('RouteCheck', ['endpoint', 'method', 'path', 'max_queries', 'max_ms', 'json', 'data', 'scans'],
+                        defaults=(None, None, ()))
+
+# The quote form with 20 line items
+QUOTE_FORM = dict(
+    {'client_id': '{client}', 'status': 'draft', 'notes': 'Driveway'},
+    **{f'items[{i}][{field}]': value for i in range(20)
+       for field, value in [('description', f'Item {i}'), ('quantity', '2'), ('unit_price', '25')]}
+)
+# The quote and invoice edit and create forms with 3 new line items; existing items not listed are removed
+ITEMS_FORM = {f'items[{i}][{field}]': value for i in range(3)
+              for field, value in [('description', f'Item {i}'), ('quantity', '1'), ('unit_price', '80')]}
+CLIENT_FORM = {'name': 'Form Client', 'email': 'form@example.com', 'city': 'Houston'}
+
+ROUTE_CHECKS = [
+    # Pages
+    RouteCheck('auth.login', 'GET', '/login', 1, 150),
+    RouteCheck('index', 'GET', '/', 5, 250),
+    RouteCheck('clients.index', 'GET', '/clients/', 3, 250),
+    RouteCheck('clients.view', 'GET', '/clients/{client}', 4, 250),
+    RouteCheck('clients.create', 'GET', '/clients/create', 1, 150),
+    RouteCheck('clients.edit', 'GET', '/clients/{client}/edit', 2, 150),
+    RouteCheck('quotes.index', 'GET', '/quotes/', 3, 250),
+    RouteCheck('quotes.view', 'GET', '/quotes/{quote}', 4, 250),
+    RouteCheck('quotes.create', 'GET', '/quotes/new', 2, 250),
+    RouteCheck('quotes.edit', 'GET', '/quotes/{quote}/edit', 4, 250),
+    RouteCheck('invoices.index', 'GET', '/invoices/', 3, 250),
+    RouteCheck('invoices.view', 'GET', '/invoices/{invoice}', 4, 250),
+    RouteCheck('invoices.create', 'GET', '/invoices/create', 2, 250),
+    RouteCheck('invoices.edit', 'GET', '/invoices/{invoice}/edit', 4, 250),
+    RouteCheck('payments.index', 'GET', '/payments/', 3, 250),
+    RouteCheck('payments.view', 'GET', '/payments/{payment}', 2, 250),
+    RouteCheck('payments.create', 'GET', '/payments/create', 2, 250),
+    RouteCheck('payments.edit', 'GET', '/payments/{payment}/edit', 3, 250),
+    RouteCheck('services.index', 'GET', '/services/', 2, 150, scans=('services',)),
+    RouteCheck('search.index', 'GET', '/search/?q=Client+1', 3, 250),
+    # API reads
+    RouteCheck('api_clients.get_clients', 'GET', '/api/clients/', 1, 150, scans=('clients',)),
+    RouteCheck('api_clients.get_client', 'GET', '/api/clients/{client}', 1, 100),
+    RouteCheck('api_quotes.get_quotes', 'GET', '/api/quotes/', 1, 150, scans=('quotes',)),
+    RouteCheck('api_quotes.get_quote', 'GET', '/api/quotes/{quote}', 3, 100),
+    RouteCheck('api_invoices.get_invoices', 'GET', '/api/invoices/', 1, 150, scans=('invoices',)),
+    RouteCheck('api_invoices.get_invoice', 'GET', '/api/invoices/{invoice}', 1, 100),
+    RouteCheck('api_payments.get_payments', 'GET', '/api/payments/', 1, 250, scans=('payments',)),
+    RouteCheck('api_payments.get_payment', 'GET', '/api/payments/{payment}', 1, 100),
+    RouteCheck('emails.get_emails', 'GET', '/api/emails/', 1, 150, scans=('email_logs',)),
+    RouteCheck('emails.get_email', 'GET', '/api/emails/{email}', 2, 100),
+    RouteCheck('search_api.search', 'GET', '/api/search/?q=Client+1', 1, 150),
+    # Writes, in an order where each finds what it needs
+    RouteCheck('clients.create', 'POST', '/clients/create', 2, 150, data=CLIENT_FORM),
+    RouteCheck('api_clients.create_client', 'POST', '/api/clients/', 2, 100,
+               json={'name': 'New Client', 'email': 'new@example.com', 'city': 'Houston'}),
+    RouteCheck('api_clients.update_client', 'PUT', '/api/clients/{new_client}', 3, 100, json={'phone': '555-0100'}),
+    RouteCheck('clients.edit', 'POST', '/clients/{new_client}/edit', 3, 150, data=dict(CLIENT_FORM, city='Katy')),
+    RouteCheck('quotes.create', 'POST', '/quotes/new', 27, 250, data=QUOTE_FORM),
+    RouteCheck('api_quotes.create_quote', 'POST', '/api/quotes/', 26, 150, json={
+        'client_id': '{new_client}',
+        'items': [{'description': f'Item {i}', 'quantity': 2, 'unit_price': 25} for i in range(20)],
+    }),
+    RouteCheck('api_quotes.update_quote', 'PUT', '/api/quotes/{new_quote}', 4, 100, json={'notes': 'Updated'}),
+    RouteCheck('quotes.edit', 'POST', '/quotes/{new_quote}/edit', 13, 150, data=dict(
+        ITEMS_FORM, client_id='{new_client}', status='draft', notes='Edited', valid_until='')),
+    RouteCheck('quotes.send', 'GET', '/quotes/{quote}/send', 10, 150),
+    RouteCheck('api_quotes.send_quote_api', 'POST', '/api/quotes/{new_quote}/send', 6, 150, json={}),
+    RouteCheck('emails.send_quote_email', 'POST', '/api/emails/send-quote/{quote}', 8, 150, json={}),
+    RouteCheck('api_invoices.create_from_quote', 'POST', '/api/invoices/from-quote/{uninvoiced_quote}', 10, 150,
+               json={}),
+    RouteCheck('invoices.create', 'POST', '/invoices/create', 10, 150, data=dict(
+        ITEMS_FORM, client_id='{client}', date_issued=date.today().isoformat(), due_date=date.today().isoformat())),
+    RouteCheck('api_invoices.create_invoice', 'POST', '/api/invoices/', 2, 100, json={
+        'client_id': '{client}', 'invoice_number': 'INV-API-0001', 'date_issued': date.today().isoformat(),
+        'due_date': date.today().isoformat(), 'subtotal': 100, 'tax_rate': 0, 'tax_amount': 0, 'total': 100,
+    }),
+    RouteCheck('api_invoices.update_invoice', 'PUT', '/api/invoices/{invoice}', 3, 100, json={'notes': 'Updated'}),
+    RouteCheck('invoices.edit', 'POST', '/invoices/{invoice}/edit', 7, 150, data={
+        'client_id': '{client}', 'invoice_number': '{invoice_number}', 'date_issued': date.today().isoformat(),
+        'due_date': date.today().isoformat(), 'total': '1514.00', 'status': 'sent', 'notes': 'Edited',
+    }),
+    RouteCheck('invoices.send', 'GET', '/invoices/{invoice}/send', 11, 150),
+    RouteCheck('api_invoices.send_invoice_api', 'POST', '/api/invoices/{invoice}/send', 5, 150, json={}),
+    RouteCheck('emails.send_invoice_email', 'POST', '/api/emails/send-invoice/{invoice}', 8, 150, json={}),
+    RouteCheck('api_invoices.send_bulk_api', 'POST', '/api/invoices/send-bulk', 1, 250, json={'dry_run': True}),
+    RouteCheck('payments.create', 'POST', '/payments/create', 5, 150, data={
+        'invoice_id': '{open_invoice}', 'amount': '10.00', 'date': date.today().isoformat(), 'method': 'Cash',
+    }),
+    RouteCheck('api_payments.create_payment', 'POST', '/api/payments/', 5, 100, json={'invoice_id': '{open_invoice}', 'amount': 10}),
+    RouteCheck('payments.edit', 'POST', '/payments/{payment}/edit', 9, 150, data={
+        'invoice_id': '{open_invoice}', 'amount': '12.50', 'date': date.today().isoformat(), 'method': 'Check',
+    }),
+    RouteCheck('api_payments.update_payment', 'PUT', '/api/payments/{payment}', 6, 100, json={'notes': 'Updated'}),
+    RouteCheck('api_payments.delete_payment', 'DELETE', '/api/payments/{payment}', 5, 100),
+    RouteCheck('api_quotes.delete_quote', 'DELETE', '/api/quotes/{new_quote}', 7, 100),
+    RouteCheck('api_invoices.delete_invoice', 'DELETE', '/api/invoices/{new_invoice}', 6, 100),
+    RouteCheck('api_clients.delete_client', 'DELETE', '/api/clients/{api_client}', 5, 100),
+    RouteCheck('emails.test_email', 'GET', '/api/emails/test-email', 0, 150),
+    RouteCheck('auth.logout', 'GET', '/logout', 1, 100),
+    # Signed out; password hashing dominates the time
+    RouteCheck('auth.register', 'GET', '/register', 0, 150),
+    RouteCheck('auth.register', 'POST', '/register', 3, 1000, data={
+        'username': 'signup', 'email': 'signup@example.com', 'password': 'signup', 'confirm_password': 'signup',
+    }),
+    RouteCheck('auth.login', 'POST', '/login', 2, 1000, data={'username': CHECK_USER[0], 'password': CHECK_USER[1]}),
+]
+
+
+def run_checks(app, ids, checks=ROUTE_CHECKS):
+    """Make every request in `checks`, in order and signed in as the check user, against an app from seeded_app.
+
+    Returns [(check, status_code, stats, elapsed_ms)], with the seeded ids
+    filled into each check.
+    """
+    results = []
+    # Each request gets its own app context and so a fresh session, as it would in production
+    client = app.test_client()
+    client.post('/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]})
+    for check in checks:
+        check = check._replace(path=fill_ids(check.path, ids), json=fill_ids(check.json, ids),
+                               data=fill_ids(check.data, ids))
+        started = time.perf_counter()
+        with collect_queries() as stats:
+            response = client.open(check.path, method=check.method, json=check.json, data=check.data)
+        results.append((check, response.status_code, stats, (time.perf_counter() - started) * 1000))
+    return results
+
+
+def check_routes(checks=ROUTE_CHECKS):
+    """run_checks against a freshly seeded app, dropped again afterwards"""
+    app, ids = seeded_app()
+    try:
+        return run_checks(app, ids, checks)
+    finally:
+        with app.app_context():
+            db.drop_all()
+
+
+def check_problems(check, status_code, stats, elapsed_ms=None, slack=1.0):
+    """What is wrong with one run_checks result, e.g. ['7 queries > 5']; empty when it is within budget.
+
+    The time limit is only checked when `elapsed_ms` is given.
+    """
+    problems = []
+    if status_code >= 400:
+        problems.append(f'HTTP {status_code}')
+    if stats.count > check.max_queries:
+        problems.append(f'{stats.count} queries > {check.max_queries}')
+    if elapsed_ms is not None and elapsed_ms > check.max_ms * slack:
+        problems.append(f'{elapsed_ms:.0f} ms > {check.max_ms * slack:.0f} ms')
+    return problems
+
+
+def describe_statements(stats):
+    """Each distinct statement once, in the order first run, with how often it ran"""
+    counts = Counter(statement for statement, _ in stats.queries)
+    return '\n'.join(f"{counts[statement]:>4}x  {' '.join(statement.split())}" for statement in counts)
+
+
+@perf_cli.command('queries')
+@click.option('--endpoint', 'endpoints', multiple=True, help='Only check these endpoints. Later writes may depend on earlier ones.')
+@click.option('--slack', type=float, default=1.0, help='Multiply every time limit by this.')
+@click.option('--verbose', is_flag=True, help='List the statements of every request, not just failing ones.')
+def queries_command(endpoints, slack, verbose):
+    """Fail if any route runs more SQL statements or takes longer than its budget."""
+    checks = [check for check in ROUTE_CHECKS if not endpoints or check.endpoint in endpoints]
+    failures = 0
+    for check, status_code, stats, elapsed_ms in check_routes(checks):
+        problems = check_problems(check, status_code, stats, elapsed_ms, slack)
+        click.echo(f"{'FAIL' if problems else 'ok':<5}{check.method:<7}{check.path:<40}{status_code:<4}"
+                   f'{stats.count:>3}/{check.max_queries:<3} queries {elapsed_ms:>6.1f} ms  {", ".join(problems)}')
+        if (problems or verbose) and stats.queries:
+            click.echo(textwrap.indent(describe_statements(stats), '    '))
+        failures += bool(problems)
+    click.echo(f'{len(checks) - failures} passed, {failures} failed')
+    if failures:
+        raise SystemExit(1)
@@ -0,0 +1,161 @@
+import re
+import textwrap
+from contextlib import contextmanager
+
+import click
+from sqlalchemy import event
+from app import db
+from app.models import DocumentSequence, Invoice
+from app.perf import perf_cli
+from app.perf.budgets import ROUTE_CHECKS
+from app.perf.seeded import CHECK_USER, fill_ids, seeded_app
+from app.stats import dashboard_stats
+
+# A plan step that reads every row of a table: 'SCAN invoices', not 'SCAN invoices USING INDEX ...'
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\w+)(?: AS \w+)?$')
+# A subquery SQLite runs as a co-routine; scanning it reads the subquery's rows, not a table
+CO_ROUTINE = re.compile(r'^CO-ROUTINE (\w+)$')
+
+
+def _hot_dashboard_stats(ids):
+    dashboard_stats()
+
+
+def _hot_invoice_balance(ids):
+    db.session.get(Invoice, ids['open_invoice']).update_balance()
+
+
+def _hot_number_allocation(ids):
+    DocumentSequence.next_number('INV')
+
+
+def _hot_number_reservation(ids):
+    DocumentSequence.reserve_numbers('Q', 50)
+
+
+# Model-level queries most requests run, each checked for full table scans on its own;
+# name -> function(ids), called in an app context and rolled back. Routes are checked through ROUTE_CHECKS.
+HOT_QUERIES = {
+    'dashboard_stats': _hot_dashboard_stats,
+    'invoice_balance': _hot_invoice_balance,
+    'number_allocation': _hot_number_allocation,
+    'number_reservation': _hot_number_reservation,
+}
+
+
+@contextmanager
+def _capture_statements(engine):
+    """Collect {statement: parameters of its first run} for the statements run inside the block"""
+    statements = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def _explain(statements):
+    """[(statement, [plan step])] from SQLite's EXPLAIN QUERY PLAN, in the current app context"""
+    connection = db.session.connection()
+    return [
+        (statement, [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)])
+        for statement, parameters in statements.items()
+    ]
+
+
+def full_scans(plans, allowed=()):
+    """The (statement, [plan step]) entries of `plans` that read a whole table not named in `allowed`"""
+    scans = []
+    for statement, steps in plans:
+        subqueries = {match.group(1) for match in map(CO_ROUTINE.match, steps) if match}
+        if any(match.group(1) not in allowed and match.group(1) not in subqueries
+               for match in map(FULL_SCAN.match, steps) if match):
+            scans.append((statement, steps))
+    return scans
+
+
+def describe_plans(plans):
+    """Each statement of `plans` followed by its plan steps, indented"""
+    lines = []
+    for statement, steps in plans:
+        lines.append(' '.join(statement.split()))
+        lines += [f'  {step}' for step in steps]
+    return '\n'.join(lines)
+
+
+def explain_checks(app, ids, checks=ROUTE_CHECKS):
+    """Make every request in `checks`, like run_checks, and explain each statement it ran.
+
+    Returns [(check, [(statement, [plan step])])], one entry per distinct
+    statement, explained with the parameters of its first run.
+    """
+    with app.app_context():
+        engine = db.engine
+    client = app.test_client()
+    client.post('/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]})
+    captured = []
+    for check in checks:
+        check = check._replace(path=fill_ids(check.path, ids), json=fill_ids(check.json, ids),
+                               data=fill_ids(check.data, ids))
+        with _capture_statements(engine) as statements:
+            client.open(check.path, method=check.method, json=check.json, data=check.data)
+        captured.append((check, statements))
+
+    with app.app_context():
+        results = [(check, _explain(statements)) for check, statements in captured]
+        db.session.rollback()
+    return results
+
+
+def explain_queries(app, ids, queries=HOT_QUERIES):
+    """Run each of `queries` (see HOT_QUERIES) and explain the statements it ran.
+
+    Returns [(name, [(statement, [plan step])])]. Nothing the queries
+    write is kept.
+    """
+    results = []
+    for name, run in queries.items():
+        with app.app_context():
+            with _capture_statements(db.engine) as statements:
+                run(ids)
+            results.append((name, _explain(statements)))
+            db.session.rollback()
+    return results
+
+
+def explain_routes(checks=ROUTE_CHECKS, queries=HOT_QUERIES):
+    """explain_checks and explain_queries against a freshly seeded app, dropped again afterwards"""
+    app, ids = seeded_app()
+    try:
+        return explain_checks(app, ids, checks), explain_queries(app, ids, queries)
+    finally:
+        with app.app_context():
+            db.drop_all()
+
+
+@perf_cli.command('plans')
+@click.option('--endpoint', 'endpoints', multiple=True, help='Only check these endpoints. Later writes may depend on earlier ones.')
+@click.option('--verbose', is_flag=True, help='Print the plan of every statement, not just failing ones.')
+def plans_command(endpoints, verbose):
+    """Fail if any statement a route or hot query runs reads a whole table without an index."""
+    checks = [check for check in ROUTE_CHECKS if not endpoints or check.endpoint in endpoints]
+    queries = {} if endpoints else HOT_QUERIES
+    route_plans, query_plans = explain_routes(checks, queries)
+    results = [(f'{check.method:<7}{check.path}', plans, check.scans) for check, plans in route_plans]
+    results += [(f"{'query':<7}{name}", plans, ()) for name, plans in query_plans]
+    failures = 0
+    for label, plans, allowed in results:
+        scans = full_scans(plans, allowed)
+        click.echo(f"{'FAIL' if scans else 'ok':<5}{label:<47}{len(plans):>3} statements"
+                   f"{'  full table scan' if scans else ''}")
+        if verbose or scans:
+            click.echo(textwrap.indent(describe_plans(plans if verbose else scans), '    '))
+        failures += bool(scans)
+    click.echo(f'{len(results) - failures} passed, {failures} failed')
+    if failures:
+        raise SystemExit(1)
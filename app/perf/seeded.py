@@ -0,0 +1,73 @@
+from config import Config
+from app import create_app, db
+from app.models import Client, EmailLog, Invoice, Payment, Quote, User
+from app.seed import seed_database
+
+# Size of the check database; see app.seed.seed_database
+CHECK_CLIENTS = 300
+CHECK_USER = ('perf', 'perf')
+
+
+class CheckConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    MAIL_SUPPRESS_SEND = True
+    MAIL_DEFAULT_SENDER = 'perf@example.com'
+    LOG_FILE = ''
+    LOG_LEVEL = 'ERROR'
+    QUERY_STATS_ENABLED = True
+    QUERY_DEBUG_PANEL = False
+    QUERY_COUNT_THRESHOLD = None
+    QUERY_THRESHOLD_ACTION = 'log'
+
+
+def check_ids():
+    """Ids of the seeded rows the checks use, keyed by the names their paths refer to"""
+    def first(query):
+        return query.order_by(None).limit(1).scalar()
+
+    invoice = db.session.query(Invoice.id, Invoice.invoice_number).filter(Invoice.payments.any()).order_by(
+        Invoice.id).first()
+    return {
+        'client': first(db.session.query(Client.id).filter(Client.quotes.any(), Client.invoices.any())),
+        'quote': first(db.session.query(Quote.id).filter(Quote.items.any()).order_by(Quote.id)),
+        'uninvoiced_quote': first(db.session.query(Quote.id).filter(~Quote.invoice.has())),
+        'invoice': invoice.id,
+        'invoice_number': invoice.invoice_number,
+        'open_invoice': first(db.session.query(Invoice.id).filter(Invoice.balance > 0)),
+        'payment': first(db.session.query(Payment.id)),
+        'email': first(db.session.query(EmailLog.id)),
+        # Rows the writes create: the form's client, then the API's; the invoice made from a quote
+        'new_client': db.session.query(db.func.max(Client.id)).scalar() + 1,
+        'api_client': db.session.query(db.func.max(Client.id)).scalar() + 2,
+        'new_quote': db.session.query(db.func.max(Quote.id)).scalar() + 1,
+        'new_invoice': db.session.query(db.func.max(Invoice.id)).scalar() + 1,
+    }
+
+
+def fill_ids(value, ids):
+    """Put seeded ids into a check's path or payload; a bare '{name}' becomes the integer id"""
+    if isinstance(value, dict):
+        return {key: fill_ids(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill_ids(item, ids) for item in value]
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in ids:
+            return ids[value[1:-1]]
+        return value.format(**ids)
+    return value
+
+
+def seeded_app(clients=CHECK_CLIENTS, ids=check_ids, config=CheckConfig):
+    """A CheckConfig app (or one of its subclasses) with a seeded in-memory database and the check user.
+
+    Returns (app, ids()), with `ids` called inside the app context.
+    """
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        user = User(username=CHECK_USER[0], email='perf@example.com')
+        user.set_password(CHECK_USER[1])
+        db.session.add(user)
+        seed_database(clients=clients)
+        return app, ids()
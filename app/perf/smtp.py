@@ -0,0 +1,85 @@
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+
+from app.perf.seeded import CheckConfig
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """A local SMTP server that accepts every message and counts connections.
+
+    Each new connection waits `connect_delay` seconds before the greeting,
+    standing in for the TCP, STARTTLS and AUTH round trips of a real server.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay=0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    def config(self, **settings):
+        """A CheckConfig subclass that delivers mail here, with `settings` on top"""
+        return type('SMTPConfig', (CheckConfig,), {
+            'MAIL_SERVER': '127.0.0.1',
+            'MAIL_PORT': self.server_address[1],
+            'MAIL_USE_TLS': False,
+            'MAIL_USE_SSL': False,
+            'MAIL_USERNAME': None,
+            'MAIL_PASSWORD': None,
+            'MAIL_SUPPRESS_SEND': False,
+            **settings,
+        })
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.connect_delay)
+        self.reply('220 localhost ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for line in iter(self.rfile.readline, b''):
+                    if line.rstrip(b'\r\n') == b'.':
+                        break
+                    data.append(line)
+                with server.lock:
+                    server.messages.append(b''.join(data))
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            elif command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            else:
+                # MAIL, RCPT, RSET and NOOP all just succeed
+                self.reply('250 OK')
+
+
+@contextmanager
+def smtp_stand_in(connect_delay=0):
+    """Run an SMTPStandIn on a free local port for the duration of the block"""
+    server = SMTPStandIn(connect_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
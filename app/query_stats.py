@@ -0,0 +1,140 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, render_template, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.log import log_event
+
+# The QueryStats collecting statements right now: the request's and any `collect_queries` blocks
+_active = ContextVar('query_stats', default=())
+
+
+class QueryThresholdExceeded(RuntimeError):
+    """A request ran more statements than QUERY_COUNT_THRESHOLD, or repeated one too often"""
+
+
+class QueryStats:
+    """The SQL statements run while it was active, with the time each took"""
+
+    def __init__(self):
+        self.queries = []  # [(statement, seconds)]
+        self.started = time.perf_counter()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated(self, threshold):
+        """(statement, count) for every statement run at least `threshold` times, most frequent first.
+
+        The same SQL with different parameters is usually a lazy load in a
+        loop, i.e. an N+1.
+        """
+        counts = Counter(statement for statement, _ in self.queries)
+        return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    active = _active.get()
+    if active and conn.info.get('query_start'):
+        query = (statement, time.perf_counter() - conn.info['query_start'].pop())
+        for stats in active:
+            stats.queries.append(query)
+
+
+@contextmanager
+def collect_queries():
+    """Record the statements run inside the block: `with collect_queries() as stats: ...`
+
+    Blocks nest, and a request handled inside one is counted by both.
+    """
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+def _start_request():
+    g.query_stats = QueryStats()
+    g.query_stats_token = _active.set(_active.get() + (g.query_stats,))
+
+
+def _check_thresholds(stats):
+    """Log, or raise QueryThresholdExceeded, when a request ran too many or too repetitive queries"""
+    config = current_app.config
+    limit = config['QUERY_COUNT_THRESHOLD']
+    repeated = stats.repeated(config['QUERY_REPEAT_THRESHOLD'])
+    problems = []
+    if limit is not None and stats.count > limit:
+        problems.append(f'{stats.count} queries (limit {limit})')
+    problems += [f'{count}x {statement}' for statement, count in repeated]
+    if not problems:
+        return
+    if config['QUERY_THRESHOLD_ACTION'] == 'raise':
+        raise QueryThresholdExceeded(f'{request.method} {request.path}: ' + '; '.join(problems))
+    log_event('sql.threshold_exceeded', logging.WARNING, method=request.method, path=request.path,
+              endpoint=request.endpoint, queries=stats.count, db_ms=round(stats.duration * 1000, 1),
+              repeated=[{'statement': statement, 'count': count} for statement, count in repeated])
+
+
+def _finish_request(response):
+    stats = g.pop('query_stats', None)
+    if stats is None:
+        return response
+    _active.reset(g.pop('query_stats_token'))
+    response.headers.add('Server-Timing', f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"')
+    response.headers.add('Server-Timing', f'app;dur={(time.perf_counter() - stats.started) * 1000:.1f}')
+
+    if current_app.config['QUERY_DEBUG_PANEL'] and response.mimetype == 'text/html' and not response.direct_passthrough:
+        html = response.get_data(as_text=True)
+        if '</body>' in html:
+            panel = render_template(
+                'debug/query_panel.html', stats=stats,
+                repeated=stats.repeated(current_app.config['QUERY_REPEAT_THRESHOLD'])
+            )
+            response.set_data(html.replace('</body>', panel + '</body>', 1))
+
+    _check_thresholds(stats)
+    return response
+
+
+def _teardown_request(exception=None):
+    # after_request doesn't run when a view raises; don't leave the collector set
+    if 'query_stats_token' in g:
+        g.pop('query_stats', None)
+        _active.reset(g.pop('query_stats_token'))
+
+
+def init_app(app):
+    """Count the SQL statements and database time of every request.
+
+    The totals go out in a Server-Timing header and, with
+    QUERY_DEBUG_PANEL on, in a panel at the bottom of HTML pages. A
+    request over QUERY_COUNT_THRESHOLD statements, or one repeating a
+    statement QUERY_REPEAT_THRESHOLD times, is logged or, with
+    QUERY_THRESHOLD_ACTION = 'raise', fails.
+    """
+    if not app.config['QUERY_STATS_ENABLED']:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
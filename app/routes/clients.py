@@ -1,7 +1,11 @@
 from flask import Blueprint, jsonify, request, render_template, redirect, url_for, flash
+from sqlalchemy.orm import selectinload
 from app import db
 from app.models import Client
 from app.forms import ClientForm
+from app.pagination import keyset_paginate
+from app.api import api_list, in_filter, iso_or_none, since_filter
+from app.search import client_matches
 from flask_login import login_required
 
 # Create two blueprints - one for API and one for web interface
@@ -13,16 +17,23 @@ bp = Blueprint('clients', __name__, url_prefix='/clients')
 @login_required
 def index():
     """Display list of clients."""
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     
-    query = Client.query
     if search:
-        query = query.filter(Client.name.ilike(f'%{search}%'))
-    
-    pagination = query.order_by(Client.name).paginate(
-        page=page, per_page=10, error_out=False)
-    clients = pagination.items
+        # Ranked full-text matches, paged by (rank, id)
+        matches = client_matches(search)
+        query = Client.query.join(matches, matches.c.id == Client.id).add_columns(matches.c.rank, matches.c.id)
+        pagination = keyset_paginate(
+            query, [matches.c.rank, matches.c.id],
+            after=request.args.get('after'), before=request.args.get('before'),
+            per_page=10, count_key=('clients.index', search))
+        clients = [row.Client for row in pagination.items]
+    else:
+        pagination = keyset_paginate(
+            Client.query, [Client.name, Client.id],
+            after=request.args.get('after'), before=request.args.get('before'),
+            per_page=10, count_key=('clients.index', search))
+        clients = pagination.items
     
     return render_template('clients/index.html', clients=clients, pagination=pagination)
 
@@ -79,15 +90,13 @@ def edit(id):
 @login_required
 def view(id):
     """View a specific client."""
-    client = Client.query.get_or_404(id)
+    client = Client.query.options(selectinload(Client.quotes), selectinload(Client.invoices)).get_or_404(id)
     return render_template('clients/view.html', client=client)
 
 # API Routes
-@api_bp.route('/', methods=['GET'])
-def get_clients():
-    """Get all clients."""
-    clients = Client.query.all()
-    return jsonify([{
+def client_to_dict(client):
+    """Serialize a client for the API."""
+    return {
         'id': client.id,
         'name': client.name,
         'email': client.email,
@@ -98,26 +107,39 @@ def get_clients():
         'state': client.state,
         'zip_code': client.zip_code,
         'created_at': client.created_at,
-        'updated_at': client.updated_at
-    } for client in clients])
+        'updated_at': iso_or_none(client.updated_at)
+    }
+
+# Columns the list endpoint can return, see app.api.api_list
+CLIENT_FIELDS = {
+    'id': (Client.id, None),
+    'name': (Client.name, None),
+    'email': (Client.email, None),
+    'phone': (Client.phone, None),
+    'address1': (Client.address1, None),
+    'address2': (Client.address2, None),
+    'city': (Client.city, None),
+    'state': (Client.state, None),
+    'zip_code': (Client.zip_code, None),
+    'created_at': (Client.created_at, None),
+    'updated_at': (Client.updated_at, iso_or_none)
+}
+
+CLIENT_FILTERS = {
+    'client_id': in_filter(Client.id, int),
+    'updated_since': since_filter(Client.updated_at)
+}
+
+@api_bp.route('/', methods=['GET'])
+def get_clients():
+    """Get all clients."""
+    return api_list(CLIENT_FIELDS, Client.id, CLIENT_FILTERS)
 
 @api_bp.route('/<int:id>', methods=['GET'])
 def get_client(id):
     """Get a specific client."""
     client = Client.query.get_or_404(id)
-    return jsonify({
-        'id': client.id,
-        'name': client.name,
-        'email': client.email,
-        'phone': client.phone,
-        'address1': client.address1,
-        'address2': client.address2,
-        'city': client.city,
-        'state': client.state,
-        'zip_code': client.zip_code,
-        'created_at': client.created_at,
-        'updated_at': client.updated_at
-    })
+    return jsonify(client_to_dict(client))
 
 @api_bp.route('/', methods=['POST'])
 def create_client():
@@ -142,19 +164,7 @@ def create_client():
     db.session.add(client)
     db.session.commit()
     
-    return jsonify({
-        'id': client.id,
-        'name': client.name,
-        'email': client.email,
-        'phone': client.phone,
-        'address1': client.address1,
-        'address2': client.address2,
-        'city': client.city,
-        'state': client.state,
-        'zip_code': client.zip_code,
-        'created_at': client.created_at,
-        'updated_at': client.updated_at
-    }), 201
+    return jsonify(client_to_dict(client)), 201
 
 @api_bp.route('/<int:id>', methods=['PUT'])
 def update_client(id):
@@ -169,19 +179,7 @@ def update_client(id):
     
     db.session.commit()
     
-    return jsonify({
-        'id': client.id,
-        'name': client.name,
-        'email': client.email,
-        'phone': client.phone,
-        'address1': client.address1,
-        'address2': client.address2,
-        'city': client.city,
-        'state': client.state,
-        'zip_code': client.zip_code,
-        'created_at': client.created_at,
-        'updated_at': client.updated_at
-    })
+    return jsonify(client_to_dict(client))
 
 @api_bp.route('/<int:id>', methods=['DELETE'])
 def delete_client(id):
@@ -1,10 +1,16 @@
 from flask import Blueprint, jsonify, request, render_template, redirect, url_for, flash
 from datetime import datetime, timedelta
 from app import db
-from app.models import Invoice, InvoiceItem, Client, Quote, QuoteItem
+from app.models import Invoice, InvoiceItem, Client, Quote, QuoteItem, DocumentSequence
+from app.money import Money
 from flask_login import login_required
+from sqlalchemy.orm import joinedload, selectinload
 from app.forms import InvoiceForm
-from app.routes.emails import send_invoice_email
+from app.pagination import keyset_paginate
+from app.api import api_list, float_or_zero, in_filter, iso_or_none, since_filter
+from app.outbox import enqueue_email
+from app.email_templates import render_invoice_email
+from app.invoice_emails import select_invoices, queue_invoice_emails
 
 # Create two blueprints - one for API and one for web interface
 api_bp = Blueprint('api_invoices', __name__, url_prefix='/api/invoices')
@@ -15,15 +21,21 @@ bp = Blueprint('invoices', __name__, url_prefix='/invoices')
 @login_required
 def index():
     """Display list of invoices."""
-    page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
+    status = request.args.get('status', '')
     
-    query = Invoice.query
+    query = Invoice.query.options(joinedload(Invoice.client))
     if search:
         query = query.filter(Invoice.invoice_number.ilike(f'%{search}%'))
+    if status == 'outstanding':
+        query = query.filter(Invoice.balance > 0)
+    elif status:
+        query = query.filter(Invoice.status == status)
     
-    pagination = query.order_by(Invoice.date_issued.desc()).paginate(
-        page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(
+        query, [Invoice.date_issued, Invoice.id],
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=10, descending=True, count_key=('invoices.index', search, status))
     invoices = pagination.items
     
     return render_template('invoices/index.html', invoices=invoices, pagination=pagination)
@@ -66,16 +78,8 @@ def create():
         # Pre-populate form fields
         form.client_id.data = quote.client_id
         
-        # Generate invoice number
-        year = datetime.now().year
-        last_invoice = Invoice.query.filter(Invoice.invoice_number.like(f'INV-{year}-%')).order_by(Invoice.id.desc()).first()
-        if last_invoice:
-            last_number = int(last_invoice.invoice_number.split('-')[-1])
-            invoice_number = f'INV-{year}-{last_number + 1:03d}'
-        else:
-            invoice_number = f'INV-{year}-001'
-        
-        form.invoice_number.data = invoice_number
+        # Show the upcoming invoice number; the real one is allocated on save
+        form.invoice_number.data = DocumentSequence.preview_number('INV')
         form.date_issued.data = datetime.now().date()
         form.due_date.data = datetime.now().date() + timedelta(days=30)
         form.status.data = 'draft'
@@ -95,17 +99,8 @@ def create():
         form.client_id.data = client_id
     
     if request.method == 'POST':
-        # Generate invoice number if not from quote
-        if not quote_id:
-            year = datetime.now().year
-            last_invoice = Invoice.query.filter(Invoice.invoice_number.like(f'INV-{year}-%')).order_by(Invoice.id.desc()).first()
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number.split('-')[-1])
-                invoice_number = f'INV-{year}-{last_number + 1:03d}'
-            else:
-                invoice_number = f'INV-{year}-001'
-        else:
-            invoice_number = request.form.get('invoice_number')
+        # Generate invoice number
+        invoice_number = DocumentSequence.next_number('INV')
         
         # Create invoice with basic fields
         invoice = Invoice(
@@ -127,16 +122,16 @@ def create():
             quantity_str = request.form.get(f'items[{i}][quantity]')
             unit_price_str = request.form.get(f'items[{i}][unit_price]')
             
-            # Convert to Decimal to match database field types
+            # Quantities are Decimal and prices Money, to match the column types
             try:
                 quantity = Decimal(quantity_str) if quantity_str else Decimal('0')
             except (ValueError, TypeError):
                 quantity = Decimal('0')
             
             try:
-                unit_price = Decimal(unit_price_str) if unit_price_str else Decimal('0')
+                unit_price = Money.of(unit_price_str) if unit_price_str else Money(0)
             except (ValueError, TypeError):
-                unit_price = Decimal('0')
+                unit_price = Money(0)
             
             if description:  # Only create if description is provided
                 item = InvoiceItem(
@@ -170,7 +165,7 @@ def create():
 @login_required
 def edit(id):
     """Edit an invoice."""
-    invoice = Invoice.query.get_or_404(id)
+    invoice = Invoice.query.options(selectinload(Invoice.items)).get_or_404(id)
     form = InvoiceForm(obj=invoice)
     # Populate client choices
     form.client_id.choices = [(c.id, c.name) for c in Client.query.order_by(Client.name).all()]
@@ -199,7 +194,9 @@ def edit(id):
 @login_required
 def view(id):
     """View a specific invoice."""
-    invoice = Invoice.query.get_or_404(id)
+    invoice = Invoice.query.options(
+        joinedload(Invoice.client), selectinload(Invoice.items), selectinload(Invoice.payments)
+    ).get_or_404(id)
     return render_template('invoices/view.html', invoice=invoice)
 
 @bp.route('/<int:id>/send')
@@ -210,10 +207,6 @@ def send(id):
     
     # Directly use the email function's internals
     try:
-        # Import needed functions
-        from app.routes.emails import send_invoice_email
-        from flask import jsonify
-        
         # Get client and prepare basics
         client = Client.query.get(invoice.client_id)
         if not client.email:
@@ -221,362 +214,72 @@ def send(id):
             return redirect(url_for('invoices.view', id=invoice.id))
             
         # Create email content
-        from datetime import datetime
-        from app.models import EmailLog
-        from app import mail, db
-        from flask_mail import Message
-        
-        subject = f'Invoice #{invoice.invoice_number} from Aquaforce Pressure Washing'
-        custom_message = ""  # No custom message for direct sends
-        
-        # Professional HTML template
-        body = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Invoice #{invoice.invoice_number}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-                
-                body {{
-                    font-family: 'Inter', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #1a1a1a;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f8fafc;
-                }}
-                .container {{
-                    max-width: 650px;
-                    margin: 20px auto;
-                    padding: 0;
-                    background-color: #ffffff;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-                    overflow: hidden;
-                }}
-                .header {{
-                    text-align: center;
-                    padding: 30px 20px;
-                    background: white;
-                    color: #333;
-                    position: relative;
-                    margin-bottom: 10px;
-                }}
-                .header::after {{
-                    content: '';
-                    position: absolute;
-                    bottom: 0;
-                    left: 0;
-                    right: 0;
-                    height: 1px;
-                    background: #e2e8f0;
-                }}
-                .logo {{
-                    margin-bottom: 10px;
-                }}
-                .logo img {{
-                    max-width: 350px;
-                    height: auto;
-                }}
-                .invoice-number {{
-                    font-size: 22px;
-                    font-weight: 600;
-                    padding: 6px 12px;
-                    display: inline-block;
-                    color: #2d3748;
-                }}
-                .subtitle {{
-                    font-size: 16px;
-                    opacity: 0.9;
-                    margin-bottom: 16px;
-                }}
-                .content {{
-                    padding: 40px;
-                }}
-                .greeting {{
-                    margin-bottom: 32px;
-                }}
-                .greeting p {{
-                    margin: 0 0 16px 0;
-                    font-size: 16px;
-                    color: #4b5563;
-                }}
-                .invoice-summary {{
-                    background-color: #f0f9ff;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e0f2fe;
-                }}
-                .invoice-summary strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .invoice-summary p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                .payment-info {{
-                    background-color: #f0fdf4;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #dcfce7;
-                }}
-                .payment-info strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .payment-info p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: separate;
-                    border-spacing: 0;
-                    margin-bottom: 32px;
-                }}
-                th {{
-                    background-color: #f8fafc;
-                    color: #0f172a;
-                    text-align: left;
-                    padding: 16px;
-                    font-weight: 600;
-                    border-bottom: 2px solid #e2e8f0;
-                }}
-                td {{
-                    padding: 16px;
-                    border-bottom: 1px solid #e2e8f0;
-                    color: #475569;
-                }}
-                .total-row {{
-                    font-weight: 600;
-                    background-color: #f8fafc;
-                }}
-                .total-row td {{
-                    color: #0f172a;
-                    font-size: 16px;
-                }}
-                .notes {{
-                    background-color: #f8fafc;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e2e8f0;
-                }}
-                .notes strong {{
-                    display: block;
-                    font-size: 16px;
-                    color: #0f172a;
-                    margin-bottom: 12px;
-                }}
-                .notes p {{
-                    margin: 0;
-                    color: #475569;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 32px 40px;
-                    background-color: #f8fafc;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .footer p {{
-                    margin: 8px 0;
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-                .contact-info {{
-                    margin-top: 16px;
-                    padding-top: 16px;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .contact-info p {{
-                    margin: 4px 0;
-                    color: #64748b;
-                }}
-                @media (max-width: 600px) {{
-                    .container {{
-                        margin: 0;
-                        border-radius: 0;
-                    }}
-                    .content {{
-                        padding: 24px;
-                    }}
-                    .header {{
-                        padding: 32px 16px;
-                    }}
-                    .logo {{
-                        font-size: 28px;
-                    }}
-                    table {{
-                        display: block;
-                        overflow-x: auto;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">
-                        <img src="cid:company_logo" alt="Aquaforce Pressure Washing">
-                    </div>
-                    <div class="invoice-number">Invoice #{invoice.invoice_number}</div>
-                </div>
-                
-                <div class="content">
-                    <div class="greeting">
-                        <p>Dear {client.name},</p>
-                        <p>{custom_message if custom_message else 'Thank you for choosing Aquaforce Pressure Washing. Please find your invoice details below.'}</p>
-                    </div>
-                    
-                    <div class="invoice-summary">
-                        <strong>Invoice Summary</strong>
-                        <p>Date Issued: {invoice.date_issued.strftime('%B %d, %Y') if hasattr(invoice.date_issued, 'strftime') else invoice.date_issued}</p>
-                        <p>Due Date: {invoice.due_date.strftime('%B %d, %Y') if hasattr(invoice.due_date, 'strftime') else invoice.due_date}</p>
-                        <p>Total Amount: <strong>${float(invoice.total):.2f}</strong></p>
-                    </div>
-                    
-                    <div class="payment-info">
-                        <strong>Payment Information</strong>
-                        <p>Please remit payment by the due date. For your convenience, we accept:</p>
-                        <p>• Credit/Debit Cards<br>• Cash<br>• Venmo/Cash App/Zelle</p>
-                    </div>
-                    
-                    <table>
-                        <tr>
-                            <th>Service Description</th>
-                            <th>Quantity</th>
-                            <th>Unit Price</th>
-                            <th>Total</th>
-                        </tr>
-        """
-        
-        # Add items to email
-        for item in invoice.items:
-            body += f"""
-                        <tr>
-                            <td>{item.description}</td>
-                            <td>{int(item.quantity)}</td>
-                            <td>${float(item.unit_price):.2f}</td>
-                            <td>${float(item.line_total):.2f}</td>
-                        </tr>
-            """
-        
-        body += f"""
-                        <tr class="total-row">
-                            <td colspan="3" align="right">Total:</td>
-                            <td>${float(invoice.total):.2f}</td>
-                        </tr>
-                    </table>
-        """
-                    
-        if invoice.notes:
-            body += f"""
-                    <div class="notes">
-                        <strong>Notes:</strong>
-                        <p>{invoice.notes}</p>
-                    </div>
-            """
-                    
-        body += """
-                    <p>If you have any questions about this invoice, please don't hesitate to contact us.</p>
-                    <p>Thank you for your business!</p>
-                    <p>Best regards,<br>Aquaforce Pressure Washing Team</p>
-                </div>
-                
-                <div class="footer">
-                    <div class="contact-info">
-                        <p><strong>Aquaforce Pressure Washing</strong></p>
-                        <p>Phone: (713) 725-4459</p>
-                        <p>Email: aquaforcepressurewashingsvc@gmail.com</p>
-                        <p>Website: www.aquaforcepressurewashing.com</p>
-                    </div>
-                    <p>© 2024 Aquaforce Pressure Washing. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Save email log
-        email_log = EmailLog(
-            client_id=client.id,
-            invoice_id=invoice.id,
-            email_type='invoice',
-            subject=subject,
-            body=body,
-            recipient=client.email,
-            sent_at=datetime.utcnow()
-        )
+        subject, body = render_invoice_email(invoice, client, invoice.items)
         
-        db.session.add(email_log)
+        # Queue for the outbox worker; nothing is sent inside the request
+        enqueue_email(client.email, subject, body, 'invoice', client_id=client.id, invoice_id=invoice.id)
         
         # Update invoice status
         invoice.status = 'sent'
         
-        # Create and send the email
-        msg = Message(subject, recipients=[client.email])
-        msg.html = body
-        
-        # Attach the logo
-        with open('app/static/img/AFLOGO.png', 'rb') as fp:
-            msg.attach('AFLOGO.png', 'image/png', fp.read(), 'inline', headers=[('Content-ID', '<company_logo>')])
-        
-        mail.send(msg)
-        
         db.session.commit()
         
-        flash('Invoice sent successfully!', 'success')
+        flash('Invoice queued for sending.', 'success')
     except Exception as e:
         flash(f'Error sending invoice: {str(e)}', 'error')
     
     return redirect(url_for('invoices.view', id=invoice.id))
 
 # API Routes
-@api_bp.route('/', methods=['GET'])
-def get_invoices():
-    """Get all invoices."""
-    invoices = Invoice.query.all()
-    return jsonify([{
+def invoice_to_dict(invoice):
+    """Serialize an invoice, without its items, for the API."""
+    return {
         'id': invoice.id,
         'client_id': invoice.client_id,
+        'quote_id': invoice.quote_id,
         'invoice_number': invoice.invoice_number,
-        'date_issued': invoice.date_issued.isoformat(),
-        'due_date': invoice.due_date.isoformat(),
-        'description': invoice.description,
-        'subtotal': float(invoice.subtotal),
-        'tax_rate': float(invoice.tax_rate),
-        'tax_amount': float(invoice.tax_amount),
-        'total': float(invoice.total),
-        'status': invoice.status
-    } for invoice in invoices])
+        'date_issued': invoice.date_issued.isoformat() if invoice.date_issued else None,
+        'due_date': invoice.due_date.isoformat() if invoice.due_date else None,
+        'notes': invoice.notes,
+        'total': float(invoice.total or 0),
+        'amount_paid': float(invoice.amount_paid or 0),
+        'balance': float(invoice.balance or 0),
+        'status': invoice.status,
+        'updated_at': iso_or_none(invoice.updated_at)
+    }
+
+# Columns the list endpoint can return, see app.api.api_list
+INVOICE_FIELDS = {
+    'id': (Invoice.id, None),
+    'client_id': (Invoice.client_id, None),
+    'quote_id': (Invoice.quote_id, None),
+    'invoice_number': (Invoice.invoice_number, None),
+    'date_issued': (Invoice.date_issued, iso_or_none),
+    'due_date': (Invoice.due_date, iso_or_none),
+    'notes': (Invoice.notes, None),
+    'total': (Invoice.total, float_or_zero),
+    'amount_paid': (Invoice.amount_paid, float_or_zero),
+    'balance': (Invoice.balance, float_or_zero),
+    'status': (Invoice.status, None),
+    'updated_at': (Invoice.updated_at, iso_or_none)
+}
+
+INVOICE_FILTERS = {
+    'status': in_filter(Invoice.status),
+    'client_id': in_filter(Invoice.client_id, int),
+    'updated_since': since_filter(Invoice.updated_at)
+}
+
+@api_bp.route('/', methods=['GET'])
+def get_invoices():
+    """Get all invoices."""
+    return api_list(INVOICE_FIELDS, Invoice.id, INVOICE_FILTERS)
 
 @api_bp.route('/<int:id>', methods=['GET'])
 def get_invoice(id):
     """Get a specific invoice."""
     invoice = Invoice.query.get_or_404(id)
-    return jsonify({
-        'id': invoice.id,
-        'client_id': invoice.client_id,
-        'invoice_number': invoice.invoice_number,
-        'date_issued': invoice.date_issued.isoformat(),
-        'due_date': invoice.due_date.isoformat(),
-        'description': invoice.description,
-        'subtotal': float(invoice.subtotal),
-        'tax_rate': float(invoice.tax_rate),
-        'tax_amount': float(invoice.tax_amount),
-        'total': float(invoice.total),
-        'status': invoice.status
-    })
+    return jsonify(invoice_to_dict(invoice))
 
 @api_bp.route('/', methods=['POST'])
 def create_invoice():
@@ -600,19 +303,7 @@ def create_invoice():
     db.session.add(invoice)
     db.session.commit()
     
-    return jsonify({
-        'id': invoice.id,
-        'client_id': invoice.client_id,
-        'invoice_number': invoice.invoice_number,
-        'date_issued': invoice.date_issued.isoformat(),
-        'due_date': invoice.due_date.isoformat(),
-        'description': invoice.description,
-        'subtotal': float(invoice.subtotal),
-        'tax_rate': float(invoice.tax_rate),
-        'tax_amount': float(invoice.tax_amount),
-        'total': float(invoice.total),
-        'status': invoice.status
-    }), 201
+    return jsonify(invoice_to_dict(invoice)), 201
 
 @api_bp.route('/<int:id>', methods=['PUT'])
 def update_invoice(id):
@@ -676,19 +367,7 @@ def update_invoice(id):
     
     db.session.commit()
     
-    return jsonify({
-        'id': invoice.id,
-        'client_id': invoice.client_id,
-        'invoice_number': invoice.invoice_number,
-        'date_issued': invoice.date_issued.isoformat(),
-        'due_date': invoice.due_date.isoformat(),
-        'description': invoice.description,
-        'subtotal': float(invoice.subtotal),
-        'tax_rate': float(invoice.tax_rate),
-        'tax_amount': float(invoice.tax_amount),
-        'total': float(invoice.total),
-        'status': invoice.status
-    })
+    return jsonify(invoice_to_dict(invoice))
 
 @api_bp.route('/<int:id>', methods=['DELETE'])
 def delete_invoice(id):
@@ -702,20 +381,14 @@ def delete_invoice(id):
 @api_bp.route('/from-quote/<int:quote_id>', methods=['POST'])
 def create_from_quote(quote_id):
     """Create a new invoice from a quote."""
-    quote = Quote.query.get_or_404(quote_id)
+    quote = Quote.query.options(joinedload(Quote.invoice), selectinload(Quote.items)).get_or_404(quote_id)
 
     # Check if quote is already invoiced
     if quote.invoice:
         return jsonify({'error': 'Quote already has an invoice'}), 400
 
     # Generate invoice number (format: INV-YYYY-NNN)
-    year = datetime.now().year
-    last_invoice = Invoice.query.filter(Invoice.invoice_number.like(f'INV-{year}-%')).order_by(Invoice.id.desc()).first()
-    if last_invoice:
-        last_number = int(last_invoice.invoice_number.split('-')[-1])
-        invoice_number = f'INV-{year}-{last_number + 1:03d}'
-    else:
-        invoice_number = f'INV-{year}-001'
+    invoice_number = DocumentSequence.next_number('INV')
 
     # Set dates
     date_issued = datetime.now().date()
@@ -736,7 +409,7 @@ def create_from_quote(quote_id):
     db.session.flush()  # Get invoice ID
 
     # Copy quote items to invoice items
-    total = 0
+    total = Money(0)
     for q_item in quote.items:
         item = InvoiceItem(
             invoice_id=invoice.id,
@@ -745,7 +418,7 @@ def create_from_quote(quote_id):
             unit_price=q_item.unit_price,
             line_total=q_item.line_total
         )
-        total += float(q_item.line_total)
+        total += q_item.line_total or Money(0)
         db.session.add(item)
 
     invoice.total = total
@@ -766,318 +439,49 @@ def send_invoice_api(id):
             return jsonify({'error': 'Client has no email address'}), 400
             
         # Create email content
-        subject = f'Invoice #{invoice.invoice_number} from Aquaforce Pressure Washing'
-        custom_message = data.get('message', '')
-        
-        # Professional HTML template matching quote style
-        body = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Invoice #{invoice.invoice_number}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-                
-                body {{
-                    font-family: 'Inter', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #1a1a1a;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f8fafc;
-                }}
-                .container {{
-                    max-width: 650px;
-                    margin: 20px auto;
-                    padding: 0;
-                    background-color: #ffffff;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-                    overflow: hidden;
-                }}
-                .header {{
-                    text-align: center;
-                    padding: 30px 20px;
-                    background: white;
-                    color: #333;
-                    position: relative;
-                    margin-bottom: 10px;
-                }}
-                .header::after {{
-                    content: '';
-                    position: absolute;
-                    bottom: 0;
-                    left: 0;
-                    right: 0;
-                    height: 1px;
-                    background: #e2e8f0;
-                }}
-                .logo {{
-                    margin-bottom: 10px;
-                }}
-                .logo img {{
-                    max-width: 350px;
-                    height: auto;
-                }}
-                .invoice-number {{
-                    font-size: 22px;
-                    font-weight: 600;
-                    padding: 6px 12px;
-                    display: inline-block;
-                    color: #2d3748;
-                }}
-                .subtitle {{
-                    font-size: 16px;
-                    opacity: 0.9;
-                    margin-bottom: 16px;
-                }}
-                .content {{
-                    padding: 40px;
-                }}
-                .greeting {{
-                    margin-bottom: 32px;
-                }}
-                .greeting p {{
-                    margin: 0 0 16px 0;
-                    font-size: 16px;
-                    color: #4b5563;
-                }}
-                .invoice-summary {{
-                    background-color: #f0f9ff;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e0f2fe;
-                }}
-                .invoice-summary strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .invoice-summary p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                .payment-info {{
-                    background-color: #f0fdf4;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #dcfce7;
-                }}
-                .payment-info strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .payment-info p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: separate;
-                    border-spacing: 0;
-                    margin-bottom: 32px;
-                }}
-                th {{
-                    background-color: #f8fafc;
-                    color: #0f172a;
-                    text-align: left;
-                    padding: 16px;
-                    font-weight: 600;
-                    border-bottom: 2px solid #e2e8f0;
-                }}
-                td {{
-                    padding: 16px;
-                    border-bottom: 1px solid #e2e8f0;
-                    color: #475569;
-                }}
-                .total-row {{
-                    font-weight: 600;
-                    background-color: #f8fafc;
-                }}
-                .total-row td {{
-                    color: #0f172a;
-                    font-size: 16px;
-                }}
-                .notes {{
-                    background-color: #f8fafc;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e2e8f0;
-                }}
-                .notes strong {{
-                    display: block;
-                    font-size: 16px;
-                    color: #0f172a;
-                    margin-bottom: 12px;
-                }}
-                .notes p {{
-                    margin: 0;
-                    color: #475569;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 32px 40px;
-                    background-color: #f8fafc;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .footer p {{
-                    margin: 8px 0;
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-                .contact-info {{
-                    margin-top: 16px;
-                    padding-top: 16px;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .contact-info p {{
-                    margin: 4px 0;
-                    color: #64748b;
-                }}
-                @media (max-width: 600px) {{
-                    .container {{
-                        margin: 0;
-                        border-radius: 0;
-                    }}
-                    .content {{
-                        padding: 24px;
-                    }}
-                    .header {{
-                        padding: 32px 16px;
-                    }}
-                    .logo {{
-                        font-size: 28px;
-                    }}
-                    table {{
-                        display: block;
-                        overflow-x: auto;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">
-                        <img src="cid:company_logo" alt="Aquaforce Pressure Washing">
-                    </div>
-                    <div class="invoice-number">Invoice #{invoice.invoice_number}</div>
-                </div>
-                
-                <div class="content">
-                    <div class="greeting">
-                        <p>Dear {client.name},</p>
-                        <p>{custom_message if custom_message else 'Thank you for choosing Aquaforce Pressure Washing. Please find your invoice details below.'}</p>
-                    </div>
-                    
-                    <div class="invoice-summary">
-                        <strong>Invoice Summary</strong>
-                        <p>Date Issued: {invoice.date_issued.strftime('%B %d, %Y') if hasattr(invoice.date_issued, 'strftime') else invoice.date_issued}</p>
-                        <p>Due Date: {invoice.due_date.strftime('%B %d, %Y') if hasattr(invoice.due_date, 'strftime') else invoice.due_date}</p>
-                        <p>Total Amount: <strong>${float(invoice.total):.2f}</strong></p>
-                    </div>
-                    
-                    <div class="payment-info">
-                        <strong>Payment Information</strong>
-                        <p>Please remit payment by the due date. For your convenience, we accept:</p>
-                        <p>• Credit/Debit Cards<br>• Cash<br>• Venmo/Cash App/Zelle</p>
-                    </div>
-                    
-                    <table>
-                        <tr>
-                            <th>Service Description</th>
-                            <th>Quantity</th>
-                            <th>Unit Price</th>
-                            <th>Total</th>
-                        </tr>
-        """
-        
-        # Add items to email
-        for item in invoice.items:
-            body += f"""
-                        <tr>
-                            <td>{item.description}</td>
-                            <td>{int(item.quantity)}</td>
-                            <td>${float(item.unit_price):.2f}</td>
-                            <td>${float(item.line_total):.2f}</td>
-                        </tr>
-            """
+        subject, body = render_invoice_email(invoice, client, invoice.items, data.get('message', ''))
         
-        body += f"""
-                        <tr class="total-row">
-                            <td colspan="3" align="right">Total:</td>
-                            <td>${float(invoice.total):.2f}</td>
-                        </tr>
-                    </table>
-        """
-                    
-        if invoice.notes:
-            body += f"""
-                    <div class="notes">
-                        <strong>Notes:</strong>
-                        <p>{invoice.notes}</p>
-                    </div>
-            """
-                    
-        body += """
-                    <p>If you have any questions about this invoice, please don't hesitate to contact us.</p>
-                    <p>Thank you for your business!</p>
-                    <p>Best regards,<br>Aquaforce Pressure Washing Team</p>
-                </div>
-                
-                <div class="footer">
-                    <div class="contact-info">
-                        <p><strong>Aquaforce Pressure Washing</strong></p>
-                        <p>Phone: (713) 725-4459</p>
-                        <p>Email: aquaforcepressurewashingsvc@gmail.com</p>
-                        <p>Website: www.aquaforcepressurewashing.com</p>
-                    </div>
-                    <p>© 2024 Aquaforce Pressure Washing. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Save email log
-        from app.models import EmailLog
-        email_log = EmailLog(
-            client_id=client.id,
-            invoice_id=invoice.id,
-            email_type='invoice',
-            subject=subject,
-            body=body,
-            recipient=client.email,
-            sent_at=datetime.utcnow()
-        )
-        
-        db.session.add(email_log)
+        # Queue for the outbox worker; nothing is sent inside the request
+        enqueue_email(client.email, subject, body, 'invoice', client_id=client.id, invoice_id=invoice.id)
         
         # Update invoice status
         invoice.status = 'sent'
         
-        # Create and send the email
-        from flask_mail import Message
-        from app import mail
-        msg = Message(subject, recipients=[client.email])
-        msg.html = body
-        
-        # Attach the logo
-        with open('app/static/img/AFLOGO.png', 'rb') as fp:
-            msg.attach('AFLOGO.png', 'image/png', fp.read(), 'inline', headers=[('Content-ID', '<company_logo>')])
-        
-        mail.send(msg)
-        
         db.session.commit()
         
-        return jsonify({'message': 'Invoice sent successfully!'})
+        return jsonify({'message': 'Invoice queued for sending.'}), 202
+    except Exception as e:
+        return jsonify({'error': f'Error sending invoice: {str(e)}'}), 500
+
+@api_bp.route('/send-bulk', methods=['POST'])
+def send_bulk_api():
+    """Queue the email for every invoice matching a filter (API endpoint).
+
+    Accepts `status` and `client_ids` lists, a `due_from`/`due_to` date
+    range, a custom `message` and `dry_run`. Without `status` it sends
+    every draft and overdue invoice.
+    """
+    data = request.get_json() or {}
+    try:
+        statuses = data.get('status')
+        if isinstance(statuses, str):
+            statuses = statuses.split(',')
+        invoices = select_invoices(
+            statuses=statuses or None,
+            due_from=datetime.fromisoformat(data['due_from']).date() if data.get('due_from') else None,
+            due_to=datetime.fromisoformat(data['due_to']).date() if data.get('due_to') else None,
+            client_ids=[int(client_id) for client_id in data.get('client_ids') or []] or None
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid filter: {e}'}), 400
+
+    invoice_ids = [invoice.id for invoice in invoices]
+    if data.get('dry_run'):
+        return jsonify({'invoice_ids': invoice_ids, 'queued': 0})
+
+    try:
+        queued = queue_invoice_emails(invoices, data.get('message', ''))
     except Exception as e:
-        return jsonify({'error': f'Error sending invoice: {str(e)}'}), 500 
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': f'Error sending invoices: {str(e)}'}), 500
+    return jsonify({'invoice_ids': invoice_ids, 'queued': queued}), 202
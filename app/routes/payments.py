@@ -1,7 +1,11 @@
 from flask import Blueprint, jsonify, request, render_template, redirect, url_for, flash
 from datetime import datetime
+from sqlalchemy.orm import contains_eager, joinedload
 from app import db
-from app.models import Payment, Invoice
+from app.models import Payment, Invoice, Client
+from app.money import Money
+from app.pagination import keyset_paginate
+from app.api import api_list, float_or_zero, in_filter, iso_or_none, since_filter
 from flask_login import login_required
 
 # Create two blueprints - one for API and one for web interface
@@ -13,22 +17,24 @@ bp = Blueprint('payments', __name__, url_prefix='/payments')
 @login_required
 def index():
     """Display list of payments."""
-    page = request.args.get('page', 1, type=int)
     method = request.args.get('method')
     client = request.args.get('client')
     start_date = request.args.get('start_date')
     
-    query = Payment.query.join(Invoice).join(Invoice.client)
+    query = (Payment.query.join(Invoice).join(Client, Invoice.client_id == Client.id)
+             .options(contains_eager(Payment.invoice).contains_eager(Invoice.client)))
     
     if method:
         query = query.filter(Payment.method == method)
     if client:
-        query = query.filter(Invoice.client.name.ilike(f'%{client}%'))
+        query = query.filter(Client.name.ilike(f'%{client}%'))
     if start_date:
         query = query.filter(Payment.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
     
-    pagination = query.order_by(Payment.date.desc()).paginate(
-        page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(
+        query, [Payment.date, Payment.id],
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=10, descending=True, count_key=('payments.index', method, client, start_date))
     payments = pagination.items
     
     return render_template('payments/index.html', payments=payments, pagination=pagination)
@@ -43,8 +49,7 @@ def create():
     # If invoice_id is provided, check if it's already paid
     if invoice_id:
         invoice = Invoice.query.get_or_404(invoice_id)
-        balance = invoice.calculate_balance()
-        if balance <= 0:
+        if invoice.balance <= 0:
             flash('This invoice is already paid in full.', 'info')
             return redirect(url_for('invoices.view', id=invoice_id))
     
@@ -55,7 +60,7 @@ def create():
         # Create payment
         payment = Payment(
             invoice_id=data['invoice_id'],
-            amount=float(data['amount']),
+            amount=Money.of(data['amount']),
             date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
             method=data['method'],
             reference=data.get('reference', ''),
@@ -67,7 +72,7 @@ def create():
         # Explicitly fetch the invoice
         invoice = Invoice.query.get(data['invoice_id'])
         db.session.flush()
-        balance = invoice.calculate_balance()
+        balance = invoice.update_balance()
         if balance <= 0:
             invoice.status = 'paid'
         else:
@@ -83,7 +88,8 @@ def create():
         return redirect(url_for('payments.index'))
     
     # Get unpaid invoices for the dropdown
-    invoices = Invoice.query.filter(Invoice.status != 'paid').order_by(Invoice.date_issued.desc()).all()
+    invoices = (Invoice.query.options(joinedload(Invoice.client))
+                .filter(Invoice.balance > 0).order_by(Invoice.date_issued.desc()).all())
     
     return render_template('payments/form.html', invoices=invoices, invoice_id=invoice_id, return_to=return_to)
 
@@ -96,65 +102,87 @@ def edit(id):
     if request.method == 'POST':
         data = request.form.to_dict()
         
+        previous_invoice = payment.invoice
+        
         # Update payment fields
-        payment.invoice_id = data['invoice_id']
-        payment.amount = float(data['amount'])
+        payment.invoice_id = int(data['invoice_id'])
+        payment.amount = Money.of(data['amount'])
         payment.date = datetime.strptime(data['date'], '%Y-%m-%d').date()
         payment.method = data['method']
         payment.reference = data.get('reference', '')
         payment.notes = data.get('notes', '')
         
         # Update invoice status
-        invoice = payment.invoice
         db.session.flush()
-        balance = invoice.calculate_balance()
+        invoice = Invoice.query.get(payment.invoice_id)
+        balance = invoice.update_balance()
         if balance <= 0:
             invoice.status = 'paid'
         else:
             invoice.status = 'sent'
         
+        # Moving a payment to another invoice reopens the one it came from
+        if previous_invoice.id != invoice.id:
+            if previous_invoice.update_balance() > 0 and previous_invoice.status == 'paid':
+                previous_invoice.status = 'sent'
+        
         db.session.commit()
         
         flash('Payment updated successfully.', 'success')
         return redirect(url_for('payments.index'))
     
     # Get all invoices for the dropdown
-    invoices = Invoice.query.order_by(Invoice.date_issued.desc()).all()
+    invoices = Invoice.query.options(joinedload(Invoice.client)).order_by(Invoice.date_issued.desc()).all()
     return render_template('payments/form.html', payment=payment, invoices=invoices)
 
 @bp.route('/<int:id>')
 @login_required
 def view(id):
     """View a specific payment."""
-    payment = Payment.query.get_or_404(id)
+    payment = Payment.query.options(joinedload(Payment.invoice).joinedload(Invoice.client)).get_or_404(id)
     return render_template('payments/view.html', payment=payment)
 
 # API Routes
-@api_bp.route('/', methods=['GET'])
-def get_payments():
-    """Get all payments."""
-    payments = Payment.query.all()
-    return jsonify([{
+def payment_to_dict(payment):
+    """Serialize a payment for the API."""
+    return {
         'id': payment.id,
         'invoice_id': payment.invoice_id,
         'amount': float(payment.amount),
         'date': payment.date,
         'method': payment.method,
-        'notes': payment.notes
-    } for payment in payments])
+        'notes': payment.notes,
+        'updated_at': iso_or_none(payment.updated_at)
+    }
+
+# Columns the list endpoint can return, see app.api.api_list
+PAYMENT_FIELDS = {
+    'id': (Payment.id, None),
+    'invoice_id': (Payment.invoice_id, None),
+    'amount': (Payment.amount, float_or_zero),
+    'date': (Payment.date, None),
+    'method': (Payment.method, None),
+    'notes': (Payment.notes, None),
+    'updated_at': (Payment.updated_at, iso_or_none)
+}
+
+PAYMENT_FILTERS = {
+    'invoice_id': in_filter(Payment.invoice_id, int),
+    'client_id': lambda value: Payment.invoice_id.in_(
+        db.select(Invoice.id).where(in_filter(Invoice.client_id, int)(value))),
+    'updated_since': since_filter(Payment.updated_at)
+}
+
+@api_bp.route('/', methods=['GET'])
+def get_payments():
+    """Get all payments."""
+    return api_list(PAYMENT_FIELDS, Payment.id, PAYMENT_FILTERS)
 
 @api_bp.route('/<int:id>', methods=['GET'])
 def get_payment(id):
     """Get a specific payment."""
     payment = Payment.query.get_or_404(id)
-    return jsonify({
-        'id': payment.id,
-        'invoice_id': payment.invoice_id,
-        'amount': float(payment.amount),
-        'date': payment.date,
-        'method': payment.method,
-        'notes': payment.notes
-    })
+    return jsonify(payment_to_dict(payment))
 
 @api_bp.route('/', methods=['POST'])
 def create_payment():
@@ -184,7 +212,7 @@ def create_payment():
     
     # Update invoice status if payment covers full amount
     db.session.flush()
-    balance = invoice.calculate_balance()
+    balance = invoice.update_balance()
     if balance <= 0:
         invoice.status = 'paid'
     else:
@@ -192,14 +220,7 @@ def create_payment():
     
     db.session.commit()
     
-    return jsonify({
-        'id': payment.id,
-        'invoice_id': payment.invoice_id,
-        'amount': float(payment.amount),
-        'date': payment.date,
-        'method': payment.method,
-        'notes': payment.notes
-    }), 201
+    return jsonify(payment_to_dict(payment)), 201
 
 @api_bp.route('/<int:id>', methods=['PUT'])
 def update_payment(id):
@@ -215,7 +236,7 @@ def update_payment(id):
     # Update invoice status based on payments
     invoice = payment.invoice
     db.session.flush()
-    balance = invoice.calculate_balance()
+    balance = invoice.update_balance()
     if balance <= 0:
         invoice.status = 'paid'
     else:
@@ -223,14 +244,7 @@ def update_payment(id):
     
     db.session.commit()
     
-    return jsonify({
-        'id': payment.id,
-        'invoice_id': payment.invoice_id,
-        'amount': float(payment.amount),
-        'date': payment.date,
-        'method': payment.method,
-        'notes': payment.notes
-    })
+    return jsonify(payment_to_dict(payment))
 
 @api_bp.route('/<int:id>', methods=['DELETE'])
 def delete_payment(id):
@@ -242,7 +256,7 @@ def delete_payment(id):
     
     # Update invoice status
     db.session.flush()
-    balance = invoice.calculate_balance()
+    balance = invoice.update_balance()
     if balance <= 0:
         invoice.status = 'paid'
     elif invoice.status == 'paid':
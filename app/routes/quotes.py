@@ -2,12 +2,16 @@ from flask import Blueprint, jsonify, request, render_template, redirect, url_fo
 from datetime import datetime, timedelta
 from decimal import Decimal
 from app import db
-from app.models import Quote, QuoteItem, Client, Invoice, EmailLog
+from app.models import Quote, QuoteItem, Client, Invoice, EmailLog, DocumentSequence
+from app.money import Money
 from flask_login import login_required
 from app.forms import QuoteForm
-from app import mail
-from flask_mail import Message
-from sqlalchemy.orm import joinedload
+from app.pagination import keyset_paginate
+from app.api import api_list, float_or_zero, in_filter, iso_or_none, since_filter
+from app.email_templates import render_quote_email
+from app.search import field_matches
+from app.outbox import enqueue_email
+from sqlalchemy.orm import joinedload, selectinload
 
 # API Blueprint (existing)
 api_bp = Blueprint('api_quotes', __name__, url_prefix='/api/quotes')
@@ -18,13 +22,41 @@ bp = Blueprint('quotes', __name__, url_prefix='/quotes')
 @bp.route('/')
 @login_required
 def index():
-    quotes = Quote.query.order_by(Quote.date_created.desc()).all()
-    return render_template('quotes/index.html', quotes=quotes)
+    """Display list of quotes."""
+    search = request.args.get('search', '').strip()
+    status = request.args.get('status', '')
+    date_from = request.args.get('date_from', '')
+    date_to = request.args.get('date_to', '')
+    
+    query = Quote.query.options(joinedload(Quote.client))
+    if search:
+        # Quote number or client name through the search index, or an exact status
+        numbers = field_matches(search, 'quote', 'number')
+        client_names = field_matches(search, 'client', 'name')
+        query = query.filter(db.or_(Quote.id.in_(db.select(numbers.c.id)),
+                                    Quote.client_id.in_(db.select(client_names.c.id)),
+                                    Quote.status == search.lower()))
+    if status:
+        query = query.filter(Quote.status == status)
+    if date_from:
+        query = query.filter(Quote.date_created >= datetime.strptime(date_from, '%Y-%m-%d').date())
+    if date_to:
+        query = query.filter(Quote.date_created <= datetime.strptime(date_to, '%Y-%m-%d').date())
+    
+    pagination = keyset_paginate(
+        query, [Quote.date_created, Quote.id],
+        after=request.args.get('after'), before=request.args.get('before'),
+        per_page=10, descending=True, count_key=('quotes.index', search, status, date_from, date_to))
+    quotes = pagination.items
+    
+    return render_template('quotes/index.html', quotes=quotes, pagination=pagination)
 
 @bp.route('/<int:id>')
 @login_required
 def view(id):
-    quote = Quote.query.options(joinedload(Quote.invoice)).get_or_404(id)
+    quote = Quote.query.options(
+        joinedload(Quote.client), joinedload(Quote.invoice), selectinload(Quote.items), selectinload(Quote.email_logs)
+    ).get_or_404(id)
     # Use the relationship instead of manual query for better reliability
     invoice = quote.invoice
     
@@ -48,13 +80,7 @@ def create():
     
     if request.method == 'POST':
         # Generate quote number
-        year = datetime.now().year
-        last_quote = Quote.query.filter(Quote.quote_number.like(f'Q-{year}-%')).order_by(Quote.id.desc()).first()
-        if last_quote:
-            last_number = int(last_quote.quote_number.split('-')[-1])
-            quote_number = f'Q-{year}-{last_number + 1:03d}'
-        else:
-            quote_number = f'Q-{year}-001'
+        quote_number = DocumentSequence.next_number('Q')
         
         # Create quote with basic fields
         quote = Quote(
@@ -75,16 +101,16 @@ def create():
             quantity_str = request.form.get(f'items[{i}][quantity]')
             unit_price_str = request.form.get(f'items[{i}][unit_price]')
             
-            # Convert to Decimal to match database field types
+            # Quantities are Decimal and prices Money, to match the column types
             try:
                 quantity = Decimal(quantity_str) if quantity_str else Decimal('0')
             except (ValueError, TypeError):
                 quantity = Decimal('0')
             
             try:
-                unit_price = Decimal(unit_price_str) if unit_price_str else Decimal('0')
+                unit_price = Money.of(unit_price_str) if unit_price_str else Money(0)
             except (ValueError, TypeError):
-                unit_price = Decimal('0')
+                unit_price = Money(0)
             
             if description:  # Only create if description is provided
                 item = QuoteItem(
@@ -111,7 +137,7 @@ def create():
 @bp.route('/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit(id):
-    quote = Quote.query.get_or_404(id)
+    quote = Quote.query.options(selectinload(Quote.items)).get_or_404(id)
     form = QuoteForm(obj=quote)
     clients = Client.query.order_by(Client.name).all()
     form.client_id.choices = [(c.id, c.name) for c in clients]
@@ -142,16 +168,16 @@ def edit(id):
             unit_price_str = request.form.get(f'items[{i}][unit_price]')
             item_id = request.form.get(f'items[{i}][id]')
             
-            # Convert to Decimal to match database field types
+            # Quantities are Decimal and prices Money, to match the column types
             try:
                 quantity = Decimal(quantity_str) if quantity_str else Decimal('0')
             except (ValueError, TypeError):
                 quantity = Decimal('0')
             
             try:
-                unit_price = Decimal(unit_price_str) if unit_price_str else Decimal('0')
+                unit_price = Money.of(unit_price_str) if unit_price_str else Money(0)
             except (ValueError, TypeError):
-                unit_price = Decimal('0')
+                unit_price = Money(0)
             
             if description:  # Only process if description is provided
                 if item_id and int(item_id) in existing_items:
@@ -207,308 +233,26 @@ def send(id):
             return redirect(url_for('quotes.view', id=quote.id))
             
         # Create email content
-        from datetime import datetime
-        from app import mail, db
-        from flask_mail import Message
-        
-        subject = f'Your Quote #{quote.quote_number} from Aquaforce Pressure Washing'
-        custom_message = ""  # No custom message for direct sends
+        subject, body = render_quote_email(quote, client, quote.items)
         
-        # Professional HTML template matching invoice style
-        body = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Quote #{quote.quote_number}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-                
-                body {{
-                    font-family: 'Inter', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #1a1a1a;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f8fafc;
-                }}
-                .container {{
-                    max-width: 650px;
-                    margin: 20px auto;
-                    padding: 0;
-                    background-color: #ffffff;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-                    overflow: hidden;
-                }}
-                .header {{
-                    text-align: center;
-                    padding: 30px 20px;
-                    background: white;
-                    color: #333;
-                    position: relative;
-                    margin-bottom: 10px;
-                }}
-                .header::after {{
-                    content: '';
-                    position: absolute;
-                    bottom: 0;
-                    left: 0;
-                    right: 0;
-                    height: 1px;
-                    background: #e2e8f0;
-                }}
-                .logo {{
-                    margin-bottom: 10px;
-                }}
-                .logo img {{
-                    max-width: 350px;
-                    height: auto;
-                }}
-                .quote-number {{
-                    font-size: 22px;
-                    font-weight: 600;
-                    padding: 6px 12px;
-                    display: inline-block;
-                    color: #2d3748;
-                }}
-                .subtitle {{
-                    font-size: 16px;
-                    opacity: 0.9;
-                    margin-bottom: 16px;
-                }}
-                .content {{
-                    padding: 40px;
-                }}
-                .greeting {{
-                    margin-bottom: 32px;
-                }}
-                .greeting p {{
-                    margin: 0 0 16px 0;
-                    font-size: 16px;
-                    color: #4b5563;
-                }}
-                .quote-summary {{
-                    background-color: #f0f9ff;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e0f2fe;
-                }}
-                .quote-summary strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .quote-summary p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: separate;
-                    border-spacing: 0;
-                    margin-bottom: 32px;
-                }}
-                th {{
-                    background-color: #f8fafc;
-                    color: #0f172a;
-                    text-align: left;
-                    padding: 16px;
-                    font-weight: 600;
-                    border-bottom: 2px solid #e2e8f0;
-                }}
-                td {{
-                    padding: 16px;
-                    border-bottom: 1px solid #e2e8f0;
-                    color: #475569;
-                }}
-                .total-row {{
-                    font-weight: 600;
-                    background-color: #f8fafc;
-                }}
-                .total-row td {{
-                    color: #0f172a;
-                    font-size: 16px;
-                }}
-                .notes {{
-                    background-color: #f8fafc;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e2e8f0;
-                }}
-                .notes strong {{
-                    display: block;
-                    font-size: 16px;
-                    color: #0f172a;
-                    margin-bottom: 12px;
-                }}
-                .notes p {{
-                    margin: 0;
-                    color: #475569;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 32px 40px;
-                    background-color: #f8fafc;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .footer p {{
-                    margin: 8px 0;
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-                .contact-info {{
-                    margin-top: 16px;
-                    padding-top: 16px;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .contact-info p {{
-                    margin: 4px 0;
-                    color: #64748b;
-                }}
-                @media (max-width: 600px) {{
-                    .container {{
-                        margin: 0;
-                        border-radius: 0;
-                    }}
-                    .content {{
-                        padding: 24px;
-                    }}
-                    .header {{
-                        padding: 32px 16px;
-                    }}
-                    .logo {{
-                        font-size: 28px;
-                    }}
-                    table {{
-                        display: block;
-                        overflow-x: auto;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">
-                        <img src="cid:company_logo" alt="Aquaforce Pressure Washing">
-                    </div>
-                    <div class="quote-number">Quote #{quote.quote_number}</div>
-                </div>
-                
-                <div class="content">
-                    <div class="greeting">
-                        <p>Dear {client.name},</p>
-                        <p>{custom_message if custom_message else 'Thank you for your interest in our services. Please find your detailed quote below.'}</p>
-                    </div>
-                    
-                    <div class="quote-summary">
-                        <strong>Quote Summary</strong>
-                        <p>Date Created: {quote.date_created.strftime('%B %d, %Y') if hasattr(quote.date_created, 'strftime') else quote.date_created}</p>
-                        <p>Valid Until: {quote.valid_until.strftime('%B %d, %Y') if hasattr(quote.valid_until, 'strftime') else quote.valid_until}</p>
-                        <p>Total Amount: <strong>${float(quote.total):.2f}</strong></p>
-                    </div>
-                    
-                    <table>
-                        <tr>
-                            <th>Service Description</th>
-                            <th>Quantity</th>
-                            <th>Unit Price</th>
-                            <th>Total</th>
-                        </tr>
-        """
-        
-        # Add items to email
-        for item in quote.items:
-            body += f"""
-                        <tr>
-                            <td>{item.description}</td>
-                            <td>{float(item.quantity)}</td>
-                            <td>${float(item.unit_price):.2f}</td>
-                            <td>${float(item.line_total):.2f}</td>
-                        </tr>
-            """
-        
-        body += f"""
-                        <tr class="total-row">
-                            <td colspan="3" align="right">Total:</td>
-                            <td>${float(quote.total):.2f}</td>
-                        </tr>
-                    </table>
-        """
-                    
-        if quote.notes:
-            body += f"""
-                    <div class="notes">
-                        <strong>Notes:</strong>
-                        <p>{quote.notes}</p>
-                    </div>
-            """
-                    
-        body += """
-                    <p>If you have any questions about this quote, please don't hesitate to contact us.</p>
-                    <p>We look forward to working with you!</p>
-                    <p>Best regards,<br>Aquaforce Pressure Washing Team</p>
-                </div>
-                
-                <div class="footer">
-                    <div class="contact-info">
-                        <p><strong>Aquaforce Pressure Washing</strong></p>
-                        <p>Phone: (713) 725-4459</p>
-                        <p>Email: aquaforcepressurewashingsvc@gmail.com</p>
-                        <p>Website: www.aquaforcepressurewashing.com</p>
-                    </div>
-                    <p>© 2024 Aquaforce Pressure Washing. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Save email log
-        email_log = EmailLog(
-            client_id=client.id,
-            quote_id=quote.id,
-            email_type='quote',
-            subject=subject,
-            body=body,
-            recipient=client.email,
-            sent_at=datetime.utcnow()
-        )
-        
-        db.session.add(email_log)
+        # Queue for the outbox worker; nothing is sent inside the request
+        enqueue_email(client.email, subject, body, 'quote', client_id=client.id, quote_id=quote.id)
         
         # Update quote status
         quote.status = 'sent'
         
-        # Create and send the email
-        msg = Message(subject, recipients=[client.email])
-        msg.html = body
-        
-        # Attach the logo
-        with open('app/static/img/AFLOGO.png', 'rb') as fp:
-            msg.attach('AFLOGO.png', 'image/png', fp.read(), 'inline', headers=[('Content-ID', '<company_logo>')])
-        
-        mail.send(msg)
-        
         db.session.commit()
         
-        flash('Quote sent successfully!', 'success')
+        flash('Quote queued for sending.', 'success')
     except Exception as e:
         flash(f'Error sending quote: {str(e)}', 'error')
     
     return redirect(url_for('quotes.view', id=quote.id))
 
 # API Routes
-@api_bp.route('/', methods=['GET'])
-def get_quotes():
-    """Get all quotes."""
-    quotes = Quote.query.all()
-    return jsonify([{
+def quote_to_dict(quote):
+    """Serialize a quote, without its items, for the API."""
+    return {
         'id': quote.id,
         'client_id': quote.client_id,
         'client_name': quote.client.name,
@@ -517,13 +261,39 @@ def get_quotes():
         'valid_until': quote.valid_until,
         'status': quote.status,
         'notes': quote.notes,
-        'total': float(quote.total) if quote.total else 0.0
-    } for quote in quotes])
+        'total': float(quote.total) if quote.total else 0.0,
+        'updated_at': iso_or_none(quote.updated_at)
+    }
+
+# Columns the list endpoint can return, see app.api.api_list
+QUOTE_FIELDS = {
+    'id': (Quote.id, None),
+    'client_id': (Quote.client_id, None),
+    'client_name': (db.select(Client.name).where(Client.id == Quote.client_id).scalar_subquery(), None),
+    'quote_number': (Quote.quote_number, None),
+    'date_created': (Quote.date_created, None),
+    'valid_until': (Quote.valid_until, None),
+    'status': (Quote.status, None),
+    'notes': (Quote.notes, None),
+    'total': (Quote.total, float_or_zero),
+    'updated_at': (Quote.updated_at, iso_or_none)
+}
+
+QUOTE_FILTERS = {
+    'status': in_filter(Quote.status),
+    'client_id': in_filter(Quote.client_id, int),
+    'updated_since': since_filter(Quote.updated_at)
+}
+
+@api_bp.route('/', methods=['GET'])
+def get_quotes():
+    """Get all quotes."""
+    return api_list(QUOTE_FIELDS, Quote.id, QUOTE_FILTERS)
 
 @api_bp.route('/<int:id>', methods=['GET'])
 def get_quote(id):
     """Get a specific quote with its items."""
-    quote = Quote.query.get_or_404(id)
+    quote = Quote.query.options(selectinload(Quote.items)).get_or_404(id)
     items = [{
         'id': item.id,
         'description': item.description,
@@ -541,6 +311,7 @@ def get_quote(id):
         'status': quote.status,
         'notes': quote.notes,
         'total': float(quote.total) if quote.total else 0.0,
+        'updated_at': iso_or_none(quote.updated_at),
         'items': items
     })
 
@@ -559,13 +330,7 @@ def create_quote():
         return jsonify({'error': 'Client not found'}), 404
 
     # Generate quote number (format: Q-YYYY-NNN)
-    year = datetime.now().year
-    last_quote = Quote.query.filter(Quote.quote_number.like(f'Q-{year}-%')).order_by(Quote.id.desc()).first()
-    if last_quote:
-        last_number = int(last_quote.quote_number.split('-')[-1])
-        quote_number = f'Q-{year}-{last_number + 1:03d}'
-    else:
-        quote_number = f'Q-{year}-001'
+    quote_number = DocumentSequence.next_number('Q')
 
     # Parse date_created and valid_until as date objects
     date_created = data.get('date_created')
@@ -705,292 +470,16 @@ def send_quote_api(id):
             return jsonify({'error': 'Client has no email address'}), 400
             
         # Create email content
-        subject = f'Your Quote #{quote.quote_number} from Aquaforce Pressure Washing'
-        custom_message = data.get('message', '')
+        subject, body = render_quote_email(quote, client, quote.items, data.get('message', ''))
         
-        # Professional HTML template matching invoice style
-        body = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Quote #{quote.quote_number}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
-                
-                body {{
-                    font-family: 'Inter', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #1a1a1a;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f8fafc;
-                }}
-                .container {{
-                    max-width: 650px;
-                    margin: 20px auto;
-                    padding: 0;
-                    background-color: #ffffff;
-                    border-radius: 12px;
-                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-                    overflow: hidden;
-                }}
-                .header {{
-                    text-align: center;
-                    padding: 30px 20px;
-                    background: white;
-                    color: #333;
-                    position: relative;
-                    margin-bottom: 10px;
-                }}
-                .header::after {{
-                    content: '';
-                    position: absolute;
-                    bottom: 0;
-                    left: 0;
-                    right: 0;
-                    height: 1px;
-                    background: #e2e8f0;
-                }}
-                .logo {{
-                    margin-bottom: 10px;
-                }}
-                .logo img {{
-                    max-width: 350px;
-                    height: auto;
-                }}
-                .quote-number {{
-                    font-size: 22px;
-                    font-weight: 600;
-                    padding: 6px 12px;
-                    display: inline-block;
-                    color: #2d3748;
-                }}
-                .subtitle {{
-                    font-size: 16px;
-                    opacity: 0.9;
-                    margin-bottom: 16px;
-                }}
-                .content {{
-                    padding: 40px;
-                }}
-                .greeting {{
-                    margin-bottom: 32px;
-                }}
-                .greeting p {{
-                    margin: 0 0 16px 0;
-                    font-size: 16px;
-                    color: #4b5563;
-                }}
-                .quote-summary {{
-                    background-color: #f0f9ff;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e0f2fe;
-                }}
-                .quote-summary strong {{
-                    display: block;
-                    font-size: 18px;
-                    color: #0f172a;
-                    margin-bottom: 16px;
-                }}
-                .quote-summary p {{
-                    margin: 8px 0;
-                    color: #475569;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: separate;
-                    border-spacing: 0;
-                    margin-bottom: 32px;
-                }}
-                th {{
-                    background-color: #f8fafc;
-                    color: #0f172a;
-                    text-align: left;
-                    padding: 16px;
-                    font-weight: 600;
-                    border-bottom: 2px solid #e2e8f0;
-                }}
-                td {{
-                    padding: 16px;
-                    border-bottom: 1px solid #e2e8f0;
-                    color: #475569;
-                }}
-                .total-row {{
-                    font-weight: 600;
-                    background-color: #f8fafc;
-                }}
-                .total-row td {{
-                    color: #0f172a;
-                    font-size: 16px;
-                }}
-                .notes {{
-                    background-color: #f8fafc;
-                    padding: 24px;
-                    border-radius: 8px;
-                    margin-bottom: 32px;
-                    border: 1px solid #e2e8f0;
-                }}
-                .notes strong {{
-                    display: block;
-                    font-size: 16px;
-                    color: #0f172a;
-                    margin-bottom: 12px;
-                }}
-                .notes p {{
-                    margin: 0;
-                    color: #475569;
-                }}
-                .footer {{
-                    text-align: center;
-                    padding: 32px 40px;
-                    background-color: #f8fafc;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .footer p {{
-                    margin: 8px 0;
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-                .contact-info {{
-                    margin-top: 16px;
-                    padding-top: 16px;
-                    border-top: 1px solid #e2e8f0;
-                }}
-                .contact-info p {{
-                    margin: 4px 0;
-                    color: #64748b;
-                }}
-                @media (max-width: 600px) {{
-                    .container {{
-                        margin: 0;
-                        border-radius: 0;
-                    }}
-                    .content {{
-                        padding: 24px;
-                    }}
-                    .header {{
-                        padding: 32px 16px;
-                    }}
-                    .logo {{
-                        font-size: 28px;
-                    }}
-                    table {{
-                        display: block;
-                        overflow-x: auto;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">
-                        <img src="cid:company_logo" alt="Aquaforce Pressure Washing">
-                    </div>
-                    <div class="quote-number">Quote #{quote.quote_number}</div>
-                </div>
-                
-                <div class="content">
-                    <div class="greeting">
-                        <p>Dear {client.name},</p>
-                        <p>{custom_message if custom_message else 'Thank you for your interest in our services. Please find your detailed quote below.'}</p>
-                    </div>
-                    
-                    <div class="quote-summary">
-                        <strong>Quote Summary</strong>
-                        <p>Date Created: {quote.date_created.strftime('%B %d, %Y') if hasattr(quote.date_created, 'strftime') else quote.date_created}</p>
-                        <p>Valid Until: {quote.valid_until.strftime('%B %d, %Y') if hasattr(quote.valid_until, 'strftime') else quote.valid_until}</p>
-                        <p>Total Amount: <strong>${float(quote.total):.2f}</strong></p>
-                    </div>
-                    
-                    <table>
-                        <tr>
-                            <th>Service Description</th>
-                            <th>Quantity</th>
-                            <th>Unit Price</th>
-                            <th>Total</th>
-                        </tr>
-        """
-        
-        # Add items to email
-        for item in quote.items:
-            body += f"""
-                        <tr>
-                            <td>{item.description}</td>
-                            <td>{float(item.quantity)}</td>
-                            <td>${float(item.unit_price):.2f}</td>
-                            <td>${float(item.line_total):.2f}</td>
-                        </tr>
-            """
-        
-        body += f"""
-                        <tr class="total-row">
-                            <td colspan="3" align="right">Total:</td>
-                            <td>${float(quote.total):.2f}</td>
-                        </tr>
-                    </table>
-        """
-                    
-        if quote.notes:
-            body += f"""
-                    <div class="notes">
-                        <strong>Notes:</strong>
-                        <p>{quote.notes}</p>
-                    </div>
-            """
-                    
-        body += """
-                    <p>If you have any questions about this quote, please don't hesitate to contact us.</p>
-                    <p>We look forward to working with you!</p>
-                    <p>Best regards,<br>Aquaforce Pressure Washing Team</p>
-                </div>
-                
-                <div class="footer">
-                    <div class="contact-info">
-                        <p><strong>Aquaforce Pressure Washing</strong></p>
-                        <p>Phone: (713) 725-4459</p>
-                        <p>Email: aquaforcepressurewashingsvc@gmail.com</p>
-                        <p>Website: www.aquaforcepressurewashing.com</p>
-                    </div>
-                    <p>© 2024 Aquaforce Pressure Washing. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Save email log
-        email_log = EmailLog(
-            client_id=client.id,
-            quote_id=quote.id,
-            email_type='quote',
-            subject=subject,
-            body=body,
-            recipient=client.email,
-            sent_at=datetime.utcnow()
-        )
-        
-        db.session.add(email_log)
+        # Queue for the outbox worker; nothing is sent inside the request
+        enqueue_email(client.email, subject, body, 'quote', client_id=client.id, quote_id=quote.id)
         
         # Update quote status
         quote.status = 'sent'
         
-        # Create and send the email
-        msg = Message(subject, recipients=[client.email])
-        msg.html = body
-        
-        # Attach the logo
-        with open('app/static/img/AFLOGO.png', 'rb') as fp:
-            msg.attach('AFLOGO.png', 'image/png', fp.read(), 'inline', headers=[('Content-ID', '<company_logo>')])
-        
-        mail.send(msg)
-        
         db.session.commit()
         
-        return jsonify({'message': 'Quote sent successfully!'})
+        return jsonify({'message': 'Quote queued for sending.'}), 202
     except Exception as e:
         return jsonify({'error': f'Error sending quote: {str(e)}'}), 500 
\ No newline at end of file
@@ -0,0 +1,109 @@
+from flask import Blueprint, jsonify, request, render_template, url_for
+from app import db
+from app.models import Client, Quote, Invoice
+from app.pagination import keyset_paginate
+from app.search import SEARCH_CANDIDATES, SEARCH_KINDS, global_matches, search_source, highlight_snippet
+from flask_login import login_required
+from sqlalchemy.orm import joinedload
+
+# Create two blueprints - one for API and one for web interface
+bp = Blueprint('search', __name__, url_prefix='/search')
+api_bp = Blueprint('search_api', __name__, url_prefix='/api/search')
+
+PER_PAGE = 20
+
+
+def run_search(args):
+    """Run the global search described by the request args.
+
+    Returns (query text, kind filter, pagination of raw hits, grouped results).
+    """
+    text = args.get('q', '').strip()
+    kind = args.get('type') if args.get('type') in SEARCH_KINDS else None
+
+    hits = global_matches(text, kind)
+    pagination = keyset_paginate(
+        db.session.query(hits), [hits.c.rank, hits.c.id],
+        after=args.get('after'), before=args.get('before'),
+        per_page=PER_PAGE, count_key=('search', text, kind))
+    return text, kind, pagination, group_hits(pagination.items)
+
+
+def group_hits(hits):
+    """Group a page of hits by the client, quote or invoice they belong to.
+
+    Groups keep the order of their best-ranked hit. The owning records are
+    loaded with one query per kind.
+    """
+    ref_ids = {kind: set() for kind in SEARCH_KINDS}
+    for hit in hits:
+        ref_ids[search_source(hit.id)[2]].add(hit.ref_id)
+
+    records = {'client': {}, 'quote': {}, 'invoice': {}}
+    if ref_ids['client']:
+        records['client'] = {c.id: c for c in Client.query.filter(Client.id.in_(ref_ids['client']))}
+    if ref_ids['quote']:
+        records['quote'] = {q.id: q for q in Quote.query.options(joinedload(Quote.client)).filter(
+            Quote.id.in_(ref_ids['quote']))}
+    if ref_ids['invoice']:
+        records['invoice'] = {i.id: i for i in Invoice.query.options(joinedload(Invoice.client)).filter(
+            Invoice.id.in_(ref_ids['invoice']))}
+
+    groups = {}
+    for hit in hits:
+        source, source_id, kind = search_source(hit.id)
+        record = records[kind].get(hit.ref_id)
+        if record is None:
+            continue
+        group = groups.get((kind, hit.ref_id))
+        if group is None:
+            if kind == 'client':
+                title, client, url = record.name, record, url_for('clients.view', id=record.id)
+            elif kind == 'quote':
+                title, client, url = record.quote_number, record.client, url_for('quotes.view', id=record.id)
+            else:
+                title, client, url = record.invoice_number, record.client, url_for('invoices.view', id=record.id)
+            group = groups[(kind, hit.ref_id)] = {
+                'type': kind,
+                'id': record.id,
+                'title': title,
+                'client': client,
+                'url': url,
+                'record': record,
+                'matches': []
+            }
+        group['matches'].append({'source': source, 'snippet': highlight_snippet(hit.snippet)})
+    return list(groups.values())
+
+
+@bp.route('/')
+@login_required
+def index():
+    """Search clients, quotes and invoices."""
+    text, kind, pagination, results = run_search(request.args)
+    return render_template('search/index.html', query=text, kind=kind, kinds=SEARCH_KINDS,
+                           results=results, pagination=pagination, candidates=SEARCH_CANDIDATES)
+
+
+# API Routes
+@api_bp.route('/', methods=['GET'])
+def search():
+    """Search clients, quotes and invoices."""
+    text, kind, pagination, results = run_search(request.args)
+    return jsonify({
+        'query': text,
+        'type': kind,
+        'results': [{
+            'type': result['type'],
+            'id': result['id'],
+            'title': result['title'],
+            'client_id': result['client'].id,
+            'client_name': result['client'].name,
+            'url': result['url'],
+            'matches': [{'source': match['source'], 'snippet': str(match['snippet'])}
+                        for match in result['matches']]
+        } for result in results],
+        'next_cursor': pagination.next_cursor,
+        'prev_cursor': pagination.prev_cursor,
+        'total': pagination.total
+    })
@@ -0,0 +1,281 @@
+import re
+from markupsafe import Markup, escape
+from app import db
+
+# Columns covered by the client full-text index
+CLIENT_SEARCH_COLUMNS = ['name', 'email', 'phone', 'address1', 'address2', 'city']
+
+# Relative bm25 weights, in CLIENT_SEARCH_COLUMNS order: a hit in the name
+# outranks one in the email, which outranks one in the address
+CLIENT_SEARCH_WEIGHTS = [10.0, 5.0, 3.0, 1.0, 1.0, 2.0]
+
+_columns = ', '.join(CLIENT_SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in CLIENT_SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in CLIENT_SEARCH_COLUMNS)
+
+# SQLite: an external-content FTS5 table over clients, kept in sync by triggers
+SQLITE_CLIENT_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5("
+    f"{_columns}, content='clients', content_rowid='id', tokenize='unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+    f"INSERT INTO clients_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+    f"INSERT INTO clients_fts(clients_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+    f"INSERT INTO clients_fts(clients_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO clients_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+SQLITE_CLIENT_SEARCH_DROP = [
+    "DROP TRIGGER IF EXISTS clients_fts_au",
+    "DROP TRIGGER IF EXISTS clients_fts_ad",
+    "DROP TRIGGER IF EXISTS clients_fts_ai",
+    "DROP TABLE IF EXISTS clients_fts",
+]
+SQLITE_CLIENT_SEARCH_REBUILD = "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')"
+
+# Postgres: a GIN index over the same tsvector expression the queries use
+_client_document = " || ' ' || ".join(f"coalesce({column}, '')" for column in CLIENT_SEARCH_COLUMNS)
+CLIENT_TSVECTOR = f"to_tsvector('simple', {_client_document})"
+POSTGRES_CLIENT_SEARCH_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_clients_search ON clients USING GIN ({CLIENT_TSVECTOR})",
+]
+POSTGRES_CLIENT_SEARCH_DROP = ["DROP INDEX IF EXISTS ix_clients_search"]
+
+
+def search_terms(text):
+    """Split user input into the word tokens the full-text indexes store"""
+    return re.findall(r'\w+', text.lower())
+
+
+def client_matches(text):
+    """Return a (id, rank) subquery of clients matching every word of `text` as a prefix.
+
+    Lower rank means a better match on every backend, so callers can
+    order ascending by (rank, id).
+    """
+    terms = search_terms(text)
+    dialect = db.engine.dialect.name
+
+    if not terms:
+        statement = db.text('SELECT id, 0.0 AS rank FROM clients WHERE 1 = 0')
+    elif dialect == 'sqlite':
+        weights = ', '.join(str(weight) for weight in CLIENT_SEARCH_WEIGHTS)
+        statement = db.text(
+            f'SELECT rowid AS id, bm25(clients_fts, {weights}) AS rank '
+            'FROM clients_fts WHERE clients_fts MATCH :query'
+        ).bindparams(query=' '.join(f'"{term}"*' for term in terms))
+    elif dialect == 'postgresql':
+        statement = db.text(
+            f"SELECT id, -ts_rank({CLIENT_TSVECTOR}, to_tsquery('simple', :query)) AS rank "
+            f"FROM clients WHERE {CLIENT_TSVECTOR} @@ to_tsquery('simple', :query)"
+        ).bindparams(query=' & '.join(f'{term}:*' for term in terms))
+    else:
+        # No full-text support: plain substring match on the name
+        statement = db.text(
+            'SELECT id, 0.0 AS rank FROM clients WHERE lower(name) LIKE :query'
+        ).bindparams(query=f'%{text.lower()}%')
+
+    return statement.columns(id=db.Integer, rank=db.Float).subquery('client_matches')
+
+
+# Global search: one FTS5 table over client names, document numbers, notes
+# and line items. Each source row gets a deterministic rowid (id * 8 + code)
+# so triggers can find and replace it without scanning; ref_id points at the
+# client, quote or invoice the hit belongs to.
+SEARCH_SOURCES = {
+    1: ('clients', 'client', 'id', {'name': 'name'}),
+    2: ('quotes', 'quote', 'id', {'number': 'quote_number', 'notes': 'notes'}),
+    3: ('quote_items', 'quote', 'quote_id', {'description': 'description'}),
+    4: ('invoices', 'invoice', 'id', {'number': 'invoice_number', 'notes': 'notes'}),
+    5: ('invoice_items', 'invoice', 'invoice_id', {'description': 'description'}),
+}
+SEARCH_SOURCE_STRIDE = 8
+SEARCH_KINDS = ['client', 'quote', 'invoice']
+
+# Columns of the index and their bm25 weights: a document number hit
+# outranks a client name, which outranks a line item or a note
+SEARCH_INDEX_COLUMNS = ['number', 'name', 'description', 'notes']
+SEARCH_INDEX_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+
+# Marks a highlighted term in snippets; swapped for <mark> after escaping
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'
+
+
+def _search_index_row(code, prefix):
+    """(columns, values) of the search_index row for a source table row"""
+    table, kind, ref_column, fields = SEARCH_SOURCES[code]
+    columns = ['rowid', 'ref_id'] + list(fields)
+    values = [f'{prefix}id * {SEARCH_SOURCE_STRIDE} + {code}', f'{prefix}{ref_column}']
+    values += [f'{prefix}{column}' for column in fields.values()]
+    return ', '.join(columns), ', '.join(values)
+
+
+def _search_source_triggers(code):
+    table, kind, ref_column, fields = SEARCH_SOURCES[code]
+    columns, new_values = _search_index_row(code, 'new.')
+    watched = ', '.join(sorted({ref_column, *fields.values()} - {'id'}))
+    delete_old = f'DELETE FROM search_index WHERE rowid = old.id * {SEARCH_SOURCE_STRIDE} + {code};'
+    insert_new = f'INSERT INTO search_index({columns}) VALUES ({new_values});'
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {delete_old} END',
+        # Only re-index when an indexed column changes, not on every status or balance update
+        f'CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {watched} ON {table} '
+        f'BEGIN {delete_old} {insert_new} END',
+    ]
+
+
+# prefix='2 3 4' keeps short prefix queries ("dr", "inv", "wash") from merging the
+# doclists of every term they expand to
+SQLITE_SEARCH_INDEX_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    f"{', '.join(SEARCH_INDEX_COLUMNS)}, ref_id UNINDEXED, tokenize='unicode61', prefix='2 3 4')"
+)
+SQLITE_GLOBAL_SEARCH_DDL = [SQLITE_SEARCH_INDEX_TABLE] + [
+    statement for code in SEARCH_SOURCES for statement in _search_source_triggers(code)
+]
+SQLITE_GLOBAL_SEARCH_DROP = [
+    f'DROP TRIGGER IF EXISTS {table}_search_{suffix}'
+    for table, _, _, _ in SEARCH_SOURCES.values() for suffix in ('au', 'ad', 'ai')
+] + ['DROP TABLE IF EXISTS search_index']
+SQLITE_GLOBAL_SEARCH_REBUILD = ['DELETE FROM search_index'] + [
+    'INSERT INTO search_index({0}) SELECT {1} FROM {2}'.format(*_search_index_row(code, ''), SEARCH_SOURCES[code][0])
+    for code in SEARCH_SOURCES
+]
+
+# Postgres: a GIN index per source table over a tsvector weighted like the bm25
+# columns (number A, name B, description C, notes D)
+SEARCH_WEIGHT_LABELS = dict(zip(SEARCH_INDEX_COLUMNS, 'ABCD'))
+# ts_rank weights for labels D, C, B, A, in the same proportions as SEARCH_INDEX_WEIGHTS
+SEARCH_TS_RANK_WEIGHTS = '{%s}' % ', '.join(
+    str(weight / max(SEARCH_INDEX_WEIGHTS)) for weight in reversed(SEARCH_INDEX_WEIGHTS))
+
+
+def _search_tsvector(code, prefix=''):
+    fields = SEARCH_SOURCES[code][3]
+    return ' || '.join(
+        f"setweight(to_tsvector('simple', coalesce({prefix}{column}, '')), '{SEARCH_WEIGHT_LABELS[field]}')"
+        for field, column in fields.items()
+    )
+
+
+POSTGRES_GLOBAL_SEARCH_DDL = [
+    f'CREATE INDEX IF NOT EXISTS ix_{table}_global_search ON {table} USING GIN (({_search_tsvector(code)}))'
+    for code, (table, _, _, _) in SEARCH_SOURCES.items()
+]
+POSTGRES_GLOBAL_SEARCH_DROP = [
+    f'DROP INDEX IF EXISTS ix_{table}_global_search' for table, _, _, _ in SEARCH_SOURCES.values()
+]
+
+# Only the newest matches are ranked, so a common word ("driveway", "wash") costs the
+# same however many line items contain it; a search for a rarer term ranks every match
+SEARCH_CANDIDATES = 500
+
+
+def search_source(hit_id):
+    """Split a search hit id into (source table, source row id, kind)"""
+    code = hit_id % SEARCH_SOURCE_STRIDE
+    table, kind, _, _ = SEARCH_SOURCES[code]
+    return table, hit_id // SEARCH_SOURCE_STRIDE, kind
+
+
+def global_matches(text, kind=None):
+    """Return an (id, ref_id, rank, snippet) subquery of search hits for `text`.
+
+    `id` encodes the source row (see search_source) and `ref_id` is the
+    client, quote or invoice it belongs to. Lower rank is better. Pass
+    `kind` to keep only hits belonging to one of SEARCH_KINDS.
+
+    Only the SEARCH_CANDIDATES newest matches are ranked (on Postgres, the
+    newest of each source table), so scoring never touches every row a
+    common word matches.
+    """
+    terms = search_terms(text)
+    codes = [code for code, source in SEARCH_SOURCES.items() if kind in (None, source[1])]
+    dialect = db.engine.dialect.name
+
+    if not terms or not codes:
+        statement = db.text("SELECT 0 AS id, 0 AS ref_id, 0.0 AS rank, '' AS snippet WHERE 1 = 0")
+    elif dialect == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SEARCH_INDEX_WEIGHTS)
+        # FTS5 walks rowids newest first and stops at the limit; bm25 and snippet run on those rows only
+        statement = db.text(
+            f"SELECT rowid AS id, ref_id, bm25(search_index, {weights}) AS rank, "
+            f"snippet(search_index, -1, char(2), char(3), '…', 12) AS snippet "
+            f"FROM search_index WHERE search_index MATCH :query "
+            f"AND rowid % {SEARCH_SOURCE_STRIDE} IN ({', '.join(map(str, codes))}) "
+            f"ORDER BY rowid DESC LIMIT :candidates"
+        ).bindparams(query=' '.join(f'"{term}"*' for term in terms), candidates=SEARCH_CANDIDATES)
+    elif dialect == 'postgresql':
+        selects = []
+        for code in codes:
+            table, _, ref_column, fields = SEARCH_SOURCES[code]
+            document = " || ' ' || ".join(f"coalesce(c.{column}, '')" for column in fields.values())
+            selects.append(
+                f"SELECT c.id * {SEARCH_SOURCE_STRIDE} + {code} AS id, c.{ref_column} AS ref_id, "
+                f"-ts_rank('{SEARCH_TS_RANK_WEIGHTS}', {_search_tsvector(code, 'c.')}, q.query) AS rank, "
+                f"ts_headline('simple', {document}, q.query, "
+                f"'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=12, MinWords=4') AS snippet "
+                f"FROM (SELECT * FROM {table} WHERE ({_search_tsvector(code)}) @@ to_tsquery('simple', :query) "
+                f"ORDER BY id DESC LIMIT :candidates) AS c, to_tsquery('simple', :query) AS q(query)"
+            )
+        statement = db.text(' UNION ALL '.join(selects)).bindparams(
+            query=' & '.join(f'{term}:*' for term in terms), candidates=SEARCH_CANDIDATES)
+    else:
+        # No full-text support: substring match on each source, unranked
+        selects = []
+        for code in codes:
+            table, _, ref_column, fields = SEARCH_SOURCES[code]
+            document = " || ' ' || ".join(f"coalesce({column}, '')" for column in fields.values())
+            selects.append(
+                f'SELECT id * {SEARCH_SOURCE_STRIDE} + {code} AS id, {ref_column} AS ref_id, '
+                f'0.0 AS rank, {document} AS snippet FROM {table} WHERE lower({document}) LIKE :query'
+            )
+        statement = db.text(' UNION ALL '.join(selects)).bindparams(query=f'%{text.lower()}%')
+
+    return statement.columns(
+        id=db.Integer, ref_id=db.Integer, rank=db.Float, snippet=db.Text
+    ).subquery('search_hits')
+
+
+def field_matches(text, kind, field):
+    """Return an `id` subquery of the `kind` records whose own `field` matches every word of `text` as a prefix.
+
+    `field` is one of SEARCH_INDEX_COLUMNS held on the kind's own table, such
+    as a quote's number or a client's name. Words match anywhere in the
+    field, so "001" finds Q-2025-001. Unlike global_matches the result is
+    neither ranked nor capped, for filtering a list.
+    """
+    code = next(code for code, (_, source_kind, ref_column, fields) in SEARCH_SOURCES.items()
+                if source_kind == kind and ref_column == 'id' and field in fields)
+    table, _, _, fields = SEARCH_SOURCES[code]
+    terms = search_terms(text)
+    dialect = db.engine.dialect.name
+    # Named per subquery, so a list can filter on several of these at once
+    name = f'{kind}_{field}_matches'
+
+    if not terms:
+        statement = db.text(f'SELECT id FROM {table} WHERE 1 = 0')
+    elif dialect == 'sqlite':
+        prefixes = ' '.join(f'"{term}"*' for term in terms)
+        statement = db.text(
+            f'SELECT ref_id AS id FROM search_index WHERE search_index MATCH :{name} '
+            f'AND rowid % {SEARCH_SOURCE_STRIDE} = {code}'
+        ).bindparams(**{name: f'{field} : ({prefixes})'})
+    elif dialect == 'postgresql':
+        # Weight-restricted prefixes, so the source table's GIN index answers it
+        label = SEARCH_WEIGHT_LABELS[field]
+        statement = db.text(
+            f"SELECT id FROM {table} WHERE ({_search_tsvector(code)}) @@ to_tsquery('simple', :{name})"
+        ).bindparams(**{name: ' & '.join(f'{term}:*{label}' for term in terms)})
+    else:
+        statement = db.text(
+            f'SELECT id FROM {table} WHERE lower({fields[field]}) LIKE :{name}'
+        ).bindparams(**{name: f'%{text.lower()}%'})
+
+    return statement.columns(id=db.Integer).subquery(name)
+
+
+def highlight_snippet(snippet):
+    """HTML-escape a snippet and wrap the matched terms in <mark>"""
+    return escape(snippet or '').replace(SNIPPET_START, Markup('<mark>')).replace(SNIPPET_END, Markup('</mark>'))
@@ -0,0 +1,332 @@
+import random
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from app import db
+from app.email_bodies import compress_body, shell_id
+from app.money import Money
+from app.models import (
+    Client, DocumentSequence, EmailBodyShell, EmailLog, Invoice, InvoiceItem, Payment, Quote, QuoteItem, Service
+)
+from app.search import (
+    SQLITE_CLIENT_SEARCH_DDL, SQLITE_CLIENT_SEARCH_DROP, SQLITE_CLIENT_SEARCH_REBUILD,
+    SQLITE_GLOBAL_SEARCH_DDL, SQLITE_GLOBAL_SEARCH_DROP, SQLITE_GLOBAL_SEARCH_REBUILD
+)
+
+# Rows per executemany INSERT
+SEED_CHUNK_SIZE = 10000
+
+FIRST_NAMES = ['James', 'Maria', 'Robert', 'Linda', 'Michael', 'Patricia', 'David', 'Jennifer', 'Carlos', 'Susan',
+               'Daniel', 'Karen', 'Jose', 'Nancy', 'Thomas', 'Lisa', 'Kevin', 'Angela', 'Brian', 'Sandra']
+LAST_NAMES = ['Smith', 'Johnson', 'Garcia', 'Brown', 'Davis', 'Martinez', 'Miller', 'Wilson', 'Anderson', 'Lopez',
+              'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Clark']
+BUSINESS_SUFFIXES = ['Properties', 'Realty', 'Holdings', 'Apartments', 'HOA', 'Restaurant Group']
+CITIES = [('Houston', '770'), ('Katy', '774'), ('Sugar Land', '774'), ('Pearland', '775'), ('The Woodlands', '773'),
+          ('Cypress', '774'), ('Spring', '773'), ('Pasadena', '775'), ('League City', '775'), ('Conroe', '773')]
+STREETS = ['Main St', 'Oak Dr', 'Cypress Creek Pkwy', 'Westheimer Rd', 'Memorial Dr', 'Bellaire Blvd', 'Elm St']
+# (description, rate in cents, relative frequency)
+SERVICES = [
+    ('Driveway cleaning', 15000, 30), ('House soft wash', 35000, 20), ('Roof soft wash', 45000, 8),
+    ('Deck cleaning and brightening', 22500, 10), ('Fence washing', 17500, 10), ('Patio cleaning', 12500, 15),
+    ('Gutter cleaning', 14000, 12), ('Window washing', 9500, 10), ('Concrete sealing', 30000, 5),
+    ('Graffiti removal', 20000, 3), ('Dumpster pad degreasing', 18000, 4), ('Sidewalk cleaning', 8500, 12),
+]
+QUOTE_STATUSES = (['draft', 'sent', 'accepted', 'rejected', 'expired'], [15, 25, 45, 10, 5])
+PAYMENT_METHODS = (['Credit Card', 'Check', 'Cash', 'Bank Transfer'], [50, 25, 10, 15])
+# Share of invoices that get paid in full, paid in part, or nothing yet
+PAYMENT_STATES = (['paid', 'partial', 'unpaid'], [60, 20, 20])
+
+EMAIL_BODY_TEMPLATE = (
+    '<!DOCTYPE html><html><head><meta charset="UTF-8"><title>{subject}</title></head>'
+    '<body style="font-family:Arial,sans-serif;color:#333;background:#f9f9f9">'
+    '<div style="max-width:600px;margin:0 auto;background:#fff;padding:20px">'
+    '<div style="text-align:center;background:#0c4da2;color:#fff;padding:20px">'
+    '<img src="cid:company_logo" alt="Aquaforce Pressure Washing" width="350"></div>'
+    '<p>Dear {name},</p><p>Please find your {kind} {number} below.</p>'
+    '<table style="width:100%;border-collapse:collapse">{rows}</table>'
+    '<p style="text-align:right;font-weight:bold">Total: ${total}</p>'
+    '<p>Thank you for choosing Aquaforce Pressure Washing!</p>'
+    '<div style="text-align:center;font-size:12px;color:#666">Aquaforce Pressure Washing | (555) 123-4567</div>'
+    '</div></body></html>'
+)
+
+
+def _split(cents, parts, rng):
+    """Split an amount into `parts` positive whole-cent amounts that add up to it"""
+    parts = max(1, min(parts, cents))
+    cuts = sorted(rng.sample(range(1, cents), parts - 1)) if parts > 1 else []
+    return [b - a for a, b in zip([0] + cuts, cuts + [cents])]
+
+
+# Every model the seed writes, each after the ones its foreign keys point to
+SEED_ORDER = [Service, Client, Quote, QuoteItem, Invoice, InvoiceItem, Payment, EmailBodyShell, EmailLog]
+
+
+class _ChunkedWriter:
+    """Buffers rows per model and writes each buffer with one executemany INSERT once it is full.
+
+    Buffers are written in SEED_ORDER, and a full buffer first writes out
+    those of the models before it, so as long as every row is added after
+    the rows it references, no INSERT runs ahead of its parents.
+    """
+
+    def __init__(self, chunk_size, progress=None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.buffers = {model: [] for model in SEED_ORDER}
+        self.counts = Counter()
+
+    def add(self, model, row):
+        buffer = self.buffers[model]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        """Write the buffers of `model` and every model before it, or of all models"""
+        last = SEED_ORDER.index(model) if model else len(SEED_ORDER) - 1
+        for model in SEED_ORDER[:last + 1]:
+            rows = self.buffers[model]
+            if rows:
+                db.session.execute(db.insert(model), rows)
+                self.counts[model.__tablename__] += len(rows)
+                if self.progress:
+                    self.progress(model.__tablename__, len(rows))
+                self.buffers[model] = []
+
+
+def _next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def _reset_sequences(models):
+    """Move Postgres id sequences past ids the seed set explicitly, so later INSERTs don't collide"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        ))
+
+
+def _allocate_numbers(prefix, dates):
+    """One document number per date, numbered within each year through DocumentSequence"""
+    next_value = {}
+    for year, count in Counter(day.year for day in dates).items():
+        next_value[year] = DocumentSequence.allocate(prefix, count=count, year=year) - count + 1
+    numbers = []
+    for day in dates:
+        numbers.append(DocumentSequence.format_number(prefix, day.year, next_value[day.year]))
+        next_value[day.year] += 1
+    return numbers
+
+
+def _search_indexes():
+    """The SQLite full-text indexes that exist, as (ddl, drop, rebuild) statement lists"""
+    if db.engine.dialect.name != 'sqlite':
+        return []
+    tables = set(db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+    indexes = []
+    if 'clients_fts' in tables:
+        indexes.append((SQLITE_CLIENT_SEARCH_DDL, SQLITE_CLIENT_SEARCH_DROP, [SQLITE_CLIENT_SEARCH_REBUILD]))
+    if 'search_index' in tables:
+        indexes.append((SQLITE_GLOBAL_SEARCH_DDL, SQLITE_GLOBAL_SEARCH_DROP, SQLITE_GLOBAL_SEARCH_REBUILD))
+    return indexes
+
+
+def seed_database(clients=1000, quotes=None, items_per_document=3, payments=None, emails=None, years=3,
+                  seed=1, chunk_size=SEED_CHUNK_SIZE, progress=None):
+    """Add a synthetic but realistic dataset and return the number of rows added per table.
+
+    The same arguments always produce the same rows. Quotes default to
+    five per client, payments and emails to ten per client. Dates lean
+    towards the present, accepted quotes become invoices with the same
+    line items, and invoices are paid in full, in instalments or not
+    at all, so balances and statuses look like production. Rows go in
+    with executemany INSERTs of `chunk_size` rows; SQLite search
+    triggers are dropped for the load and the indexes rebuilt once at
+    the end. `progress(table, rows)` is called after each INSERT.
+    """
+    rng = random.Random(seed)
+    quotes = clients * 5 if quotes is None else quotes
+    payments = clients * 10 if payments is None else payments
+    emails = clients * 10 if emails is None else emails
+    today = date.today()
+    now = datetime.utcnow()
+    span = years * 365
+
+    search_indexes = _search_indexes()
+    for _, drop, _ in search_indexes:
+        for statement in drop:
+            db.session.execute(db.text(statement))
+
+    writer = _ChunkedWriter(chunk_size, progress)
+    if not db.session.query(Service.id).first():
+        for name, rate, _ in SERVICES:
+            writer.add(Service, {'name': name, 'description': f'{name} (per visit)', 'default_rate': Money(rate)})
+
+    # Clients
+    first_client = _next_id(Client)
+    client_names = {}
+    for client_id in range(first_client, first_client + clients):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, zip_prefix = rng.choice(CITIES)
+        name = f'{last} {rng.choice(BUSINESS_SUFFIXES)}' if rng.random() < 0.15 else f'{first} {last}'
+        client_names[client_id] = (name, f'{first}.{last}{client_id}@example.com'.lower())
+        created = now - timedelta(days=rng.triangular(0, span, span * 0.3))
+        writer.add(Client, {
+            'id': client_id, 'name': name, 'email': client_names[client_id][1],
+            'phone': f'(281) 555-{client_id % 10000:04d}', 'address1': f'{rng.randint(100, 9999)} {rng.choice(STREETS)}',
+            'address2': f'Suite {rng.randint(100, 400)}' if rng.random() < 0.1 else None, 'city': city,
+            'state': 'TX', 'zip_code': f'{zip_prefix}{rng.randint(0, 99):02d}', 'created_at': created,
+            'updated_at': created,
+        })
+
+    # Quotes, their items, and an invoice with the same items for every accepted quote
+    descriptions = [(name, rate) for name, rate, _ in SERVICES]
+    weights = [weight for _, _, weight in SERVICES]
+    quote_dates = sorted(today - timedelta(days=int(rng.triangular(0, span, 0))) for _ in range(quotes))
+    quote_numbers = _allocate_numbers('Q', quote_dates)
+    quote_statuses = rng.choices(*QUOTE_STATUSES, k=quotes)
+    quote_id = _next_id(Quote)
+    accepted = []  # (quote_id, client_id, created, lines)
+    client_documents = {}  # client_id -> [(email type, document id, number, total in cents)] that were emailed
+    for created, number, status in zip(quote_dates, quote_numbers, quote_statuses):
+        client_id = rng.randrange(first_client, first_client + clients)
+        if status in ('draft', 'sent') and (today - created).days > 30:
+            status = 'expired'
+        lines = []
+        for description, rate in rng.choices(descriptions, weights, k=rng.randint(1, 2 * items_per_document - 1)):
+            quantity = rng.choice([1, 1, 1, 2, 3])
+            price = int(rate * rng.uniform(0.8, 1.3)) // 100 * 100
+            lines.append((description, quantity, price))
+        total = sum(quantity * price for _, quantity, price in lines)
+        writer.add(Quote, {
+            'id': quote_id, 'client_id': client_id, 'quote_number': number, 'date_created': created,
+            'valid_until': created + timedelta(days=30), 'status': status, 'notes': lines[0][0],
+            'total': Money(total), 'updated_at': datetime.combine(created, datetime.min.time()),
+        })
+        for description, quantity, price in lines:
+            writer.add(QuoteItem, {'quote_id': quote_id, 'description': description, 'quantity': quantity,
+                                   'unit_price': Money(price), 'line_total': Money(quantity * price)})
+        if status == 'accepted':
+            accepted.append((quote_id, client_id, created, lines))
+        if status != 'draft':
+            client_documents.setdefault(client_id, []).append(('quote', quote_id, number, total))
+        quote_id += 1
+
+    invoice_dates = [min(created + timedelta(days=rng.randint(0, 14)), today) for _, _, created, _ in accepted]
+    invoice_numbers = _allocate_numbers('INV', invoice_dates)
+    payment_states = rng.choices(*PAYMENT_STATES, k=len(accepted))
+    paying = sum(state != 'unpaid' for state in payment_states) or 1
+    payments_each = payments / paying
+    invoice_id = _next_id(Invoice)
+    for (quote_id, client_id, _, lines), issued, number, state in zip(
+            accepted, invoice_dates, invoice_numbers, payment_states):
+        total = sum(quantity * price for _, quantity, price in lines)
+        due = issued + timedelta(days=30)
+        invoice_payments = []
+        if state != 'unpaid' and total:
+            count = int(payments_each) + (rng.random() < payments_each % 1)
+            amount = total if state == 'paid' else int(total * rng.uniform(0.2, 0.8))
+            paid_on = issued
+            for part in _split(amount, count, rng) if amount else []:
+                paid_on = min(paid_on + timedelta(days=rng.randint(0, 20)), today)
+                invoice_payments.append({
+                    'invoice_id': invoice_id, 'amount': Money(part), 'date': paid_on,
+                    'method': rng.choices(*PAYMENT_METHODS)[0], 'reference': f'REF-{rng.randint(10000, 99999)}',
+                    'notes': '', 'updated_at': datetime.combine(paid_on, datetime.min.time()),
+                })
+        paid = sum(payment['amount'].cents for payment in invoice_payments)
+        if paid >= total:
+            status = 'paid'
+        elif (today - issued).days < 3 and rng.random() < 0.5:
+            status = 'draft'
+        else:
+            status = 'overdue' if due < today else 'sent'
+        writer.add(Invoice, {
+            'id': invoice_id, 'client_id': client_id, 'quote_id': quote_id, 'invoice_number': number,
+            'date_issued': issued, 'due_date': due, 'status': status, 'notes': lines[0][0],
+            'total': Money(total), 'amount_paid': Money(paid), 'balance': Money(total - paid),
+            'updated_at': datetime.combine(issued, datetime.min.time()),
+        })
+        for description, quantity, price in lines:
+            writer.add(InvoiceItem, {'invoice_id': invoice_id, 'description': description, 'quantity': quantity,
+                                     'unit_price': Money(price), 'line_total': Money(quantity * price)})
+        for payment in invoice_payments:
+            writer.add(Payment, payment)
+        client_documents.setdefault(client_id, []).append(('invoice', invoice_id, number, total))
+        invoice_id += 1
+
+    # Email history, compressed against one shared shell like app.email_bodies.store_body does
+    shell_html = EMAIL_BODY_TEMPLATE.format(subject='', name='', kind='invoice', number='', rows='', total='')
+    body_shell_id = shell_id(shell_html)
+    if db.session.get(EmailBodyShell, body_shell_id) is None:
+        writer.add(EmailBodyShell, {'id': body_shell_id, 'email_type': 'invoice', 'created_at': now,
+                                    'data': zlib.compress(shell_html.encode('utf-8'), 9)})
+    client_ids = list(client_documents)
+    for _ in range(emails if client_ids else 0):
+        client_id = rng.choice(client_ids)
+        email_type, document_id, number, total = rng.choice(client_documents[client_id])
+        name, recipient = client_names[client_id]
+        subject = f'{email_type.title()} {number} from Aquaforce Pressure Washing'
+        body = EMAIL_BODY_TEMPLATE.format(
+            subject=subject, name=name, kind=email_type, number=number, total=f'{total / 100:,.2f}',
+            rows=f'<tr><td>{number}</td><td style="text-align:right">${total / 100:,.2f}</td></tr>'
+        )
+        created = now - timedelta(days=rng.triangular(0, span, 0))
+        failed = rng.random() < 0.03
+        writer.add(EmailLog, {
+            'client_id': client_id, 'quote_id': document_id if email_type == 'quote' else None,
+            'invoice_id': document_id if email_type == 'invoice' else None, 'email_type': email_type,
+            'subject': subject, 'body_shell_id': body_shell_id, 'body_data': compress_body(body, shell_html),
+            'recipient': recipient, 'created_at': created,
+            'sent_at': None if failed else created, 'status': 'failed' if failed else 'sent',
+            'attempts': 5 if failed else 1, 'next_attempt_at': None,
+            'last_error': 'SMTPRecipientsRefused: mailbox unavailable' if failed else None,
+        })
+
+    writer.flush()
+    _reset_sequences([Client, Quote, Invoice])
+    for ddl, _, rebuild in search_indexes:
+        for statement in ddl + rebuild:
+            db.session.execute(db.text(statement))
+    db.session.commit()
+    return dict(writer.counts)
+
+
+@click.command('seed')
+@click.option('--clients', type=int, default=1000, show_default=True, help='Clients to add.')
+@click.option('--quotes', type=int, default=None, help='Quotes to add [default: 5 per client].')
+@click.option('--items-per-document', type=int, default=3, show_default=True,
+              help='Average line items per quote; invoices copy their quote\'s items.')
+@click.option('--payments', type=int, default=None, help='Payments to add, roughly [default: 10 per client].')
+@click.option('--emails', type=int, default=None, help='Email log entries to add [default: 10 per client].')
+@click.option('--years', type=int, default=3, show_default=True, help='How far back the history goes.')
+@click.option('--seed', 'random_seed', type=int, default=1, show_default=True, help='Random seed.')
+@click.option('--chunk-size', type=int, default=SEED_CHUNK_SIZE, show_default=True, help='Rows per INSERT.')
+@click.option('--reset', is_flag=True, help='Drop and recreate every table first.')
+@with_appcontext
+def seed_command(clients, quotes, items_per_document, payments, emails, years, random_seed, chunk_size, reset):
+    """Fill the database with synthetic clients, quotes, invoices, payments and emails for load testing."""
+    if clients < 1:
+        raise click.BadParameter('must be at least 1', param_hint='--clients')
+    if reset:
+        click.confirm(f'Drop every table in {db.engine.url}?', abort=True)
+        db.drop_all()
+        db.create_all()
+    if db.engine.dialect.name == 'sqlite':
+        # A throwaway load: don't wait for the disk after every chunk
+        db.session.execute(db.text('PRAGMA synchronous = OFF'))
+    started = time.perf_counter()
+    counts = seed_database(clients, quotes, items_per_document, payments, emails, years, random_seed, chunk_size)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        click.echo(f'{table:<20} {count:>10,}')
+    total = sum(counts.values())
+    click.echo(f'{total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)')
@@ -0,0 +1,122 @@
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from app import mail
+
+
+def is_disconnect(error):
+    """True if an error means the SMTP session itself is gone, not that one message was refused"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError, so rule out protocol replies explicitly
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPPool:
+    """Keeps authenticated Flask-Mail connections open between sends.
+
+    Opening a connection costs a TCP connect, STARTTLS and AUTH, which
+    dwarfs sending one message. The pool hands out connections made by
+    `mail.connect()`, takes them back after use and reuses the most
+    recently used one first. A connection idle for longer than
+    MAIL_POOL_CHECK_IDLE seconds is checked with NOOP before reuse, one
+    idle for longer than MAIL_POOL_MAX_IDLE is closed, and a send that
+    fails because the session dropped is retried once on a fresh
+    connection.
+    """
+
+    def __init__(self, size=2, max_idle=60, check_idle=10):
+        self.size = size
+        self.max_idle = max_idle
+        self.check_idle = check_idle
+        self._idle = []  # [(connection, last_used)], most recent last
+        self._lock = threading.Lock()
+
+    def _open(self):
+        connection = mail.connect()
+        connection.__enter__()
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            # Already dead; nothing left to close cleanly
+            pass
+
+    @staticmethod
+    def _alive(connection):
+        if connection.host is None:
+            return True
+        try:
+            return connection.host.noop()[0] == 250
+        except OSError:
+            return False
+
+    def acquire(self):
+        """Take a live connection from the pool, opening one if none is idle"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.max_idle or (idle_for > self.check_idle and not self._alive(connection)):
+                self._close(connection)
+                continue
+            return connection
+        return self._open()
+
+    def release(self, connection, broken=False):
+        """Return a connection to the pool, or close it if broken or the pool is full"""
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append((connection, time.monotonic()))
+                    return
+        self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for several sends"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException as e:
+            self.release(connection, broken=is_disconnect(e))
+            raise
+        self.release(connection)
+
+    def send(self, message):
+        """Send one message on a pooled connection, reconnecting once if the session dropped"""
+        try:
+            with self.connection() as connection:
+                connection.send(message)
+        except Exception as e:
+            if not is_disconnect(e):
+                raise
+            with self.connection() as connection:
+                connection.send(message)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+def get_pool():
+    """The SMTP pool of the current app, created on first use"""
+    pool = current_app.extensions.get('smtp_pool')
+    if pool is None:
+        pool = current_app.extensions['smtp_pool'] = SMTPPool(
+            size=current_app.config.get('MAIL_POOL_SIZE', 2),
+            max_idle=current_app.config.get('MAIL_POOL_MAX_IDLE', 60),
+            check_idle=current_app.config.get('MAIL_POOL_CHECK_IDLE', 10)
+        )
+    return pool
@@ -0,0 +1,38 @@
+from datetime import datetime
+from app import db
+from app.models import Client, Quote, Invoice, Payment
+
+
+def dashboard_stats():
+    """Get the dashboard statistics from a single aggregate query.
+
+    Every figure is computed by the database, so the number of statements
+    stays the same no matter how many invoices or payments exist. The sums
+    are exact integer sums of cents and come back as Money.
+    """
+    month_start = datetime.now().date().replace(day=1)
+
+    total_clients = db.select(db.func.count(Client.id)).scalar_subquery()
+    active_quotes = db.select(db.func.count(Quote.id)).where(
+        Quote.status.in_(['draft', 'sent'])
+    ).scalar_subquery()
+    outstanding_amount = db.select(
+        db.func.coalesce(db.func.sum(Invoice.balance), 0)
+    ).where(Invoice.balance > 0).scalar_subquery()
+    monthly_revenue = db.select(
+        db.func.coalesce(db.func.sum(Payment.amount), 0)
+    ).where(Payment.date >= month_start).scalar_subquery()
+
+    row = db.session.execute(db.select(
+        total_clients.label('total_clients'),
+        active_quotes.label('active_quotes'),
+        outstanding_amount.label('outstanding_amount'),
+        monthly_revenue.label('monthly_revenue')
+    )).one()
+
+    return {
+        'total_clients': row.total_clients,
+        'active_quotes': row.active_quotes,
+        'outstanding_amount': row.outstanding_amount,
+        'monthly_revenue': row.monthly_revenue
+    }
@@ -11,10 +11,42 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = False  # Temporarily disable CSRF for debugging
     
+    # Seconds to reuse a list page's row count; 0 disables totals entirely
+    PAGINATION_COUNT_TTL = int(os.environ.get('PAGINATION_COUNT_TTL', '60'))
+    
     # Flask-Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.googlemail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', '587'))
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
-    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') 
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') 
+    
+    # SMTP connection pool (app/smtp_pool.py)
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', '2'))
+    MAIL_POOL_MAX_IDLE = 60  # seconds before an idle connection is closed instead of reused
+    MAIL_POOL_CHECK_IDLE = 10  # seconds of idleness after which a connection is NOOP-checked
+    
+    # Outbound email queue, drained by `flask outbox work`
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '20'))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '5'))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))
+    OUTBOX_RETRY_BACKOFF = 60  # seconds before the first retry, doubling after each failure
+    OUTBOX_MAX_BACKOFF = 3600
+    OUTBOX_LEASE_SECONDS = 300  # how long a claimed email waits before another worker may retry it
+    
+    # Compiled quote/invoice email templates (app/email_templates.py); None uses the system temp dir
+    EMAIL_TEMPLATE_CACHE_DIR = os.environ.get('EMAIL_TEMPLATE_CACHE_DIR')
+    
+    # Structured JSON log written by a background thread (app/log.py); empty LOG_FILE disables it
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FILE = os.environ.get('LOG_FILE', os.path.join(basedir, 'logs', 'app.log'))
+    LOG_MAX_BYTES = 5 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    
+    # Per-request SQL statement counts (app/query_stats.py), reported in a Server-Timing header
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    QUERY_DEBUG_PANEL = os.environ.get('QUERY_DEBUG_PANEL', os.environ.get('FLASK_DEBUG', '')).lower() in ['true', 'on', '1']
+    QUERY_COUNT_THRESHOLD = int(os.environ['QUERY_COUNT_THRESHOLD']) if os.environ.get('QUERY_COUNT_THRESHOLD') else None
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '5'))  # identical statements that flag an N+1
+    QUERY_THRESHOLD_ACTION = os.environ.get('QUERY_THRESHOLD_ACTION', 'log')  # 'log' or 'raise'
@@ -0,0 +1,43 @@
+"""Add delivery state to email_logs for the outbox
+
+Revision ID: 0b6e4d2f9c71
+Revises: f28c6a1e7b35
+Create Date: 2026-10-17 16:21:47.093215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e4d2f9c71'
+down_revision = 'f28c6a1e7b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+
+    # Everything logged so far was sent inline by the request that created it
+    op.execute("UPDATE email_logs SET created_at = sent_at, status = 'sent', attempts = 1")
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.alter_column('status', existing_type=sa.String(length=20), nullable=False)
+        batch_op.alter_column('attempts', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_email_logs_status_next_attempt_at', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_status_next_attempt_at')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('next_attempt_at')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('status')
+        batch_op.drop_column('created_at')
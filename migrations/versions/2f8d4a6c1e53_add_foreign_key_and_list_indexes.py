@@ -0,0 +1,58 @@
+"""Index the foreign keys and filters the routes look rows up by
+
+Revision ID: 2f8d4a6c1e53
+Revises: d93b1e6a4f07
+Create Date: 2026-10-17 19:41:08.226517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8d4a6c1e53'
+down_revision = 'd93b1e6a4f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quote_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_quote_items_quote_id'), ['quote_id'], unique=False)
+
+    with op.batch_alter_table('invoice_items', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invoice_items_invoice_id'), ['invoice_id'], unique=False)
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invoices_quote_id'), ['quote_id'], unique=False)
+        batch_op.create_index('ix_invoices_status_date_issued_id', ['status', 'date_issued', 'id'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index('ix_payments_invoice_id_date', ['invoice_id', 'date'], unique=False)
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_email_logs_quote_id_sent_at', ['quote_id', 'sent_at'], unique=False)
+
+    with op.batch_alter_table('email_body_shells', schema=None) as batch_op:
+        batch_op.create_index('ix_email_body_shells_email_type_created_at', ['email_type', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_body_shells', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_body_shells_email_type_created_at')
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_quote_id_sent_at')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_invoice_id_date')
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_status_date_issued_id')
+        batch_op.drop_index(batch_op.f('ix_invoices_quote_id'))
+
+    with op.batch_alter_table('invoice_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invoice_items_invoice_id'))
+
+    with op.batch_alter_table('quote_items', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_quote_items_quote_id'))
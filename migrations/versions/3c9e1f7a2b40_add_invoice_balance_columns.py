@@ -0,0 +1,38 @@
+"""Add amount_paid and balance to Invoice
+
+Revision ID: 3c9e1f7a2b40
+Revises: a0df32c52233
+Create Date: 2026-10-17 09:12:41.508311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e1f7a2b40'
+down_revision = 'a0df32c52233'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount_paid', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('balance', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_invoices_balance'), ['balance'], unique=False)
+
+    # Backfill from the existing payments
+    op.execute("""
+        UPDATE invoices SET amount_paid = COALESCE(
+            (SELECT SUM(payments.amount) FROM payments WHERE payments.invoice_id = invoices.id), 0
+        )
+    """)
+    op.execute("UPDATE invoices SET balance = COALESCE(total, 0) - amount_paid")
+
+
+def downgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invoices_balance'))
+        batch_op.drop_column('balance')
+        batch_op.drop_column('amount_paid')
@@ -0,0 +1,69 @@
+"""Widen search index prefixes and add Postgres search indexes
+
+Revision ID: 4b8e2f6a1c73
+Revises: 9c1e7b3d5a26
+Create Date: 2026-10-17 22:41:09.517204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2f6a1c73'
+down_revision = '9c1e7b3d5a26'
+branch_labels = None
+depends_on = None
+
+# The statements as of this revision, so later changes to app.search don't change them
+SQLITE_PREFIX_4_TABLE = "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(number, name, description, notes, ref_id UNINDEXED, tokenize='unicode61', prefix='2 3 4')"
+SQLITE_PREFIX_3_TABLE = "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(number, name, description, notes, ref_id UNINDEXED, tokenize='unicode61', prefix='2 3')"
+SQLITE_REBUILD = [
+    'INSERT INTO search_index(rowid, ref_id, name) SELECT id * 8 + 1, id, name FROM clients',
+    'INSERT INTO search_index(rowid, ref_id, number, notes) SELECT id * 8 + 2, id, quote_number, notes FROM quotes',
+    'INSERT INTO search_index(rowid, ref_id, description) SELECT id * 8 + 3, quote_id, description FROM quote_items',
+    'INSERT INTO search_index(rowid, ref_id, number, notes) SELECT id * 8 + 4, id, invoice_number, notes FROM invoices',
+    'INSERT INTO search_index(rowid, ref_id, description) SELECT id * 8 + 5, invoice_id, description FROM invoice_items',
+]
+
+POSTGRES_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_clients_global_search ON clients USING GIN ((setweight(to_tsvector('simple', coalesce(name, '')), 'B')))",
+    "CREATE INDEX IF NOT EXISTS ix_quotes_global_search ON quotes USING GIN ((setweight(to_tsvector('simple', coalesce(quote_number, '')), 'A') || setweight(to_tsvector('simple', coalesce(notes, '')), 'D')))",
+    "CREATE INDEX IF NOT EXISTS ix_quote_items_global_search ON quote_items USING GIN ((setweight(to_tsvector('simple', coalesce(description, '')), 'C')))",
+    "CREATE INDEX IF NOT EXISTS ix_invoices_global_search ON invoices USING GIN ((setweight(to_tsvector('simple', coalesce(invoice_number, '')), 'A') || setweight(to_tsvector('simple', coalesce(notes, '')), 'D')))",
+    "CREATE INDEX IF NOT EXISTS ix_invoice_items_global_search ON invoice_items USING GIN ((setweight(to_tsvector('simple', coalesce(description, '')), 'C')))",
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS ix_clients_global_search',
+    'DROP INDEX IF EXISTS ix_quotes_global_search',
+    'DROP INDEX IF EXISTS ix_quote_items_global_search',
+    'DROP INDEX IF EXISTS ix_invoices_global_search',
+    'DROP INDEX IF EXISTS ix_invoice_items_global_search',
+]
+
+
+def rebuild_search_index(table):
+    # FTS5 can't change prefix indexes in place; the triggers only name the table, so they carry on
+    op.execute('DROP TABLE IF EXISTS search_index')
+    op.execute(table)
+    for statement in SQLITE_REBUILD:
+        op.execute(statement)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        rebuild_search_index(SQLITE_PREFIX_4_TABLE)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_INDEXES:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        rebuild_search_index(SQLITE_PREFIX_3_TABLE)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DROP:
+            op.execute(statement)
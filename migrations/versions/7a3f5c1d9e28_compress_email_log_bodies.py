@@ -0,0 +1,156 @@
+"""Store email_logs bodies compressed against shared shells
+
+Revision ID: 7a3f5c1d9e28
+Revises: 0b6e4d2f9c71
+Create Date: 2026-10-17 17:52:30.614087
+
+"""
+import hashlib
+import logging
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3f5c1d9e28'
+down_revision = '0b6e4d2f9c71'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.env')
+
+# Rows converted per round trip
+CHUNK_SIZE = 500
+
+# The storage format as of this revision, copied from app.email_bodies so
+# later changes there don't change what this migration writes or reads
+MIN_SHELL_BODY = 1024
+NEW_SHELL_RATIO = 0.2
+
+
+def shell_id(html):
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def compress_body(html, shell=None):
+    if shell:
+        compressor = zlib.compressobj(9, zdict=shell.encode('utf-8'))
+    else:
+        compressor = zlib.compressobj(9)
+    return compressor.compress(html.encode('utf-8')) + compressor.flush()
+
+
+def decompress_body(data, shell=None):
+    if shell:
+        decompressor = zlib.decompressobj(zdict=shell.encode('utf-8'))
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+
+def database_size(connection):
+    """Bytes in use by the database, not counting pages freed but not yet vacuumed"""
+    if connection.dialect.name == 'sqlite':
+        page_size = connection.exec_driver_sql('PRAGMA page_size').scalar()
+        page_count = connection.exec_driver_sql('PRAGMA page_count').scalar()
+        free_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+        return (page_count - free_pages) * page_size
+    if connection.dialect.name == 'postgresql':
+        return connection.exec_driver_sql('SELECT pg_database_size(current_database())').scalar()
+    return None
+
+
+def report_size(label, size):
+    if size is not None:
+        logger.info('%s: database uses %.1f MB', label, size / 1024 / 1024)
+
+
+def chunks(connection, query):
+    """Yield the rows of `query` (which must take :last_id and order by id) in chunks"""
+    last_id = 0
+    while True:
+        rows = connection.execute(sa.text(query), {'last_id': last_id, 'limit': CHUNK_SIZE}).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade():
+    connection = op.get_bind()
+    report_size('Before', database_size(connection))
+
+    op.create_table(
+        'email_body_shells',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('email_type', sa.String(length=20), nullable=True),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('body_shell_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('body_data', sa.LargeBinary(), nullable=True))
+
+    # Same policy as app.email_bodies.store_body had: compress each body against
+    # the latest shell of its type and start a new shell when that saves too little
+    shells = {}
+    current = {}
+    for rows in chunks(connection, 'SELECT id, email_type, body FROM email_logs '
+                                   'WHERE id > :last_id AND body IS NOT NULL ORDER BY id LIMIT :limit'):
+        updates = []
+        for row in rows:
+            if len(row.body) < MIN_SHELL_BODY:
+                updates.append({'id': row.id, 'shell': None, 'data': compress_body(row.body)})
+                continue
+            shell = current.get(row.email_type)
+            data = compress_body(row.body, shells[shell]) if shell else None
+            if data is None or len(data) > len(row.body) * NEW_SHELL_RATIO:
+                shell = shell_id(row.body)
+                if shell not in shells:
+                    shells[shell] = row.body
+                    connection.execute(
+                        sa.text('INSERT INTO email_body_shells (id, email_type, data, created_at) '
+                                'VALUES (:id, :email_type, :data, CURRENT_TIMESTAMP)'),
+                        {'id': shell, 'email_type': row.email_type, 'data': zlib.compress(row.body.encode('utf-8'), 9)}
+                    )
+                current[row.email_type] = shell
+                data = compress_body(row.body, shells[shell])
+            updates.append({'id': row.id, 'shell': shell, 'data': data})
+        connection.execute(
+            sa.text('UPDATE email_logs SET body_shell_id = :shell, body_data = :data WHERE id = :id'), updates
+        )
+    logger.info('Compressed email bodies against %d shell(s)', len(shells))
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_email_logs_body_shell_id', 'email_body_shells', ['body_shell_id'], ['id'])
+        batch_op.drop_column('body')
+
+    report_size('After', database_size(connection))
+    if connection.dialect.name == 'sqlite':
+        logger.info('Run VACUUM to return the freed pages to the filesystem')
+
+
+def downgrade():
+    connection = op.get_bind()
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('body', sa.Text(), nullable=True))
+
+    shells = {
+        row.id: zlib.decompress(row.data).decode('utf-8')
+        for row in connection.execute(sa.text('SELECT id, data FROM email_body_shells'))
+    }
+    for rows in chunks(connection, 'SELECT id, body_shell_id, body_data FROM email_logs '
+                                   'WHERE id > :last_id AND body_data IS NOT NULL ORDER BY id LIMIT :limit'):
+        connection.execute(sa.text('UPDATE email_logs SET body = :body WHERE id = :id'), [
+            {'id': row.id, 'body': decompress_body(row.body_data, shells.get(row.body_shell_id))}
+            for row in rows
+        ])
+
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_email_logs_body_shell_id', type_='foreignkey')
+        batch_op.drop_column('body_data')
+        batch_op.drop_column('body_shell_id')
+    op.drop_table('email_body_shells')
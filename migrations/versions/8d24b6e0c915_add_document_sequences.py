@@ -0,0 +1,46 @@
+"""Add document_sequences counter table
+
+Revision ID: 8d24b6e0c915
+Revises: 3c9e1f7a2b40
+Create Date: 2026-10-17 10:02:17.944120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d24b6e0c915'
+down_revision = '3c9e1f7a2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sequences = op.create_table('document_sequences',
+    sa.Column('prefix', sa.String(length=10), nullable=False),
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('prefix', 'year')
+    )
+
+    # Seed the counters from the numbers already handed out (PREFIX-YYYY-NNN)
+    connection = op.get_bind()
+    counters = {}
+    for table, column in [('quotes', 'quote_number'), ('invoices', 'invoice_number')]:
+        for (number,) in connection.execute(sa.text(f'SELECT {column} FROM {table}')):
+            parts = (number or '').split('-')
+            if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+                continue
+            key = (parts[0], int(parts[1]))
+            counters[key] = max(counters.get(key, 0), int(parts[2]))
+
+    if counters:
+        op.bulk_insert(sequences, [
+            {'prefix': prefix, 'year': year, 'last_value': last_value}
+            for (prefix, year), last_value in counters.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('document_sequences')
@@ -0,0 +1,55 @@
+"""Store money columns as integer cents
+
+Revision ID: 9c1e7b3d5a26
+Revises: 2f8d4a6c1e53
+Create Date: 2026-10-17 20:26:51.380942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e7b3d5a26'
+down_revision = '2f8d4a6c1e53'
+branch_labels = None
+depends_on = None
+
+# table -> [(column, nullable)] of the columns app.money.MoneyType now maps
+MONEY_COLUMNS = {
+    'quotes': [('total', True)],
+    'quote_items': [('unit_price', False), ('line_total', True)],
+    'invoices': [('total', True), ('amount_paid', False), ('balance', False)],
+    'invoice_items': [('unit_price', False), ('line_total', True)],
+    'payments': [('amount', False)],
+    'services': [('default_rate', False)],
+}
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table, columns in MONEY_COLUMNS.items():
+        # Elsewhere the type change is a table copy that CASTs, which would
+        # drop the fraction, so scale to cents first; numeric(10, 2) can't
+        # hold cents on PostgreSQL, where the USING clause does it instead
+        if not postgresql:
+            op.execute(f'UPDATE {table} SET ' + ', '.join(f'{column} = ROUND({column} * 100)' for column, _ in columns))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(
+                    column, existing_type=sa.Numeric(precision=10, scale=2), type_=sa.BigInteger(),
+                    existing_nullable=nullable, postgresql_using=f'ROUND({column} * 100)::bigint'
+                )
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table, columns in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(
+                    column, existing_type=sa.BigInteger(), type_=sa.Numeric(precision=10, scale=2),
+                    existing_nullable=nullable, postgresql_using=f'({column} / 100.0)::numeric(10, 2)'
+                )
+        if not postgresql:
+            op.execute(f'UPDATE {table} SET ' + ', '.join(f'{column} = {column} / 100.0' for column, _ in columns))
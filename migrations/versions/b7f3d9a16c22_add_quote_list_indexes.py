@@ -0,0 +1,28 @@
+"""Add indexes for the quotes list
+
+Revision ID: b7f3d9a16c22
+Revises: 5e7a0c3d41f8
+Create Date: 2026-10-17 12:08:35.662904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f3d9a16c22'
+down_revision = '5e7a0c3d41f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.create_index('ix_quotes_status_date_created', ['status', 'date_created'], unique=False)
+        batch_op.create_index('ix_quotes_date_created_id', ['date_created', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.drop_index('ix_quotes_date_created_id')
+        batch_op.drop_index('ix_quotes_status_date_created')
@@ -0,0 +1,43 @@
+"""Add full-text search index for clients
+
+Revision ID: c41a8e5f0d93
+Revises: b7f3d9a16c22
+Create Date: 2026-10-17 13:40:09.218457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import (
+    SQLITE_CLIENT_SEARCH_DDL, SQLITE_CLIENT_SEARCH_DROP, SQLITE_CLIENT_SEARCH_REBUILD,
+    POSTGRES_CLIENT_SEARCH_DDL, POSTGRES_CLIENT_SEARCH_DROP
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a8e5f0d93'
+down_revision = 'b7f3d9a16c22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_CLIENT_SEARCH_DDL:
+            op.execute(statement)
+        # Index the clients that already exist
+        op.execute(SQLITE_CLIENT_SEARCH_REBUILD)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_CLIENT_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_CLIENT_SEARCH_DROP:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_CLIENT_SEARCH_DROP:
+            op.execute(statement)
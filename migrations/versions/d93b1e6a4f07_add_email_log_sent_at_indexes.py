@@ -0,0 +1,28 @@
+"""Add (client_id, sent_at) and (invoice_id, sent_at) indexes to email_logs
+
+Revision ID: d93b1e6a4f07
+Revises: 7a3f5c1d9e28
+Create Date: 2026-10-17 18:34:12.507391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93b1e6a4f07'
+down_revision = '7a3f5c1d9e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_email_logs_client_id_sent_at', ['client_id', 'sent_at'], unique=False)
+        batch_op.create_index('ix_email_logs_invoice_id_sent_at', ['invoice_id', 'sent_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('email_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_logs_invoice_id_sent_at')
+        batch_op.drop_index('ix_email_logs_client_id_sent_at')
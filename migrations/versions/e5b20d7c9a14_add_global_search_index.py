@@ -0,0 +1,80 @@
+"""Add global search index
+
+Revision ID: e5b20d7c9a14
+Revises: c41a8e5f0d93
+Create Date: 2026-10-17 14:52:31.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b20d7c9a14'
+down_revision = 'c41a8e5f0d93'
+branch_labels = None
+depends_on = None
+
+# The index as this revision created it; kept here so later changes to app.search
+# don't change what this migration does
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(number, name, description, notes, ref_id UNINDEXED, tokenize='unicode61', prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS clients_search_ai AFTER INSERT ON clients BEGIN INSERT INTO search_index(rowid, ref_id, name) VALUES (new.id * 8 + 1, new.id, new.name); END',
+    'CREATE TRIGGER IF NOT EXISTS clients_search_ad AFTER DELETE ON clients BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 1; END',
+    'CREATE TRIGGER IF NOT EXISTS clients_search_au AFTER UPDATE OF name ON clients BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 1; INSERT INTO search_index(rowid, ref_id, name) VALUES (new.id * 8 + 1, new.id, new.name); END',
+    'CREATE TRIGGER IF NOT EXISTS quotes_search_ai AFTER INSERT ON quotes BEGIN INSERT INTO search_index(rowid, ref_id, number, notes) VALUES (new.id * 8 + 2, new.id, new.quote_number, new.notes); END',
+    'CREATE TRIGGER IF NOT EXISTS quotes_search_ad AFTER DELETE ON quotes BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 2; END',
+    'CREATE TRIGGER IF NOT EXISTS quotes_search_au AFTER UPDATE OF notes, quote_number ON quotes BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 2; INSERT INTO search_index(rowid, ref_id, number, notes) VALUES (new.id * 8 + 2, new.id, new.quote_number, new.notes); END',
+    'CREATE TRIGGER IF NOT EXISTS quote_items_search_ai AFTER INSERT ON quote_items BEGIN INSERT INTO search_index(rowid, ref_id, description) VALUES (new.id * 8 + 3, new.quote_id, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS quote_items_search_ad AFTER DELETE ON quote_items BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 3; END',
+    'CREATE TRIGGER IF NOT EXISTS quote_items_search_au AFTER UPDATE OF description, quote_id ON quote_items BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 3; INSERT INTO search_index(rowid, ref_id, description) VALUES (new.id * 8 + 3, new.quote_id, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS invoices_search_ai AFTER INSERT ON invoices BEGIN INSERT INTO search_index(rowid, ref_id, number, notes) VALUES (new.id * 8 + 4, new.id, new.invoice_number, new.notes); END',
+    'CREATE TRIGGER IF NOT EXISTS invoices_search_ad AFTER DELETE ON invoices BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 4; END',
+    'CREATE TRIGGER IF NOT EXISTS invoices_search_au AFTER UPDATE OF invoice_number, notes ON invoices BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 4; INSERT INTO search_index(rowid, ref_id, number, notes) VALUES (new.id * 8 + 4, new.id, new.invoice_number, new.notes); END',
+    'CREATE TRIGGER IF NOT EXISTS invoice_items_search_ai AFTER INSERT ON invoice_items BEGIN INSERT INTO search_index(rowid, ref_id, description) VALUES (new.id * 8 + 5, new.invoice_id, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS invoice_items_search_ad AFTER DELETE ON invoice_items BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 5; END',
+    'CREATE TRIGGER IF NOT EXISTS invoice_items_search_au AFTER UPDATE OF description, invoice_id ON invoice_items BEGIN DELETE FROM search_index WHERE rowid = old.id * 8 + 5; INSERT INTO search_index(rowid, ref_id, description) VALUES (new.id * 8 + 5, new.invoice_id, new.description); END',
+]
+
+SEARCH_INDEX_DROP = [
+    'DROP TRIGGER IF EXISTS clients_search_au',
+    'DROP TRIGGER IF EXISTS clients_search_ad',
+    'DROP TRIGGER IF EXISTS clients_search_ai',
+    'DROP TRIGGER IF EXISTS quotes_search_au',
+    'DROP TRIGGER IF EXISTS quotes_search_ad',
+    'DROP TRIGGER IF EXISTS quotes_search_ai',
+    'DROP TRIGGER IF EXISTS quote_items_search_au',
+    'DROP TRIGGER IF EXISTS quote_items_search_ad',
+    'DROP TRIGGER IF EXISTS quote_items_search_ai',
+    'DROP TRIGGER IF EXISTS invoices_search_au',
+    'DROP TRIGGER IF EXISTS invoices_search_ad',
+    'DROP TRIGGER IF EXISTS invoices_search_ai',
+    'DROP TRIGGER IF EXISTS invoice_items_search_au',
+    'DROP TRIGGER IF EXISTS invoice_items_search_ad',
+    'DROP TRIGGER IF EXISTS invoice_items_search_ai',
+    'DROP TABLE IF EXISTS search_index',
+]
+
+SEARCH_INDEX_REBUILD = [
+    'DELETE FROM search_index',
+    'INSERT INTO search_index(rowid, ref_id, name) SELECT id * 8 + 1, id, name FROM clients',
+    'INSERT INTO search_index(rowid, ref_id, number, notes) SELECT id * 8 + 2, id, quote_number, notes FROM quotes',
+    'INSERT INTO search_index(rowid, ref_id, description) SELECT id * 8 + 3, quote_id, description FROM quote_items',
+    'INSERT INTO search_index(rowid, ref_id, number, notes) SELECT id * 8 + 4, id, invoice_number, notes FROM invoices',
+    'INSERT INTO search_index(rowid, ref_id, description) SELECT id * 8 + 5, invoice_id, description FROM invoice_items',
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SEARCH_INDEX_DDL:
+            op.execute(statement)
+        # Index the rows that already exist
+        for statement in SEARCH_INDEX_REBUILD:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SEARCH_INDEX_DROP:
+            op.execute(statement)
@@ -0,0 +1,67 @@
+"""Add updated_at and filter indexes for the JSON APIs
+
+Revision ID: f28c6a1e7b35
+Revises: e5b20d7c9a14
+Create Date: 2026-10-17 15:37:12.480936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.search import SQLITE_GLOBAL_SEARCH_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = 'f28c6a1e7b35'
+down_revision = 'e5b20d7c9a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_quotes_updated_at', ['updated_at'], unique=False)
+        batch_op.create_index('ix_quotes_client_id', ['client_id'], unique=False)
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_invoices_updated_at', ['updated_at'], unique=False)
+        batch_op.create_index('ix_invoices_client_id', ['client_id'], unique=False)
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_payments_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.create_index('ix_clients_updated_at', ['updated_at'], unique=False)
+
+    # Existing rows have no change history; start them at their document date
+    as_timestamp = 'datetime({})' if op.get_bind().dialect.name == 'sqlite' else 'CAST({} AS TIMESTAMP)'
+    for table, column in [('quotes', 'date_created'), ('invoices', 'date_issued'), ('payments', 'date')]:
+        op.execute(f"UPDATE {table} SET updated_at = coalesce({as_timestamp.format(column)}, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE clients SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_updated_at')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_client_id')
+        batch_op.drop_index('ix_invoices_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('quotes', schema=None) as batch_op:
+        batch_op.drop_index('ix_quotes_client_id')
+        batch_op.drop_index('ix_quotes_updated_at')
+        batch_op.drop_column('updated_at')
+
+    # Dropping a column rebuilds the table on SQLite, which drops its search triggers
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_GLOBAL_SEARCH_DDL:
+            op.execute(statement)
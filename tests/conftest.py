@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from app import db
+from app.perf import seeded_app
+from app.perf.smtp import smtp_stand_in
+
+
+@pytest.fixture(scope='module')
+def seeded():
+    """(app, ids): an app on an in-memory SQLite database filled by app.seed, fresh for each test module.
+
+    `ids` are the seeded rows the route checks use; see app.perf.seeded.check_ids.
+    """
+    app, ids = seeded_app()
+    yield app, ids
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope='session')
+def slack():
+    """Multiplier for the route time limits, from PERF_SLACK; None when unset, which makes them report-only"""
+    value = os.environ.get('PERF_SLACK')
+    return float(value) if value else None
+
+
+@pytest.fixture
+def smtp_server():
+    """An SMTPStandIn (see app.perf.smtp) on a free local port, running until the test ends"""
+    with smtp_stand_in() as server:
+        yield server
@@ -0,0 +1,31 @@
+import json
+from datetime import datetime
+
+import pytest
+
+LISTS = ['/api/clients/', '/api/quotes/', '/api/invoices/', '/api/payments/']
+
+
+@pytest.mark.parametrize('path', LISTS)
+def test_updated_at_round_trips_through_updated_since(seeded, path):
+    app, _ = seeded
+    client = app.test_client()
+    rows = client.get(f'{path}?fields=updated_at').get_json()
+    latest = max(rows, key=lambda row: row['updated_at'])
+    # ISO 8601, sub-second precision kept, so the newest row's own timestamp finds it again
+    datetime.fromisoformat(latest['updated_at'])
+
+    response = client.get(f"{path}?updated_since={latest['updated_at']}")
+    assert response.status_code == 200
+    assert latest['id'] in [row['id'] for row in response.get_json()]
+    assert all(row['updated_at'] >= latest['updated_at'] for row in response.get_json())
+
+
+@pytest.mark.parametrize('path', LISTS)
+def test_stream_and_detail_use_iso_timestamps(seeded, path):
+    app, _ = seeded
+    client = app.test_client()
+    first = json.loads(client.get(f'{path}?stream=1&limit=1').get_data(as_text=True).splitlines()[0])
+    detail = client.get(f"{path}{first['id']}").get_json()
+    assert detail['updated_at'] == first['updated_at']
+    datetime.fromisoformat(first['updated_at'])
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from app import db
+from app.models import Client, Invoice, Payment, Quote
+from app.money import Money
+from app.perf import CHECK_USER, seeded_app
+from app.query_stats import collect_queries
+from app.stats import dashboard_stats
+
+
+def paid_balance(invoice):
+    """What the invoice still owes going by its payments rather than the stored balance"""
+    return (invoice.total or Money(0)) - sum((payment.amount for payment in invoice.payments), Money(0))
+
+
+def loop_stats():
+    """The dashboard figures worked out row by row in Python, to hold the aggregates to"""
+    month_start = datetime.now().date().replace(day=1)
+    return {
+        'total_clients': len(Client.query.all()),
+        'active_quotes': len([quote for quote in Quote.query.all() if quote.status in ('draft', 'sent')]),
+        'outstanding_amount': sum(balance for balance in map(paid_balance, Invoice.query.all()) if balance > 0),
+        'monthly_revenue': sum(payment.amount for payment in Payment.query.all() if payment.date >= month_start),
+    }
+
+
+def measure_dashboard(clients):
+    """(statements in dashboard_stats, statements in GET /) for a database seeded with `clients` clients"""
+    app, _ = seeded_app(clients, ids=lambda: None)
+    try:
+        with app.app_context():
+            with collect_queries() as stats:
+                figures = dashboard_stats()
+            assert figures == loop_stats()
+            assert Invoice.query.count() > clients
+
+        client = app.test_client()
+        client.post('/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]})
+        with collect_queries() as page:
+            response = client.get('/')
+        assert response.status_code == 200
+        return stats.count, page.count
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+def test_dashboard_statements_do_not_grow_with_invoices():
+    small = measure_dashboard(20)
+    large = measure_dashboard(200)
+    assert small[0] == 1
+    assert large == small
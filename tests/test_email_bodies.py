@@ -0,0 +1,38 @@
+from app import db
+from app.email_templates import render_invoice_email, render_quote_email
+from app.models import Client, EmailBodyShell, EmailLog, Invoice, Quote
+from app.outbox import enqueue_email
+
+
+def test_bodies_are_stored_against_their_own_type(seeded):
+    app, ids = seeded
+    with app.app_context():
+        quote = db.session.get(Quote, ids['quote'])
+        invoice = db.session.get(Invoice, ids['invoice'])
+        client = db.session.get(Client, ids['client'])
+        bodies = {
+            'quote': render_quote_email(quote, client, quote.items, 'Thanks')[1],
+            'invoice': render_invoice_email(invoice, client, invoice.items, 'Thanks')[1],
+        }
+        # Alternate types so each one's current shell is tried against the other's bodies
+        logs = [enqueue_email(client.email, 'Subject', bodies[kind], kind, client_id=client.id)
+                for kind in ['quote', 'invoice', 'quote', 'invoice']]
+        db.session.commit()
+        for email_log in logs:
+            assert db.session.get(EmailBodyShell, email_log.body_shell_id).email_type == email_log.email_type
+            assert email_log.body == bodies[email_log.email_type]
+
+
+def test_set_body_does_not_depend_on_email_type_being_set_first(seeded):
+    app, ids = seeded
+    with app.app_context():
+        quote = db.session.get(Quote, ids['quote'])
+        client = db.session.get(Client, ids['client'])
+        html = render_quote_email(quote, client, quote.items)[1]
+        email_log = EmailLog()
+        email_log.set_body(html, 'quote')
+        email_log.email_type = 'quote'
+        db.session.add(email_log)
+        db.session.commit()
+        assert db.session.get(EmailBodyShell, email_log.body_shell_id).email_type == 'quote'
+        assert email_log.body == html
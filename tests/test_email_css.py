@@ -0,0 +1,74 @@
+import os
+
+import jinja2
+import pytest
+
+from app import create_app
+from app.email_css import inline_css
+from app.email_templates import EMAIL_TEMPLATES, InlinedEmailLoader
+from app.perf import CheckConfig
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden', 'email')
+
+
+def inline(css, body):
+    return inline_css(f'<html><head><style>{css}</style></head><body>{body}</body></html>')
+
+
+def test_more_specific_selector_wins_whatever_the_order():
+    html = inline('.note p { color: red } p { color: blue; margin: 0 } .b { color: green }',
+                  '<div class="note"><p class="b">x</p><p>y</p></div><p>z</p>')
+    assert '<p class="b" style="margin:0;color:red">x</p>' in html
+    assert '<p style="margin:0;color:red">y</p>' in html
+    assert '<p style="color:blue;margin:0">z</p>' in html
+
+
+def test_later_rule_wins_at_equal_specificity():
+    assert '<p style="color:blue">' in inline('p { color: red } p { color: blue }', '<p>x</p>')
+
+
+def test_existing_style_attribute_beats_the_stylesheet():
+    html = inline('p { color: red; padding: 1px }', '<p style="color: black">x</p>')
+    assert '<p style="padding:1px;color:black">' in html
+
+
+def test_media_queries_stay_in_a_style_block_as_important():
+    html = inline('.c { width: 600px } @media (max-width: 600px) { .c { width: 100% } } '
+                  '@media print { .unused { display: none } }', '<div class="c">x</div>')
+    assert '<div class="c" style="width:600px">' in html
+    assert '<style>@media(max-width:600px){.c{width:100%!important}}</style>' in html
+    assert 'unused' not in html
+
+
+def test_pseudo_classes_and_elements_stay_in_a_style_block():
+    html = inline('a { color: red } a:hover { color: blue } p::first-line { font-weight: bold } '
+                  '.gone:hover { color: green }', '<a href="#">x</a><p>y</p>')
+    assert '<a href="#" style="color:red">' in html
+    assert '<p>y</p>' in html
+    assert '<style>a:hover{color:blue}p::first-line{font-weight:bold}</style>' in html
+
+
+def test_selectors_it_cannot_match_are_kept():
+    html = inline('div > p { color: red } #total { color: blue }', '<div><p id="total">x</p></div>')
+    assert '<p id="total">x</p>' in html
+    assert '<style>div>p{color:red}#total{color:blue}</style>' in html
+
+
+def test_descendant_selectors_follow_nesting_past_void_tags():
+    html = inline('.a span { color: red }', '<div class="a"><br><img src="x"/><span>x</span></div><span>y</span>')
+    assert '<span style="color:red">x</span>' in html
+    assert '<span>y</span>' in html
+
+
+@pytest.mark.parametrize('name', sorted(EMAIL_TEMPLATES.values()))
+def test_email_template_matches_golden_output(name, tmp_path):
+    """Set UPDATE_GOLDEN=1 to rewrite tests/golden/email/ after an intended change"""
+    app = create_app(CheckConfig)
+    loader = InlinedEmailLoader(os.path.join(app.root_path, 'templates', 'email'), str(tmp_path))
+    source = loader.get_source(jinja2.Environment(loader=loader), name)[0]
+    golden = os.path.join(GOLDEN_DIR, name)
+    if os.environ.get('UPDATE_GOLDEN'):
+        with open(golden, 'w', encoding='utf-8') as f:
+            f.write(source)
+    with open(golden, encoding='utf-8') as f:
+        assert source == f.read()
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import jinja2
+import pytest
+
+from app import create_app, db, email_templates
+from app.email_templates import EMAIL_TEMPLATES, InlinedEmailLoader, render_invoice_email
+from app.models import Client, Invoice
+from app.perf import CheckConfig
+
+
+@pytest.fixture
+def compiles(monkeypatch):
+    """Names of the templates Jinja compiles from source while the test runs"""
+    compiled = []
+    compile_source = jinja2.Environment.compile
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        compiled.append(name)
+        return compile_source(self, source, name, filename, raw, defer_init)
+
+    monkeypatch.setattr(jinja2.Environment, 'compile', compile)
+    return compiled
+
+
+def test_rendering_does_not_compile(seeded, compiles):
+    app, ids = seeded
+    with app.app_context():
+        invoice = db.session.get(Invoice, ids['invoice'])
+        client = db.session.get(Client, invoice.client_id)
+        items = list(invoice.items)
+        bodies = {render_invoice_email(invoice, client, items)[1] for _ in range(20)}
+        assert compiles == []
+
+        # The same HTML as compiling the template afresh
+        env = app.extensions['email_templates']['invoice'].environment
+        source = env.loader.get_source(env, EMAIL_TEMPLATES['invoice'])[0]
+        assert bodies == {env.from_string(source).render(document=invoice, client=client, items=items,
+                                                         custom_message='')}
+
+
+def test_bytecode_cache_is_hit_on_restart(tmp_path, compiles, monkeypatch):
+    class TemplateCacheConfig(CheckConfig):
+        EMAIL_TEMPLATE_CACHE_DIR = str(tmp_path / 'templates')
+
+    inlined = []
+    inline_css = email_templates.inline_css
+    monkeypatch.setattr(email_templates, 'inline_css', lambda source: inlined.append(source) or inline_css(source))
+
+    app = create_app(TemplateCacheConfig)
+    assert sorted(compiles) == sorted(EMAIL_TEMPLATES.values())
+    assert len(inlined) == len(EMAIL_TEMPLATES)
+    assert len(list((tmp_path / 'templates').glob('__jinja2_*'))) == len(EMAIL_TEMPLATES)
+    assert len(list((tmp_path / 'templates').glob('__inlined_*'))) == len(EMAIL_TEMPLATES)
+
+    # A later start, like another worker process, loads the bytecode and inlined source instead
+    compiles.clear()
+    inlined.clear()
+    email_templates.init_app(app)
+    assert compiles == []
+    assert inlined == []
+    assert set(app.extensions['email_templates']) == set(EMAIL_TEMPLATES)
+
+
+def test_editing_a_parent_template_inlines_again(tmp_path):
+    app = create_app(CheckConfig)
+    shutil.copytree(os.path.join(app.root_path, 'templates', 'email'), tmp_path / 'email')
+    (tmp_path / 'cache').mkdir()
+    loader = InlinedEmailLoader(str(tmp_path / 'email'), str(tmp_path / 'cache'))
+    env = jinja2.Environment(loader=loader)
+    source, _, uptodate = loader.get_source(env, EMAIL_TEMPLATES['quote'])
+    assert uptodate()
+    assert loader.get_source(env, EMAIL_TEMPLATES['quote'])[0] == source
+
+    base = tmp_path / 'email' / 'base.html'
+    base.write_text(base.read_text().replace('</body>', '<p>Edited</p></body>'))
+    os.utime(base, ns=(0, os.stat(base).st_mtime_ns + 1))
+    assert not uptodate()
+    assert '<p>Edited</p>' in loader.get_source(env, EMAIL_TEMPLATES['quote'])[0]
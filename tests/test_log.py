@@ -0,0 +1,36 @@
+import json
+
+from app import create_app
+from app.log import log_event
+from app.perf import CheckConfig
+
+
+def log_app(log_file):
+    class LogConfig(CheckConfig):
+        LOG_FILE = log_file
+        LOG_LEVEL = 'INFO'
+
+    return create_app(LogConfig)
+
+
+def stop_listener():
+    """Flush and stop the log thread, as the next create_app does"""
+    create_app(CheckConfig)
+
+
+def test_bare_file_name_logs_to_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = log_app('app.log')
+    with app.app_context():
+        log_event('test.event', answer=42)
+    stop_listener()
+    entry = json.loads((tmp_path / 'app.log').read_text().splitlines()[-1])
+    assert entry['event'] == 'test.event' and entry['answer'] == 42
+
+
+def test_missing_directory_is_created(tmp_path):
+    app = log_app(str(tmp_path / 'logs' / 'nested' / 'app.log'))
+    with app.app_context():
+        log_event('test.event')
+    stop_listener()
+    assert (tmp_path / 'logs' / 'nested' / 'app.log').exists()
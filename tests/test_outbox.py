@@ -0,0 +1,74 @@
+import pytest
+
+from app import db
+from app.models import Client, EmailLog
+from app.outbox import enqueue_email, process_outbox
+from app.perf import CHECK_USER, seeded_app
+from app.smtp_pool import get_pool
+
+# Every path that sends a quote or invoice; each must queue the email and answer without touching SMTP
+SEND_ROUTES = [
+    ('GET', '/quotes/{quote}/send'),
+    ('POST', '/api/quotes/{quote}/send'),
+    ('POST', '/api/emails/send-quote/{quote}'),
+    ('GET', '/invoices/{invoice}/send'),
+    ('POST', '/api/invoices/{invoice}/send'),
+    ('POST', '/api/emails/send-invoice/{invoice}'),
+]
+
+WORKER_EMAILS = 100
+
+
+@pytest.fixture
+def mail_app(smtp_server):
+    app, ids = seeded_app(50, config=smtp_server.config())
+    yield app, ids
+    with app.app_context():
+        get_pool().close()
+        db.session.remove()
+        db.drop_all()
+
+
+def count_queued(app):
+    with app.app_context():
+        return EmailLog.query.filter_by(status='queued').count()
+
+
+def test_send_routes_only_enqueue(mail_app, smtp_server):
+    app, ids = mail_app
+    client = app.test_client()
+    client.post('/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]})
+
+    for method, path in SEND_ROUTES:
+        queued = count_queued(app)
+        response = client.open(path.format(**ids), method=method, json={} if method == 'POST' else None)
+        assert response.status_code < 400, path
+        assert count_queued(app) == queued + 1, path
+        # No SMTP connection inside the request: sending is left to the worker
+        assert smtp_server.connections == 0, path
+
+    with app.app_context():
+        assert process_outbox() == (len(SEND_ROUTES), 0)
+    assert len(smtp_server.messages) == len(SEND_ROUTES)
+    assert count_queued(app) == 0
+
+
+def test_worker_delivers_every_queued_email(mail_app, smtp_server):
+    app, ids = mail_app
+    with app.app_context():
+        client = Client.query.get(ids['client'])
+        for i in range(WORKER_EMAILS):
+            enqueue_email(client.email, f'Delivery {i}', f'<p>Message {i}</p>', 'test', client_id=client.id)
+        db.session.commit()
+
+        delivered = 0
+        while True:
+            sent, failed = process_outbox()
+            assert failed == 0
+            if not sent:
+                break
+            delivered += sent
+
+        assert delivered == WORKER_EMAILS
+        assert EmailLog.query.filter(EmailLog.subject.like('Delivery %'), EmailLog.status == 'sent').count() == WORKER_EMAILS
+    assert len(smtp_server.messages) == WORKER_EMAILS
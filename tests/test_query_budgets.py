@@ -0,0 +1,33 @@
+import warnings
+
+import pytest
+
+from app.perf.budgets import ROUTE_CHECKS, check_problems, describe_statements, run_checks
+
+
+@pytest.fixture(scope='module')
+def results(seeded):
+    """Every route check run once, in order, since later writes use rows earlier ones create"""
+    app, ids = seeded
+    return run_checks(app, ids)
+
+
+def test_every_route_is_checked(seeded):
+    app, _ = seeded
+    registered = {
+        (rule.endpoint, method) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    checked = {(check.endpoint, check.method) for check in ROUTE_CHECKS}
+    assert sorted(registered - checked) == []
+
+
+@pytest.mark.parametrize('index', range(len(ROUTE_CHECKS)),
+                         ids=[f'{check.method} {check.path}' for check in ROUTE_CHECKS])
+def test_route_within_budget(results, slack, index):
+    check, status_code, stats, elapsed_ms = results[index]
+    # Statement counts always hold; time limits only when PERF_SLACK asks for them
+    problems = check_problems(check, status_code, stats, elapsed_ms if slack else None, slack)
+    assert not problems, f"{check.method} {check.path}: {', '.join(problems)}\n{describe_statements(stats)}"
+    if not slack and elapsed_ms > check.max_ms:
+        warnings.warn(f'{check.method} {check.path}: {elapsed_ms:.0f} ms > {check.max_ms} ms')
@@ -0,0 +1,32 @@
+import pytest
+
+from app.perf.budgets import ROUTE_CHECKS
+from app.perf.plans import HOT_QUERIES, describe_plans, explain_checks, explain_queries, full_scans
+
+
+@pytest.fixture(scope='module')
+def route_plans(seeded):
+    app, ids = seeded
+    return explain_checks(app, ids)
+
+
+@pytest.fixture(scope='module')
+def query_plans(seeded):
+    app, ids = seeded
+    return dict(explain_queries(app, ids))
+
+
+@pytest.mark.parametrize('index', range(len(ROUTE_CHECKS)),
+                         ids=[f'{check.method} {check.path}' for check in ROUTE_CHECKS])
+def test_route_uses_indexes(route_plans, index):
+    check, plans = route_plans[index]
+    scans = full_scans(plans, check.scans)
+    assert not scans, f'{check.method} {check.path} reads a whole table:\n{describe_plans(scans)}'
+
+
+@pytest.mark.parametrize('name', list(HOT_QUERIES))
+def test_hot_query_uses_indexes(query_plans, name):
+    plans = query_plans[name]
+    assert plans, f'{name} ran no statements'
+    scans = full_scans(plans)
+    assert not scans, f'{name} reads a whole table:\n{describe_plans(scans)}'
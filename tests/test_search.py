@@ -0,0 +1,39 @@
+from app import db
+from app import search
+from app.models import Quote
+from app.perf import CHECK_USER
+from app.search import SEARCH_SOURCE_STRIDE, global_matches
+
+
+def test_only_the_newest_matches_are_ranked(seeded, monkeypatch):
+    app, _ = seeded
+    with app.app_context():
+        every = db.session.query(global_matches('wash')).all()
+        assert len(every) > 10
+
+        monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 10)
+        capped = db.session.query(global_matches('wash')).all()
+        assert sorted(hit.id for hit in capped) == sorted(hit.id for hit in every)[-10:]
+
+        # Kinds are filtered before the cap, so a narrower search still fills it
+        quotes = db.session.query(global_matches('wash', 'quote')).all()
+        assert len(quotes) == 10
+        assert {hit.id % SEARCH_SOURCE_STRIDE for hit in quotes} <= {2, 3}
+
+
+def test_quote_list_searches_number_client_and_status(seeded):
+    app, _ = seeded
+    with app.app_context():
+        quote = Quote.query.order_by(Quote.id.desc()).first()
+        number, client_name, status = quote.quote_number, quote.client.name, quote.status
+    client = app.test_client()
+    client.post('/login', data={'username': CHECK_USER[0], 'password': CHECK_USER[1]})
+
+    def listed(search):
+        return number in client.get('/quotes/', query_string={'search': search}).get_data(as_text=True)
+
+    # The last part of the number alone, the client's surname and the status each find it
+    assert listed(number.split('-')[-1])
+    assert listed(client_name.split()[-1])
+    assert listed(status)
+    assert not listed('zzzz')
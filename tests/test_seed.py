@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from app import create_app, db
+from app.models import Client, Invoice, Payment, Quote
+from app.perf import CheckConfig
+from app.seed import seed_database
+
+
+def seed_app(url):
+    class SeedConfig(CheckConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        QUERY_STATS_ENABLED = False
+
+    return create_app(SeedConfig)
+
+
+def seed_with_foreign_keys(app):
+    """Seed in chunks small enough to split every table, then add one of each document by hand"""
+    with app.app_context():
+        db.create_all()
+        try:
+            if db.engine.dialect.name == 'sqlite':
+                db.session.execute(db.text('PRAGMA foreign_keys = ON'))
+            counts = seed_database(clients=40, chunk_size=7)
+            assert counts['quote_items'] > 7 and counts['payments'] > 7 and counts['email_logs'] > 7
+            if db.engine.dialect.name == 'sqlite':
+                assert db.session.execute(db.text('PRAGMA foreign_key_check')).fetchall() == []
+
+            # Ids the seed set explicitly mustn't be handed out again
+            client = Client(name='After Seed', email='after@example.com')
+            db.session.add(client)
+            db.session.flush()
+            quote = Quote(client_id=client.id, quote_number='Q-AFTER-1', status='draft')
+            invoice = Invoice(client_id=client.id, invoice_number='INV-AFTER-1', date_issued=client.created_at,
+                              due_date=client.created_at, total=10)
+            db.session.add_all([quote, invoice])
+            db.session.flush()
+            db.session.add(Payment(invoice_id=invoice.id, amount=5, date=client.created_at, method='Cash'))
+            db.session.commit()
+            assert client.id == counts['clients'] + 1
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def test_seed_with_foreign_keys_enforced():
+    seed_with_foreign_keys(seed_app('sqlite://'))
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                    reason='set TEST_POSTGRES_URL to a scratch Postgres database to run')
+def test_seed_postgres():
+    seed_with_foreign_keys(seed_app(os.environ['TEST_POSTGRES_URL']))
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import pytest
+
+from app import create_app, db
+from app.models import DocumentSequence
+from app.perf import CheckConfig
+
+WORKERS = 8
+ROUNDS = 25
+# A year no real document uses, so the Postgres run leaves real counters alone
+YEAR = 2099
+
+
+def sequence_app(url):
+    class SequenceConfig(CheckConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        QUERY_STATS_ENABLED = False
+
+    app = create_app(SequenceConfig)
+    with app.app_context():
+        DocumentSequence.__table__.create(db.engine, checkfirst=True)
+    return app
+
+
+def allocate_concurrently(app, prefix):
+    """Allocate from WORKERS threads at once, each with its own session; returns (values, errors).
+
+    Every third allocation reserves a block of 5, the rest one number.
+    """
+    start = threading.Barrier(WORKERS)
+    values, errors = [], []
+
+    def worker(n):
+        with app.app_context():
+            start.wait()
+            try:
+                for i in range(ROUNDS):
+                    count = 5 if (n + i) % 3 == 0 else 1
+                    last = DocumentSequence.allocate(prefix, count=count, year=YEAR)
+                    db.session.commit()
+                    values.extend(range(last - count + 1, last + 1))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return values, errors
+
+
+def assert_no_collisions(values, errors):
+    assert not errors
+    assert len(values) == len(set(values)), 'two workers were given the same number'
+    # Nothing rolled back, so the values are exactly 1..n
+    assert sorted(values) == list(range(1, len(values) + 1))
+
+
+def test_parallel_allocation_sqlite(tmp_path):
+    app = sequence_app(f"sqlite:///{tmp_path / 'sequence.db'}")
+    values, errors = allocate_concurrently(app, 'INV')
+    assert_no_collisions(values, errors)
+    with app.app_context():
+        assert db.session.get(DocumentSequence, ('INV', YEAR)).last_value == len(values)
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                    reason='set TEST_POSTGRES_URL to a scratch Postgres database to run')
+def test_parallel_allocation_postgres():
+    app = sequence_app(os.environ['TEST_POSTGRES_URL'])
+    prefix = f'T{os.getpid() % 100000}'
+    try:
+        values, errors = allocate_concurrently(app, prefix)
+        assert_no_collisions(values, errors)
+    finally:
+        with app.app_context():
+            DocumentSequence.query.filter_by(prefix=prefix).delete()
+            db.session.commit()
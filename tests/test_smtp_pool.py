@@ -0,0 +1,25 @@
+from flask_mail import Message
+
+from app import create_app, mail
+from app.smtp_pool import get_pool
+
+MESSAGES = 40
+
+
+def send_all(send):
+    for i in range(MESSAGES):
+        send(Message(f'Pool {i}', recipients=['pool@example.com'], body=f'Message {i}'))
+
+
+def test_pool_sends_every_message_on_one_connection(smtp_server):
+    app = create_app(smtp_server.config())
+    with app.app_context():
+        # mail.send opens and closes a connection for every message
+        send_all(mail.send)
+        assert smtp_server.connections == MESSAGES
+
+        send_all(get_pool().send)
+        get_pool().close()
+
+    assert smtp_server.connections == MESSAGES + 1
+    assert len(smtp_server.messages) == 2 * MESSAGES
@@ -0,0 +1,73 @@
+import json
+import tracemalloc
+
+from app import db
+from app.api import ndjson_response
+from app.models import Payment
+from app.perf import seeded_app
+
+PATH = '/api/payments/'
+
+
+def measure_payments(clients):
+    """Read every payment as NDJSON and then as a JSON array, with tracemalloc running.
+
+    Returns a dict of the stream's peak memory and line count and the array's peak memory.
+    The first line is kept to compare with the array.
+    """
+    app, _ = seeded_app(clients, ids=lambda: None)
+    client = app.test_client()
+    client.get(f'{PATH}?limit=1')
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        response = client.get(f'{PATH}?stream=1', buffered=False)
+        lines = iter(response.response)
+        first = next(lines)
+        count = 1 + sum(1 for _ in lines)
+        response.close()
+        stream_peak = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        body = client.get(PATH).data
+        array_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    array = json.loads(body)
+    assert response.mimetype == 'application/x-ndjson'
+    assert count == len(array)
+    assert json.loads(first) == array[0]
+    return {'stream_peak': stream_peak, 'rows': count, 'array_peak': array_peak}
+
+
+def test_stream_memory_stays_flat_as_rows_grow():
+    # Both sizes span several STREAM_BATCH_SIZE batches
+    small = measure_payments(250)
+    large = measure_payments(1000)
+    assert large['rows'] > 3 * small['rows']
+    assert large['stream_peak'] < 1.5 * small['stream_peak'], (small, large)
+    assert large['array_peak'] > 3 * large['stream_peak'], (small, large)
+
+
+def test_first_line_goes_out_after_one_batch(seeded):
+    app, _ = seeded
+    batch_size = 100
+    with app.test_request_context():
+        # counted() records each row as SQLite steps to it, so `read` shows how far the cursor has got
+        read = []
+        db.session.connection().connection.create_function('counted', 1, lambda value: read.append(value) or value)
+        total = Payment.query.count()
+        assert total > 10 * batch_size
+
+        query = db.session.query(Payment.id, db.func.counted(Payment.id).label('counted')).order_by(Payment.id)
+        lines = iter(ndjson_response(query, lambda row: {'id': row.id}, batch_size=batch_size).response)
+        assert json.loads(next(lines)) == {'id': 1}
+        # One batch, plus the row SQLite reads ahead to know the batch is full
+        assert len(read) <= batch_size + 1
+
+        assert 1 + sum(1 for _ in lines) == total
+        assert len(read) == total